@@ -0,0 +1 @@
+# AI Analytics Module
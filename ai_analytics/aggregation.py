@@ -1,14 +1,19 @@
 import pandas as pd
 from pathlib import Path
 
+from .partial_aggregates import PartialAggregate
+from .storage import write_table
+
 
 # -----------------------------
 # Output path (LOCKED)
 # -----------------------------
-OUTPUT_PATH = Path("data/processed/cost_analytics.csv")
+OUTPUT_PATH = Path(__file__).resolve().parent.parent / "data" / "processed" / "cost_analytics.csv"
+
+COST_GROUP_KEYS = ["item_code", "canonical_item_name", "region", "supplier"]
 
 
-def aggregate_costs(df: pd.DataFrame) -> pd.DataFrame:
+def aggregate_costs(df: pd.DataFrame, write: bool = True) -> pd.DataFrame:
     """
     Aggregates cost data at item, region, and supplier level.
 
@@ -16,6 +21,8 @@ def aggregate_costs(df: pd.DataFrame) -> pd.DataFrame:
     ----------
     df : pd.DataFrame
         Cleaned and merged purchase order dataframe.
+    write : bool
+        Save the result to cost_analytics.csv.
 
     Returns
     -------
@@ -45,7 +52,7 @@ def aggregate_costs(df: pd.DataFrame) -> pd.DataFrame:
     # -----------------------------
     agg_df = (
         df.groupby(
-            ["item_code", "canonical_item_name", "region", "supplier"],
+            COST_GROUP_KEYS,
             as_index=False
         )
         .agg(
@@ -65,7 +72,41 @@ def aggregate_costs(df: pd.DataFrame) -> pd.DataFrame:
     # -----------------------------
     # Save output
     # -----------------------------
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    agg_df.to_csv(OUTPUT_PATH, index=False)
+    if write:
+        write_table(agg_df, OUTPUT_PATH)
+
+    return agg_df
+
+
+def partial_costs(df: pd.DataFrame) -> PartialAggregate:
+    """
+    Mergeable cost statistics for one chunk of cleaned PO rows.
+
+    Combine chunks with `PartialAggregate.merge` and finish with
+    `aggregate_costs_from_partial`.
+    """
+    return PartialAggregate(COST_GROUP_KEYS).update(df)
+
+
+def aggregate_costs_from_partial(partial: PartialAggregate, write: bool = True) -> pd.DataFrame:
+    """
+    Builds cost_analytics.csv from merged partial aggregates.
+
+    Averages, min/max and std are exact; median_price comes from the
+    quantile sketch (within 0.5% relative error).
+    """
+    result = partial.result().sort_values(COST_GROUP_KEYS, kind="stable")
+
+    agg_df = pd.DataFrame({
+        **{key: result[key] for key in COST_GROUP_KEYS},
+        "avg_price": result["mean"],
+        "median_price": result["median"],
+        "min_price": result["min"],
+        "max_price": result["max"],
+        "price_std": result["std"].fillna(0.0),
+    }).reset_index(drop=True)
+
+    if write:
+        write_table(agg_df, OUTPUT_PATH)
 
     return agg_df
@@ -1,11 +1,14 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from .storage import write_table
+
 
 # -----------------------------
 # Output path (LOCKED)
 # -----------------------------
-OUTPUT_PATH = Path("data/processed/anomalies.csv")
+OUTPUT_PATH = Path(__file__).resolve().parent.parent / "data" / "processed" / "anomalies.csv"
 
 # -----------------------------
 # Detection thresholds
@@ -13,12 +16,182 @@ OUTPUT_PATH = Path("data/processed/anomalies.csv")
 STD_MULTIPLIER = 2.5
 ABSOLUTE_THRESHOLD_RATIO = 0.20  # 20% deviation
 
+MAD_THRESHOLD = 3.5        # modified z-score (Iglewicz & Hoaglin)
+MAD_SCALE = 0.6745
+IQR_MULTIPLIER = 1.5       # Tukey fences
+
+ROLLING_WINDOW = "90D"
+ROLLING_MIN_PERIODS = 5
+ROLLING_Z_THRESHOLD = 3.0
+ROLLING_KEYS = ["item_code", "region"]
+
+# -----------------------------
+# Detector registry
+# -----------------------------
+# Each detector takes the PO dataframe and returns a DataFrame aligned to
+# its index with columns:
+#   score    - deviation relative to the detector's threshold (>1 = outlier)
+#   flag     - boolean anomaly decision
+#   expected - reference price the row was compared against
+#   reason   - human readable rule description
+DETECTORS = {}
+DEFAULT_DETECTORS = ("std",)
+
+OUTPUT_COLUMNS = [
+    "po_id", "item_code", "unit_price", "expected_price",
+    "anomaly_flag", "anomaly_reason", "anomaly_score", "detector",
+]
+
+
+def register_detector(name):
+    def decorator(fn):
+        DETECTORS[name] = fn
+        return fn
+    return decorator
+
+
+def _detector_result(deviation, threshold, expected, reason):
+    return pd.DataFrame({
+        "score": deviation / threshold,
+        "flag": deviation > threshold,
+        "expected": expected,
+        "reason": reason,
+    })
+
+
+def _ratio_fallback(median_price, use_fallback, threshold, reason):
+    """Swaps in the 20%-of-median rule where a spread statistic is zero."""
+    threshold = threshold.where(
+        ~use_fallback, ABSOLUTE_THRESHOLD_RATIO * median_price
+    )
+    reason = reason.where(
+        ~use_fallback,
+        f"Deviation exceeds {int(ABSOLUTE_THRESHOLD_RATIO*100)}% of median price"
+    )
+    return threshold, reason
+
+
+def _std_rule(df: pd.DataFrame, median_price: pd.Series, std_price: pd.Series) -> pd.DataFrame:
+    deviation = (df["unit_price"] - median_price).abs()
+    threshold, reason = _ratio_fallback(
+        median_price,
+        ~(std_price > 0),
+        STD_MULTIPLIER * std_price,
+        pd.Series(
+            f"Deviation exceeds {STD_MULTIPLIER}× standard deviation",
+            index=df.index
+        ),
+    )
+    return _detector_result(deviation, threshold, median_price, reason)
 
-def detect_anomalies(df: pd.DataFrame) -> pd.DataFrame:
+
+@register_detector("std")
+def std_detector(df: pd.DataFrame) -> pd.DataFrame:
+    """Median ± 2.5·std per item; 20% of median when there is no variance."""
+    by_item = df.groupby("item_code", sort=False)["unit_price"]
+    return _std_rule(df, by_item.transform("median"), by_item.transform("std"))
+
+
+@register_detector("mad")
+def mad_detector(df: pd.DataFrame) -> pd.DataFrame:
+    """Modified z-score on the median absolute deviation per item."""
+    by_item = df.groupby("item_code", sort=False)["unit_price"]
+    median_price = by_item.transform("median")
+
+    deviation = (df["unit_price"] - median_price).abs()
+    mad = deviation.groupby(df["item_code"], sort=False).transform("median")
+
+    threshold, reason = _ratio_fallback(
+        median_price,
+        ~(mad > 0),
+        MAD_THRESHOLD * mad / MAD_SCALE,
+        pd.Series(
+            f"Modified z-score exceeds {MAD_THRESHOLD} (MAD)",
+            index=df.index
+        ),
+    )
+    return _detector_result(deviation, threshold, median_price, reason)
+
+
+@register_detector("iqr")
+def iqr_detector(df: pd.DataFrame) -> pd.DataFrame:
+    """Tukey fences (Q1 - 1.5·IQR, Q3 + 1.5·IQR) per item."""
+    by_item = df.groupby("item_code", sort=False)["unit_price"]
+    median_price = by_item.transform("median")
+    q1 = df["item_code"].map(by_item.quantile(0.25))
+    q3 = df["item_code"].map(by_item.quantile(0.75))
+    iqr = q3 - q1
+
+    # Distance from the median to the fence on the side the price falls
+    above = df["unit_price"] >= median_price
+    fence_distance = ((q3 - median_price) + IQR_MULTIPLIER * iqr).where(
+        above, (median_price - q1) + IQR_MULTIPLIER * iqr
+    )
+
+    deviation = (df["unit_price"] - median_price).abs()
+    threshold, reason = _ratio_fallback(
+        median_price,
+        ~(iqr > 0),
+        fence_distance,
+        pd.Series(
+            f"Price outside {IQR_MULTIPLIER}×IQR fences",
+            index=df.index
+        ),
+    )
+    return _detector_result(deviation, threshold, median_price, reason)
+
+
+@register_detector("rolling_zscore")
+def rolling_zscore_detector(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    z-score against the trailing ROLLING_WINDOW of earlier POs for the same
+    item and region. Only past observations inside the window are used, so
+    a new batch needs just that much history, not the full dataset.
+    """
+    keys = [k for k in ROLLING_KEYS if k in df.columns]
+    if "po_date" not in df.columns:
+        raise ValueError("rolling_zscore detector requires a po_date column")
+
+    valid = df[keys + ["po_date"]].notna().all(axis=1)
+    ordered = df[valid].sort_values(keys + ["po_date"], kind="stable")
+
+    rolling = (
+        ordered.set_index("po_date")
+        .groupby(keys, sort=False)["unit_price"]
+        .rolling(ROLLING_WINDOW, closed="left", min_periods=ROLLING_MIN_PERIODS)
+    )
+    window_mean = pd.Series(rolling.mean().to_numpy(), index=ordered.index)
+    window_std = pd.Series(rolling.std().to_numpy(), index=ordered.index)
+
+    window_mean = window_mean.reindex(df.index)
+    window_std = window_std.reindex(df.index)
+
+    deviation = (df["unit_price"] - window_mean).abs()
+    threshold = ROLLING_Z_THRESHOLD * window_std.where(window_std > 0)
+    return _detector_result(
+        deviation,
+        threshold,
+        window_mean,
+        f"Deviation exceeds {ROLLING_Z_THRESHOLD}× std of prior {ROLLING_WINDOW}",
+    )
+
+
+def detect_anomalies(
+    df: pd.DataFrame,
+    detectors=DEFAULT_DETECTORS,
+    history: pd.DataFrame = None,
+    write: bool = True,
+) -> pd.DataFrame:
     """
     Detects price anomalies at PO level.
 
     Strategy:
+    - Each configured detector scores every row in one vectorized pass
+    - A row is an anomaly if any detector flags it; the reported reason,
+      expected price and score come from the highest-scoring flagging
+      detector
+
+    The default "std" detector is the original rule:
     - If price variance exists: use std-based rule
     - If no variance: use absolute deviation rule
 
@@ -26,6 +199,14 @@ def detect_anomalies(df: pd.DataFrame) -> pd.DataFrame:
     ----------
     df : pd.DataFrame
         Cleaned and merged purchase order dataframe.
+    detectors : sequence of str
+        Names registered in DETECTORS ("std", "mad", "iqr",
+        "rolling_zscore").
+    history : pd.DataFrame, optional
+        Earlier POs used only as context (e.g. the trailing window for
+        streaming batches). Their anomalies are not reported.
+    write : bool
+        Save the result to anomalies.csv.
 
     Returns
     -------
@@ -45,62 +226,95 @@ def detect_anomalies(df: pd.DataFrame) -> pd.DataFrame:
             f"Anomaly detection input missing columns: {sorted(missing)}"
         )
 
-    anomaly_records = []
+    unknown = [name for name in detectors if name not in DETECTORS]
+    if unknown or not detectors:
+        raise ValueError(
+            f"Unknown anomaly detectors {unknown}; "
+            f"available: {sorted(DETECTORS)}"
+        )
+
+    # -----------------------------
+    # Prepend context rows (excluded from the output)
+    # -----------------------------
+    is_batch = np.ones(len(df), dtype=bool)
+    if history is not None and not history.empty:
+        df = pd.concat([history, df], ignore_index=True)
+        is_batch = np.concatenate([np.zeros(len(history), dtype=bool), is_batch])
+    else:
+        df = df.reset_index(drop=True)
+
+    keep = df["item_code"].notna().to_numpy()
+    df = df[keep]
+    is_batch = is_batch[keep]
 
     # -----------------------------
-    # Process per item_code
+    # Run detectors, keep the strongest flagging one per row
     # -----------------------------
-    for item_code, group in df.groupby("item_code"):
-        median_price = group["unit_price"].median()
-        std_price = group["unit_price"].std()
-
-        # Safety guard
-        if pd.isna(median_price):
-            continue
-
-        for _, row in group.iterrows():
-            deviation = abs(row["unit_price"] - median_price)
-
-            # Case 1: Standard deviation available
-            if std_price and not pd.isna(std_price) and std_price > 0:
-                threshold = STD_MULTIPLIER * std_price
-                is_anomaly = deviation > threshold
-                reason = (
-                    f"Deviation exceeds {STD_MULTIPLIER}× standard deviation"
-                )
-
-            # Case 2: No variance fallback
-            else:
-                threshold = ABSOLUTE_THRESHOLD_RATIO * median_price
-                is_anomaly = deviation > threshold
-                reason = (
-                    f"Deviation exceeds "
-                    f"{int(ABSOLUTE_THRESHOLD_RATIO*100)}% of median price"
-                )
-
-            if is_anomaly:
-                anomaly_records.append({
-                    "po_id": row["po_id"],
-                    "item_code": item_code,
-                    "unit_price": row["unit_price"],
-                    "expected_price": median_price,
-                    "anomaly_flag": True,
-                    "anomaly_reason": reason,
-                })
-
-    anomaly_df = pd.DataFrame(anomaly_records)
+    results = [DETECTORS[name](df) for name in detectors]
+    anomaly_df = _collect_anomalies(df, results, detectors, is_batch)
+
+    return save_anomalies(anomaly_df, write=write)
+
+
+def detect_anomalies_with_item_stats(df: pd.DataFrame, item_stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applies the "std" rule using precomputed per-item statistics.
+
+    Used by the chunked pipeline: `item_stats` (indexed by item_code with
+    median_price and std_price columns) comes from a first pass over all
+    chunks, so each chunk can be checked independently. Output is not
+    saved; concatenate chunk results and pass them to `save_anomalies`.
+    """
+    df = df[df["item_code"].notna()]
+    median_price = df["item_code"].map(item_stats["median_price"])
+    std_price = df["item_code"].map(item_stats["std_price"])
+
+    results = [_std_rule(df, median_price, std_price)]
+    return _collect_anomalies(df, results, ("std",), np.ones(len(df), dtype=bool))
+
+
+def _collect_anomalies(df, results, detectors, is_batch):
+    # -----------------------------
+    # Keep the strongest flagging detector per row
+    # -----------------------------
+    scores = np.column_stack([
+        np.where(r["flag"].to_numpy(dtype=bool), r["score"].to_numpy(dtype=float), -np.inf)
+        for r in results
+    ])
+    is_anomaly = (scores > -np.inf).any(axis=1)
+    best = scores.argmax(axis=1)
+
+    def pick(column, dtype=float):
+        values = np.column_stack([r[column].to_numpy(dtype=dtype) for r in results])
+        return np.take_along_axis(values, best[:, None], axis=1)[:, 0]
+
+    return pd.DataFrame({
+        "po_id": df["po_id"],
+        "item_code": df["item_code"],
+        "unit_price": df["unit_price"],
+        "expected_price": pick("expected"),
+        "anomaly_flag": True,
+        "anomaly_reason": pick("reason", dtype=object),
+        "anomaly_score": pick("score"),
+        "detector": np.asarray(detectors, dtype=object)[best],
+    })[is_anomaly & is_batch]
+
+
+def save_anomalies(anomaly_df: pd.DataFrame, write: bool = True) -> pd.DataFrame:
+    """Orders anomalies by item_code and (if `write`) writes anomalies.csv."""
+    # Grouped by item_code (sorted), original row order within each item
+    anomaly_df = anomaly_df.sort_values(
+        "item_code", kind="stable"
+    ).reset_index(drop=True)
 
     # Ensure columns exist even if empty
     if anomaly_df.empty:
-        anomaly_df = pd.DataFrame(columns=[
-            "po_id", "item_code", "unit_price", "expected_price",
-            "anomaly_flag", "anomaly_reason"
-        ])
+        anomaly_df = pd.DataFrame(columns=OUTPUT_COLUMNS)
 
     # -----------------------------
     # Save output
     # -----------------------------
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    anomaly_df.to_csv(OUTPUT_PATH, index=False)
+    if write:
+        write_table(anomaly_df, OUTPUT_PATH)
 
     return anomaly_df
@@ -0,0 +1,135 @@
+"""
+Benchmark: vectorized detect_anomalies vs the original per-row loop.
+
+Usage:
+    python -m ai_analytics.benchmark_anomaly_detection [rows ...]
+
+Defaults to 10k, 1M and 10M synthetic PO lines. The loop reference is
+only timed up to LOOP_MAX_ROWS (it takes minutes beyond that); where
+both run, outputs are checked for equality.
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import anomaly_detection
+from .anomaly_detection import (
+    detect_anomalies,
+    STD_MULTIPLIER,
+    ABSOLUTE_THRESHOLD_RATIO,
+)
+
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+LOOP_MAX_ROWS = 1_000_000
+ROWS_PER_ITEM = 50
+
+
+def detect_anomalies_loop(df: pd.DataFrame) -> pd.DataFrame:
+    """Original groupby + iterrows implementation, kept as reference."""
+    anomaly_records = []
+
+    for item_code, group in df.groupby("item_code"):
+        median_price = group["unit_price"].median()
+        std_price = group["unit_price"].std()
+
+        if pd.isna(median_price):
+            continue
+
+        for _, row in group.iterrows():
+            deviation = abs(row["unit_price"] - median_price)
+
+            if std_price and not pd.isna(std_price) and std_price > 0:
+                threshold = STD_MULTIPLIER * std_price
+                is_anomaly = deviation > threshold
+                reason = (
+                    f"Deviation exceeds {STD_MULTIPLIER}× standard deviation"
+                )
+            else:
+                threshold = ABSOLUTE_THRESHOLD_RATIO * median_price
+                is_anomaly = deviation > threshold
+                reason = (
+                    f"Deviation exceeds "
+                    f"{int(ABSOLUTE_THRESHOLD_RATIO*100)}% of median price"
+                )
+
+            if is_anomaly:
+                anomaly_records.append({
+                    "po_id": row["po_id"],
+                    "item_code": item_code,
+                    "unit_price": row["unit_price"],
+                    "expected_price": median_price,
+                    "anomaly_flag": True,
+                    "anomaly_reason": reason,
+                })
+
+    anomaly_df = pd.DataFrame(anomaly_records)
+    if anomaly_df.empty:
+        anomaly_df = pd.DataFrame(columns=[
+            "po_id", "item_code", "unit_price", "expected_price",
+            "anomaly_flag", "anomaly_reason"
+        ])
+    return anomaly_df
+
+
+def make_synthetic_pos(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_items = max(1, n_rows // ROWS_PER_ITEM)
+
+    item_idx = rng.integers(0, n_items, size=n_rows)
+    base_price = rng.uniform(100, 5000, size=n_items)
+    noise = rng.normal(1.0, 0.05, size=n_rows)
+
+    # Every 10th item has a fixed price, exercising the no-variance rule
+    fixed = (item_idx % 10) == 0
+    noise[fixed] = 1.0
+
+    # ~0.5% outliers
+    outliers = rng.random(n_rows) < 0.005
+    noise[outliers] *= rng.choice([0.3, 2.5], size=outliers.sum())
+
+    return pd.DataFrame({
+        "po_id": np.char.add("PO", np.arange(n_rows).astype(str)),
+        "item_code": np.char.add("ITEM_", item_idx.astype(str)),
+        "unit_price": np.round(base_price[item_idx] * noise, 2),
+    })
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main(sizes):
+    # Keep the benchmark away from data/processed/anomalies.csv
+    tmp_dir = tempfile.mkdtemp()
+    anomaly_detection.OUTPUT_PATH = Path(tmp_dir) / "anomalies.csv"
+
+    print(f"{'rows':>12} {'vectorized_s':>13} {'loop_s':>10} {'speedup':>9} {'anomalies':>10}")
+    for n_rows in sizes:
+        df = make_synthetic_pos(n_rows)
+
+        fast, fast_s = _timed(detect_anomalies, df)
+
+        if n_rows <= LOOP_MAX_ROWS:
+            slow, slow_s = _timed(detect_anomalies_loop, df)
+            pd.testing.assert_frame_equal(
+                fast[slow.columns], slow, check_dtype=False
+            )
+            loop_col = f"{slow_s:10.2f}"
+            speedup = f"{slow_s / fast_s:8.1f}x"
+        else:
+            loop_col = f"{'skipped':>10}"
+            speedup = f"{'-':>9}"
+
+        print(f"{n_rows:>12,} {fast_s:13.2f} {loop_col} {speedup} {len(fast):>10,}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,212 @@
+"""
+Pre-aggregated cost cube for drill-down views.
+
+One pass over the cleaned PO rows fills a PartialAggregate at the finest
+grain the configured levels need (every key any level uses, plus the
+calendar month of po_date). Each rollup level in CUBE_LEVELS is then
+combined from those cells, never from the rows, and written as its own
+small table under data/processed/cost_cube/. Every level keeps the
+mergeable moments (po_count, price_sum, price_sumsq, min/max) next to
+the finished averages, std and sketch medians.
+
+`CostCube` serves the stored levels: `fetch(level, **filters)` returns
+the matching rows of one level through per-column value indexes, so a
+request costs the size of its answer rather than a scan of the PO rows.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .aggregation import COST_GROUP_KEYS
+from .partial_aggregates import PartialAggregate
+from .storage import read_table, table_exists, write_table
+from .trend_analysis import month_index
+
+
+# -----------------------------
+# Output location
+# -----------------------------
+CUBE_DIR = Path(__file__).resolve().parent.parent / "data" / "processed" / "cost_cube"
+
+# Rollup level -> grouping keys ("month" is the calendar month of po_date)
+CUBE_LEVELS = {
+    "item": ["item_code", "canonical_item_name"],
+    "item_region_supplier": COST_GROUP_KEYS,
+    "item_month": ["item_code", "month"],
+    "category": ["category"],
+    "category_region": ["category", "region"],
+    "region": ["region"],
+    "supplier": ["supplier"],
+    "supplier_month": ["supplier", "month"],
+}
+
+# Key value for rows where it is missing, so they still count in every
+# level (a missing month is stored as UNKNOWN_MONTH until labelled)
+UNKNOWN_KEY = "Unknown"
+UNKNOWN_MONTH = -1
+
+CUBE_COLUMNS = [
+    "po_count", "price_sum", "price_sumsq",
+    "avg_price", "median_price", "min_price", "max_price", "price_std",
+]
+
+
+def cube_keys(levels=CUBE_LEVELS) -> list:
+    """Finest grain covering every level: all level keys, in first-use order."""
+    return list(dict.fromkeys(key for keys in levels.values() for key in keys))
+
+
+def available_levels(columns, levels=CUBE_LEVELS) -> dict:
+    """Levels whose keys can all be built from `columns` (month needs po_date)."""
+    columns = set(columns) | ({"month"} if "po_date" in columns else set())
+    return {level: keys for level, keys in levels.items() if set(keys) <= columns}
+
+
+def partial_cube(df: pd.DataFrame, levels=CUBE_LEVELS) -> PartialAggregate:
+    """
+    Mergeable cube cells for one chunk of cleaned PO rows.
+
+    Levels whose key columns are absent from `df` (e.g. category from an
+    older standardized file) are left out. Missing key values count as
+    UNKNOWN_KEY. Combine chunks with `PartialAggregate.merge` and finish
+    with `build_cube`.
+    """
+    if "unit_price" not in df.columns:
+        raise ValueError("Cost cube input missing columns: ['unit_price']")
+
+    keys = cube_keys(available_levels(df.columns, levels))
+    cells = {}
+    for key in keys:
+        if key == "month":
+            cells[key] = month_index(df["po_date"]).fillna(UNKNOWN_MONTH).astype(np.int64)
+            continue
+        values = df[key]
+        if values.isna().any():
+            values = values.astype(object).where(values.notna(), UNKNOWN_KEY)
+        cells[key] = values
+    cells = pd.DataFrame(cells, index=df.index).assign(unit_price=df["unit_price"])
+    return PartialAggregate(keys).update(cells)
+
+
+def _month_labels(months: pd.Series) -> pd.Series:
+    """Month index -> "YYYY-MM" (UNKNOWN_MONTH -> UNKNOWN_KEY)."""
+    months = months.astype(np.int64)
+    labels = (months // 12).astype(str) + "-" + (months % 12 + 1).astype(str).str.zfill(2)
+    return labels.where(months != UNKNOWN_MONTH, UNKNOWN_KEY)
+
+
+def build_cube(partial: PartialAggregate, levels=CUBE_LEVELS) -> dict:
+    """
+    Rollup table per level from merged `partial_cube` cells.
+
+    Counts, sums, averages, min/max and std are exact; median_price comes
+    from the quantile sketch (within 0.5% relative error). Levels the
+    cells were built without are left out.
+    """
+    cube = {}
+    for level, keys in levels.items():
+        if not set(keys) <= set(partial.keys):
+            continue
+        result = partial.rollup(keys).result().sort_values(keys, kind="stable")
+        table = pd.DataFrame({
+            **{key: result[key] for key in keys},
+            "po_count": result["count"].astype(np.int64),
+            "price_sum": result["sum"],
+            "price_sumsq": result["sumsq"],
+            "avg_price": result["mean"],
+            "median_price": result["median"],
+            "min_price": result["min"],
+            "max_price": result["max"],
+            "price_std": result["std"].fillna(0.0),
+        }).reset_index(drop=True)
+        if "month" in keys:
+            table["month"] = _month_labels(table["month"])
+        cube[level] = table
+    return cube
+
+
+def save_cube(cube: dict, directory=CUBE_DIR) -> None:
+    """Writes each level to `directory`/<level>.csv (and its Parquet copy)."""
+    for level, table in cube.items():
+        write_table(table, Path(directory) / f"{level}.csv")
+
+
+def load_cube(directory=CUBE_DIR, levels=CUBE_LEVELS) -> dict:
+    """Stored level tables; levels that were never written are left out."""
+    directory = Path(directory)
+    return {
+        level: read_table(directory / f"{level}.csv")
+        for level in levels
+        if table_exists(directory / f"{level}.csv")
+    }
+
+
+class CostCube:
+    """
+    Read-only lookups into the cube levels.
+
+    Row positions are indexed per key value when the cube is built, so
+    `fetch` intersects the postings of the filtered keys and copies only
+    the matching rows. Filter values are compared as strings (as they
+    arrive in query parameters).
+    """
+
+    def __init__(self, tables: dict, levels=CUBE_LEVELS):
+        self.tables = {}
+        self.keys = {}
+        self.index = {}
+
+        for level, table in tables.items():
+            keys = [key for key in levels.get(level, []) if key in table.columns]
+            self.tables[level] = table.reset_index(drop=True)
+            self.keys[level] = keys
+            self.index[level] = {
+                key: {
+                    str(value): np.asarray(rows, dtype=np.int64)
+                    for value, rows in table.groupby(key, sort=False, observed=True).indices.items()
+                }
+                for key in keys
+            }
+
+    def levels(self) -> dict:
+        """Level name -> grouping keys, for every level available."""
+        return dict(self.keys)
+
+    def level_for(self, keys) -> str:
+        """Name of the level grouped by exactly `keys` (any order)."""
+        wanted = set(keys)
+        for level, level_keys in self.keys.items():
+            if set(level_keys) == wanted:
+                return level
+        raise KeyError(f"No cube level grouped by {sorted(wanted)}")
+
+    def fetch(self, level: str, **filters) -> pd.DataFrame:
+        """
+        Rows of `level` whose key columns equal the given filter values,
+        e.g. ``fetch("category_region", region="North")``.
+        """
+        if level not in self.tables:
+            raise KeyError(f"Unknown cube level {level!r}; available: {sorted(self.tables)}")
+        unknown = set(filters) - set(self.keys[level])
+        if unknown:
+            raise ValueError(
+                f"Cube level {level!r} cannot be filtered by {sorted(unknown)}; "
+                f"its keys are {self.keys[level]}"
+            )
+
+        table = self.tables[level]
+        if not filters:
+            return table.copy()
+
+        postings = sorted(
+            (self.index[level][key].get(str(value), np.empty(0, dtype=np.int64)) for key, value in filters.items()),
+            key=len,
+        )
+        rows = postings[0]
+        for other in postings[1:]:
+            if len(rows) == 0:
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return table.iloc[rows].reset_index(drop=True)
@@ -1,12 +1,19 @@
+import logging
+
 import pandas as pd
 from pathlib import Path
 
+from .storage import read_table, table_columns, table_exists
+
+logger = logging.getLogger(__name__)
+
 
 # -----------------------------
 # File paths (DO NOT CHANGE)
 # -----------------------------
-RAW_PO_PATH = Path("data/raw/purchase_orders_raw.csv")
-STD_ITEMS_PATH = Path("data/processed/standardized_items.csv")
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+RAW_PO_PATH = DATA_DIR / "raw" / "purchase_orders_raw.csv"
+STD_ITEMS_PATH = DATA_DIR / "processed" / "standardized_items.csv"
 
 
 # -----------------------------
@@ -31,20 +38,25 @@ STD_ITEMS_COLUMNS = [
     "confidence_score",
 ]
 
+# Read when present (older standardized files predate them)
+STD_ITEMS_OPTIONAL_COLUMNS = [
+    "category",
+]
+
 
 # -----------------------------
 # Internal helpers
 # -----------------------------
 def _check_file_exists(path: Path):
-    if not path.exists():
+    if not table_exists(path):
         raise FileNotFoundError(
             f"Required file not found: {path.as_posix()}"
         )
 
 
-def _check_schema(df: pd.DataFrame, expected_cols: list, file_name: str):
+def _check_schema(df: pd.DataFrame, expected_cols: list, file_name: str, optional_cols=()):
     missing = set(expected_cols) - set(df.columns)
-    extra = set(df.columns) - set(expected_cols)
+    extra = set(df.columns) - set(expected_cols) - set(optional_cols)
 
     if missing:
         raise ValueError(
@@ -53,18 +65,48 @@ def _check_schema(df: pd.DataFrame, expected_cols: list, file_name: str):
 
     # Extra columns are allowed but warned
     if extra:
-        print(
-            f"Warning: {file_name} has extra columns "
-            f"that will be ignored: {sorted(extra)}"
+        logger.warning(
+            "%s has extra columns that will be ignored: %s",
+            file_name, sorted(extra)
         )
 
 
+def _read_raw_pos(chunksize=None):
+    _check_file_exists(RAW_PO_PATH)
+
+    # Validate the header, then parse only the expected columns
+    header = pd.read_csv(RAW_PO_PATH, nrows=0)
+    _check_schema(header, RAW_PO_COLUMNS, "purchase_orders_raw.csv")
+
+    if chunksize:
+        return pd.read_csv(
+            RAW_PO_PATH, usecols=RAW_PO_COLUMNS, chunksize=chunksize
+        )
+
+    # Return only expected columns (order preserved)
+    return pd.read_csv(RAW_PO_PATH, usecols=RAW_PO_COLUMNS)[RAW_PO_COLUMNS]
+
+
+def _read_std_items():
+    _check_file_exists(STD_ITEMS_PATH)
+
+    stored = table_columns(STD_ITEMS_PATH)
+    _check_schema(
+        pd.DataFrame(columns=stored), STD_ITEMS_COLUMNS, "standardized_items.csv",
+        optional_cols=STD_ITEMS_OPTIONAL_COLUMNS,
+    )
+    columns = STD_ITEMS_COLUMNS + [col for col in STD_ITEMS_OPTIONAL_COLUMNS if col in stored]
+
+    # Parquet copy (if present) is read column-selectively
+    return read_table(STD_ITEMS_PATH, columns=columns)[columns]
+
+
 # -----------------------------
 # Public API
 # -----------------------------
 def load_data():
     """
-    Loads and validates input CSV files.
+    Loads and validates input files.
 
     Returns
     -------
@@ -74,20 +116,35 @@ def load_data():
         Standardized item mapping.
     """
 
-    # Check files exist
-    _check_file_exists(RAW_PO_PATH)
-    _check_file_exists(STD_ITEMS_PATH)
+    raw_df = _read_raw_pos()
+    std_df = _read_std_items()
+
+    return raw_df, std_df
 
-    # Load CSVs
-    raw_df = pd.read_csv(RAW_PO_PATH)
-    std_df = pd.read_csv(STD_ITEMS_PATH)
 
-    # Validate schemas
-    _check_schema(raw_df, RAW_PO_COLUMNS, "purchase_orders_raw.csv")
-    _check_schema(std_df, STD_ITEMS_COLUMNS, "standardized_items.csv")
+def load_raw_pos():
+    """Loads and validates raw purchase order data only."""
+    return _read_raw_pos()
 
-    # Return only expected columns (order preserved)
-    raw_df = raw_df[RAW_PO_COLUMNS]
-    std_df = std_df[STD_ITEMS_COLUMNS]
 
-    return raw_df, std_df
+def load_data_chunked(chunksize: int):
+    """
+    Streaming variant of `load_data` for raw files larger than memory.
+
+    Returns
+    -------
+    raw_chunks : callable
+        Zero-argument function returning a fresh iterator of raw PO
+        DataFrames with at most `chunksize` rows (call it once per pass).
+    std_df : pd.DataFrame
+        Standardized item mapping, loaded in full (one small row per PO).
+    """
+
+    # Validate up front so errors surface before the first chunk
+    _read_raw_pos(chunksize=chunksize).close()
+    std_df = _read_std_items()
+
+    def raw_chunks():
+        return _read_raw_pos(chunksize=chunksize)
+
+    return raw_chunks, std_df
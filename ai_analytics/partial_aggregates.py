@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+
+# -----------------------------
+# Quantile sketch accuracy
+# -----------------------------
+# Log-spaced buckets (DDSketch style): any quantile estimate is within
+# SKETCH_RELATIVE_ACCURACY of a true sample value of that rank.
+SKETCH_RELATIVE_ACCURACY = 0.005
+_GAMMA = (1 + SKETCH_RELATIVE_ACCURACY) / (1 - SKETCH_RELATIVE_ACCURACY)
+_LOG_GAMMA = np.log(_GAMMA)
+
+STAT_COLUMNS = ["count", "sum", "sumsq", "min", "max"]
+
+
+def _partial_stats(df: pd.DataFrame, keys: list, value_col: str) -> pd.DataFrame:
+    values = df[value_col].astype(float)
+    frame = df[keys].assign(
+        _value=values,
+        _sq=values * values,
+    )
+    return (
+        frame.groupby(keys, sort=False)
+        .agg(
+            count=("_value", "count"),
+            sum=("_value", "sum"),
+            sumsq=("_sq", "sum"),
+            min=("_value", "min"),
+            max=("_value", "max"),
+        )
+        .reset_index()
+    )
+
+
+def _sketch_bins(df: pd.DataFrame, keys: list, value_col: str) -> pd.DataFrame:
+    values = df[value_col].astype(float)
+    positive = values > 0
+    bins = np.ceil(np.log(values[positive]) / _LOG_GAMMA).astype(np.int32)
+    return (
+        df.loc[positive, keys]
+        .assign(bin=bins)
+        .groupby(keys + ["bin"], sort=False)
+        .size()
+        .rename("count")
+        .reset_index()
+    )
+
+
+def _merge_stats(frames: list, keys: list) -> pd.DataFrame:
+    return (
+        pd.concat(frames, ignore_index=True)
+        .groupby(keys, sort=False)
+        .agg(count=("count", "sum"), sum=("sum", "sum"), sumsq=("sumsq", "sum"),
+             min=("min", "min"), max=("max", "max"))
+        .reset_index()
+    )
+
+
+def _merge_bins(frames: list, keys: list) -> pd.DataFrame:
+    return (
+        pd.concat(frames, ignore_index=True)
+        .groupby(keys + ["bin"], sort=False)["count"]
+        .sum()
+        .reset_index()
+    )
+
+
+class PartialAggregate:
+    """
+    Mergeable price statistics per group.
+
+    Keeps count / sum / sum of squares / min / max plus a log-bucket
+    quantile sketch for every group of `keys`. Partials built from
+    separate chunks (or processes) combine with `merge`, so memory is
+    bounded by the number of groups rather than the number of rows.
+    With `sketch=False` only the moments are kept and `result` has no
+    median.
+    """
+
+    def __init__(self, keys, value_col="unit_price", sketch=True):
+        self.keys = list(keys)
+        self.value_col = value_col
+        self.sketch = sketch
+        self.stats = pd.DataFrame(columns=self.keys + STAT_COLUMNS)
+        self.bins = pd.DataFrame(columns=self.keys + ["bin", "count"])
+
+    def update(self, df: pd.DataFrame) -> "PartialAggregate":
+        if df.empty:
+            return self
+        return self._absorb(
+            _partial_stats(df, self.keys, self.value_col),
+            _sketch_bins(df, self.keys, self.value_col) if self.sketch else self.bins,
+        )
+
+    def merge(self, other: "PartialAggregate") -> "PartialAggregate":
+        if other.keys != self.keys:
+            raise ValueError(
+                f"Cannot merge partials keyed by {other.keys} into {self.keys}"
+            )
+        return self._absorb(other.stats, other.bins)
+
+    def _absorb(self, stats, bins):
+        if self.stats.empty:
+            self.stats, self.bins = stats, bins
+        else:
+            self.stats = _merge_stats([self.stats, stats], self.keys)
+            if self.sketch:
+                self.bins = _merge_bins([self.bins, bins], self.keys)
+        return self
+
+    def rollup(self, keys) -> "PartialAggregate":
+        """
+        Partial for a coarser grouping (a subset of `self.keys`), combined
+        from the existing groups without revisiting any rows.
+        """
+        keys = list(keys)
+        unknown = set(keys) - set(self.keys)
+        if unknown:
+            raise ValueError(
+                f"Cannot roll up partials keyed by {self.keys} to {sorted(unknown)}"
+            )
+
+        rolled = PartialAggregate(keys, self.value_col, self.sketch)
+        if self.stats.empty:
+            return rolled
+        rolled.stats = _merge_stats([self.stats], keys)
+        if self.sketch:
+            rolled.bins = _merge_bins([self.bins], keys)
+        return rolled
+
+    def quantile(self, q: float) -> pd.DataFrame:
+        """Approximate q-quantile per group (keys + value column)."""
+        if self.bins.empty:
+            return pd.DataFrame(columns=self.keys + ["value"])
+
+        bins = self.bins.sort_values(self.keys + ["bin"], kind="stable")
+        by_group = bins.groupby(self.keys, sort=False)["count"]
+        cum = by_group.cumsum()
+        total = by_group.transform("sum")
+
+        # Linear interpolation between the two closest ranks, as pandas does
+        position = q * (total - 1)
+        lower = self._value_at_rank(bins, cum, np.floor(position))
+        upper = self._value_at_rank(bins, cum, np.ceil(position))
+
+        first = bins.groupby(self.keys, sort=False).head(1)
+        fraction = (position - np.floor(position)).loc[first.index].to_numpy()
+
+        value = lower + fraction * (upper - lower)
+        return first[self.keys].assign(value=value).reset_index(drop=True)
+
+    def _value_at_rank(self, bins, cum, rank):
+        """Bucket value holding the given 0-based rank, one per group."""
+        hit = bins[cum > rank]
+        first = hit.groupby(self.keys, sort=False).head(1)
+        return (2 * np.power(_GAMMA, first["bin"].astype(float)) / (_GAMMA + 1)).to_numpy()
+
+    def result(self) -> pd.DataFrame:
+        """Per-group count, mean, sample std (ddof=1), min, max and median."""
+        stats = self.stats.copy()
+        count = stats["count"].astype(float)
+        mean = stats["sum"] / count
+        var = (stats["sumsq"] - count * mean * mean) / (count - 1)
+
+        stats["mean"] = mean
+        # Guard tiny negatives from floating point cancellation
+        stats["std"] = np.sqrt(var.clip(lower=0)).where(count > 1)
+
+        if not self.sketch:
+            return stats
+        median = self.quantile(0.5).rename(columns={"value": "median"})
+        return stats.merge(median, on=self.keys, how="left")
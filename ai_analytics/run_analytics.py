@@ -1,11 +1,32 @@
-from load_data import load_data
-from price_cleaning import clean_and_merge
-from aggregation import aggregate_costs
-from trend_analysis import add_trend_labels
-from anomaly_detection import detect_anomalies
+import logging
+import sys
 
+import pandas as pd
+
+from .load_data import load_data, load_data_chunked
+from .price_cleaning import clean_and_merge
+from .aggregation import (
+    aggregate_costs,
+    aggregate_costs_from_partial,
+    partial_costs,
+    OUTPUT_PATH as COST_ANALYTICS_PATH,
+)
+from .partial_aggregates import PartialAggregate
+from .storage import write_table
+from .trend_analysis import add_trend_labels, add_trend_labels_from_partial, monthly_price_stats
+from .cost_cube import build_cube, partial_cube, save_cube
+from .anomaly_detection import (
+    detect_anomalies,
+    detect_anomalies_with_item_stats,
+    save_anomalies,
+    DEFAULT_DETECTORS,
+)
+
+
+def main(anomaly_detectors=DEFAULT_DETECTORS, chunksize=None):
+    if chunksize:
+        return main_chunked(chunksize)
 
-def main():
     print("Starting cost analytics pipeline...")
 
     # -----------------------------
@@ -27,28 +48,105 @@ def main():
     # Step 3: Cost aggregation
     # -----------------------------
     print("Aggregating cost data...")
-    cost_df = aggregate_costs(clean_df)
+    cost_df = aggregate_costs(clean_df, write=False)
 
     # -----------------------------
     # Step 4: Trend analysis
     # -----------------------------
     print("Adding trend labels...")
-    cost_df = add_trend_labels(cost_df)
+    cost_df = add_trend_labels(cost_df, clean_df)
+
+    # Save cost_analytics.csv with trend column added
+    write_table(cost_df, COST_ANALYTICS_PATH)
 
-    # Overwrite cost_analytics.csv with trend column added
-    cost_df.to_csv("data/processed/cost_analytics.csv", index=False)
+    # -----------------------------
+    # Step 5: Cost cube rollups
+    # -----------------------------
+    print("Building cost cube...")
+    save_cube(build_cube(partial_cube(clean_df)))
 
     # -----------------------------
-    # Step 5: Anomaly detection
+    # Step 6: Anomaly detection
     # -----------------------------
     print("Detecting anomalies...")
-    detect_anomalies(clean_df)
+    detect_anomalies(clean_df, detectors=anomaly_detectors)
+
+    print("Pipeline completed successfully.")
+    print("Outputs generated:")
+    print("- data/processed/cost_analytics.csv")
+    print("- data/processed/cost_cube/")
+    print("- data/processed/anomalies.csv")
+
+
+def main_chunked(chunksize):
+    """
+    Bounded-memory variant of `main` for raw PO files larger than RAM.
+
+    Pass 1 streams the raw file and merges per-chunk partial aggregates
+    (cost groups, per-item stats, monthly trend stats and cost cube
+    cells); pass 2 streams it again to flag anomalies against the
+    per-item stats. Only the po_id -> item_code mapping and the
+    aggregates are held in memory. Medians come from a
+    quantile sketch, and anomalies use the "std" detector.
+    """
+    print(f"Starting cost analytics pipeline (chunks of {chunksize:,} rows)...")
+
+    raw_chunks, std_df = load_data_chunked(chunksize)
+
+    # -----------------------------
+    # Pass 1: partial aggregates
+    # -----------------------------
+    print("Aggregating cost data...")
+    cost_partial = PartialAggregate(["item_code", "canonical_item_name", "region", "supplier"])
+    item_partial = PartialAggregate(["item_code"])
+    trend_partial = None
+    cube_partial = None
+    rows = 0
+
+    for raw_chunk in raw_chunks():
+        clean_chunk = clean_and_merge(raw_chunk, std_df)
+        cost_partial.merge(partial_costs(clean_chunk))
+        item_partial.update(clean_chunk)
+        monthly = monthly_price_stats(clean_chunk)
+        trend_partial = monthly if trend_partial is None else trend_partial.merge(monthly)
+        cells = partial_cube(clean_chunk)
+        cube_partial = cells if cube_partial is None else cube_partial.merge(cells)
+        rows += len(clean_chunk)
+
+    if rows == 0:
+        raise RuntimeError("Cleaned dataframe is empty. Check input data.")
+    print(f"Aggregated {rows:,} cleaned PO rows")
+
+    cost_df = aggregate_costs_from_partial(cost_partial, write=False)
+
+    print("Adding trend labels...")
+    cost_df = add_trend_labels_from_partial(cost_df, trend_partial)
+    write_table(cost_df, COST_ANALYTICS_PATH)
+
+    print("Building cost cube...")
+    save_cube(build_cube(cube_partial))
+
+    # -----------------------------
+    # Pass 2: anomalies against per-item stats
+    # -----------------------------
+    print("Detecting anomalies...")
+    item_stats = item_partial.result().set_index("item_code").rename(
+        columns={"median": "median_price", "std": "std_price"}
+    )
+
+    anomalies = [
+        detect_anomalies_with_item_stats(clean_and_merge(raw_chunk, std_df), item_stats)
+        for raw_chunk in raw_chunks()
+    ]
+    save_anomalies(pd.concat(anomalies, ignore_index=True))
 
     print("Pipeline completed successfully.")
     print("Outputs generated:")
     print("- data/processed/cost_analytics.csv")
+    print("- data/processed/cost_cube/")
     print("- data/processed/anomalies.csv")
 
 
 if __name__ == "__main__":
-    main()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main(chunksize=int(sys.argv[1]) if len(sys.argv) > 1 else None)
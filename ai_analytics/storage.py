@@ -0,0 +1,127 @@
+import importlib.util
+import logging
+import os
+from pathlib import Path
+
+import pandas as pd
+
+
+# -----------------------------
+# Storage formats for data/processed tables
+# -----------------------------
+# Every table keeps its historical .csv path; a typed, compressed .parquet
+# copy is written next to it. Readers prefer the Parquet copy when it is
+# at least as new as the CSV.
+STORAGE_FORMATS = tuple(
+    fmt.strip()
+    for fmt in os.environ.get("PROCESSED_STORAGE_FORMATS", "csv,parquet").split(",")
+    if fmt.strip()
+)
+PARQUET_COMPRESSION = "zstd"
+
+# Low-cardinality text columns stored dictionary-encoded
+CATEGORICAL_COLUMNS = {
+    "region",
+    "supplier",
+    "supplier_name",
+    "department",
+    "unit",
+    "category",
+    "month",
+    "trend_direction",
+    "anomaly_reason",
+    "detector",
+}
+DATETIME_COLUMNS = {"po_date"}
+
+logger = logging.getLogger(__name__)
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def parquet_path(path) -> Path:
+    return Path(path).with_suffix(".parquet")
+
+
+def _prefer_parquet(path: Path) -> bool:
+    pq_path = parquet_path(path)
+    return pq_path.exists() and parquet_available() and (
+        not path.exists() or pq_path.stat().st_mtime >= path.stat().st_mtime
+    )
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS and df[col].dtype == object:
+            df[col] = df[col].astype("category")
+        elif col in DATETIME_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    return df
+
+
+def write_table(df: pd.DataFrame, path, formats=None) -> None:
+    """
+    Writes a processed table to `path` (CSV) and/or its .parquet sibling.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Table to write.
+    path : str or Path
+        The table's CSV path, e.g. data/processed/cost_analytics.csv.
+    formats : sequence of str, optional
+        Any of "csv", "parquet". Defaults to STORAGE_FORMATS.
+    """
+
+    formats = STORAGE_FORMATS if formats is None else formats
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if "parquet" in formats and not parquet_available():
+        logger.warning("pyarrow not installed, writing CSV only")
+        formats = ("csv",)
+
+    if "csv" in formats:
+        df.to_csv(path, index=False)
+
+    if "parquet" in formats:
+        df = _typed(df)
+        tmp = parquet_path(path).with_suffix(".parquet.tmp")
+        df.to_parquet(tmp, index=False, compression=PARQUET_COMPRESSION)
+        os.replace(tmp, parquet_path(path))
+
+
+def read_table(path, columns=None) -> pd.DataFrame:
+    """
+    Reads a processed table, loading only `columns` when given.
+
+    Uses the Parquet copy if it exists and is not older than the CSV,
+    otherwise falls back to the CSV.
+    """
+
+    path = Path(path)
+    if _prefer_parquet(path):
+        return pd.read_parquet(parquet_path(path), columns=columns)
+
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Required file not found: {path.as_posix()}"
+        )
+    return pd.read_csv(path, usecols=columns)
+
+
+def table_columns(path) -> list:
+    """Column names of a stored table without loading its rows."""
+    path = Path(path)
+    if _prefer_parquet(path):
+        import pyarrow.parquet as pq
+        return pq.read_schema(parquet_path(path)).names
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def table_exists(path) -> bool:
+    path = Path(path)
+    return path.exists() or (parquet_path(path).exists() and parquet_available())
@@ -1,66 +1,130 @@
+import numpy as np
 import pandas as pd
 
+from .partial_aggregates import PartialAggregate
+
 # -----------------------------
-# Volatility threshold
+# Trend parameters
 # -----------------------------
-VOLATILITY_THRESHOLD = 0.15  # 15% coefficient of variation
+UPTREND_THRESHOLD = 0.02       # >2% of the average monthly price per month
+DOWNTREND_THRESHOLD = -0.02    # <-2% per month
+MIN_TREND_MONTHS = 3           # fewer months with purchases are always STABLE
 
+# Trends are fitted per item; add "region" for one trend per item and region
+TREND_KEYS = ["item_code"]
 
-def add_trend_labels(agg_df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Assigns price stability trends based on volatility.
+TREND_COLUMNS = ["trend_direction", "price_slope", "price_volatility", "trend_months"]
 
-    Trend interpretation:
-    - UP     : High price volatility (unstable pricing)
-    - STABLE : Low price volatility (stable pricing)
 
-    Parameters
-    ----------
-    agg_df : pd.DataFrame
-        Aggregated cost dataframe.
+def month_index(dates: pd.Series) -> pd.Series:
+    """Months since year 0, so consecutive months differ by 1."""
+    return dates.dt.year * 12 + dates.dt.month - 1
 
-    Returns
-    -------
-    pd.DataFrame
-        Aggregated dataframe with trend_direction column.
-    """
 
-    required_cols = [
-        "item_code",
-        "avg_price",
-        "price_std",
-    ]
+def monthly_price_stats(df: pd.DataFrame, by=TREND_KEYS) -> PartialAggregate:
+    """
+    Mergeable price moments per group and calendar month of po_date.
 
-    missing = set(required_cols) - set(agg_df.columns)
+    Combine chunks with `PartialAggregate.merge` and finish with
+    `trend_table`.
+    """
+    required_cols = list(by) + ["po_date", "unit_price"]
+    missing = set(required_cols) - set(df.columns)
     if missing:
         raise ValueError(
             f"Trend analysis input missing columns: {sorted(missing)}"
         )
 
-    trend_map = {}
+    monthly = PartialAggregate(list(by) + ["month"], sketch=False)
+    return monthly.update(df[required_cols].assign(month=month_index(df["po_date"])))
 
-    # -----------------------------
-    # Compute volatility per item
-    # -----------------------------
-    for item_code, group in agg_df.groupby("item_code"):
-        mean_price = group["avg_price"].mean()
-        std_price = group["price_std"].mean()
 
-        # Safety checks
-        if mean_price == 0 or pd.isna(mean_price) or pd.isna(std_price):
-            trend_map[item_code] = "STABLE"
-            continue
+def trend_table(monthly: PartialAggregate, by=TREND_KEYS) -> pd.DataFrame:
+    """
+    Trend per group from monthly price statistics.
+
+    Fits average price per month against the month number by least
+    squares, for all groups at once from per-group sums. The slope is
+    reported in price units per month (price_slope); relative to the
+    group's mean monthly price it decides the label:
+
+    - UP     : rising by more than UPTREND_THRESHOLD per month
+    - DOWN   : falling by more than DOWNTREND_THRESHOLD per month
+    - STABLE : otherwise, or fewer than MIN_TREND_MONTHS months of data
+
+    price_volatility is the coefficient of variation of all PO prices in
+    the group.
+    """
+    by = list(by)
+    stats = monthly.stats
+    # Months counted from the earliest one keep the sums well conditioned
+    x = (stats["month"] - stats["month"].min()).astype(float)
+    y = stats["sum"] / stats["count"]
+
+    sums = (
+        stats[by]
+        .assign(n=1.0, x=x, y=y, xx=x * x, xy=x * y,
+                count=stats["count"].astype(float), total=stats["sum"], sumsq=stats["sumsq"])
+        .groupby(by, sort=False, observed=True)
+        .sum()
+    )
 
-        coefficient_of_variation = std_price / mean_price
+    n = sums["n"]
+    denominator = n * sums["xx"] - sums["x"] ** 2
+    slope = ((n * sums["xy"] - sums["x"] * sums["y"]) / denominator.where(denominator > 0)).fillna(0.0)
+    relative_slope = slope / (sums["y"] / n)
 
-        if coefficient_of_variation > VOLATILITY_THRESHOLD:
-            trend_map[item_code] = "UP"
-        else:
-            trend_map[item_code] = "STABLE"
+    count = sums["count"]
+    mean = sums["total"] / count
+    variance = (sums["sumsq"] - count * mean * mean) / (count - 1)
+    volatility = (np.sqrt(variance.clip(lower=0)) / mean).where(count > 1).fillna(0.0)
 
-    # -----------------------------
-    # Assign labels
-    # -----------------------------
-    agg_df["trend_direction"] = agg_df["item_code"].map(trend_map)
+    enough = n >= MIN_TREND_MONTHS
+    direction = np.select(
+        [enough & (relative_slope > UPTREND_THRESHOLD), enough & (relative_slope < DOWNTREND_THRESHOLD)],
+        ["UP", "DOWN"],
+        "STABLE",
+    )
 
+    return pd.DataFrame({
+        "trend_direction": direction,
+        "price_slope": slope,
+        "price_volatility": volatility,
+        "trend_months": n.astype(np.int64),
+    }, index=sums.index).reset_index()
+
+
+def _merge_trends(agg_df: pd.DataFrame, trends: pd.DataFrame, by) -> pd.DataFrame:
+    agg_df = agg_df.drop(columns=[c for c in TREND_COLUMNS if c in agg_df.columns])
+    agg_df = agg_df.merge(trends, on=list(by), how="left", validate="many_to_one")
+    agg_df["trend_direction"] = agg_df["trend_direction"].fillna("STABLE")
+    agg_df[["price_slope", "price_volatility"]] = agg_df[["price_slope", "price_volatility"]].fillna(0.0)
+    agg_df["trend_months"] = agg_df["trend_months"].fillna(0).astype(np.int64)
     return agg_df
+
+
+def add_trend_labels(agg_df: pd.DataFrame, clean_df: pd.DataFrame, by=TREND_KEYS) -> pd.DataFrame:
+    """
+    Adds trend_direction, price_slope, price_volatility and trend_months
+    to the aggregated cost rows (see `trend_table`).
+
+    Parameters
+    ----------
+    agg_df : pd.DataFrame
+        Aggregated cost dataframe.
+    clean_df : pd.DataFrame
+        Cleaned PO rows the aggregates were built from (needs po_date).
+    by : list
+        Trend grouping keys, columns of both frames.
+
+    Returns
+    -------
+    pd.DataFrame
+        Aggregated dataframe with the trend columns.
+    """
+    return add_trend_labels_from_partial(agg_df, monthly_price_stats(clean_df, by), by)
+
+
+def add_trend_labels_from_partial(agg_df: pd.DataFrame, monthly: PartialAggregate, by=TREND_KEYS) -> pd.DataFrame:
+    """`add_trend_labels` from merged `monthly_price_stats` partials."""
+    return _merge_trends(agg_df, trend_table(monthly, by), by)
@@ -0,0 +1 @@
+# AI Free Text Module
@@ -1,63 +1,84 @@
-import re
-
-ITEM_KEYWORDS = [
-    "pipe", "valve", "flange", "gasket", "pump",
-    "bearing", "cable", "oil", "filter"
-]
-
-MATERIALS = [
-    "carbon steel", "stainless steel", "mild steel", "copper"
-]
-
-def generate_insights(text):
-    insights = []
-
-    lowered = text.lower()
-
-    # Items
-    items_found = sorted({
-        kw.capitalize() for kw in ITEM_KEYWORDS if kw in lowered
-    })
-    if items_found:
-        insights.append(f"Items detected: {', '.join(items_found)}")
-
-    # Materials
-    materials_found = sorted({
-        mat.title() for mat in MATERIALS if mat in lowered
-    })
-    if materials_found:
-        insights.append(f"Materials: {', '.join(materials_found)}")
-
-    # Sizes
-    sizes = re.findall(r"\b\d+(\.\d+)?\s*(mm|inch|in)\b", lowered)
-    sizes_clean = sorted({f"{s[0]} {s[1]}" for s in sizes})
-    if sizes_clean:
-        insights.append(f"Sizes: {', '.join(sizes_clean)}")
-
-    # Oil grades
-    oil_grade = re.findall(r"iso\s*\d+", lowered)
-    if oil_grade:
-        insights.append(f"Oil grade: {', '.join(sorted(set(oil_grade)))}")
-
-    # Prices
-    prices = sorted({
-        int(p) for p in re.findall(r"\b\d{3,6}\b", lowered)
-    })
-    if len(prices) >= 2:
-        insights.append(
-            f"Price range mentioned: {min(prices)} to {max(prices)}"
-        )
-    elif prices:
-        insights.append(f"Price mentioned: {prices[0]}")
-
-    # Context
-    context = []
-    if "maintenance" in lowered:
-        context.append("Maintenance")
-    if "operation" in lowered or "operations" in lowered:
-        context.append("Operations")
-
-    if context:
-        insights.append(f"Usage context: {', '.join(context)}")
-
-    return insights
+import json
+import re
+from pathlib import Path
+
+# Shared compiled keyword matcher
+from ai_standardization.keyword_matcher import KeywordMatcher
+
+
+# Section -> label -> keywords; edit the JSON to add items or materials
+KEYWORDS_PATH = Path(__file__).resolve().parent / "insight_keywords.json"
+KEYWORD_SECTIONS = ("items", "materials", "context")
+
+_keywords = json.loads(KEYWORDS_PATH.read_text(encoding="utf-8"))
+# One matcher for every section, so each text is scanned once
+MATCHER = KeywordMatcher({
+    (section, label): keywords
+    for section in KEYWORD_SECTIONS
+    for label, keywords in _keywords[section].items()
+})
+
+SIZE_PATTERN = re.compile(r"\b\d+(\.\d+)?\s*(mm|inch|in)\b")
+OIL_GRADE_PATTERN = re.compile(r"iso\s*\d+")
+PRICE_PATTERN = re.compile(r"\b\d{3,6}\b")
+
+
+def _insights(lowered, found):
+    insights = []
+
+    sections = {section: [] for section in KEYWORD_SECTIONS}
+    for section, label in found:
+        sections[section].append(label)
+
+    # Items
+    items_found = sorted(sections["items"])
+    if items_found:
+        insights.append(f"Items detected: {', '.join(items_found)}")
+
+    # Materials
+    materials_found = sorted(sections["materials"])
+    if materials_found:
+        insights.append(f"Materials: {', '.join(materials_found)}")
+
+    # Sizes
+    sizes = SIZE_PATTERN.findall(lowered)
+    sizes_clean = sorted({f"{s[0]} {s[1]}" for s in sizes})
+    if sizes_clean:
+        insights.append(f"Sizes: {', '.join(sizes_clean)}")
+
+    # Oil grades
+    oil_grade = OIL_GRADE_PATTERN.findall(lowered)
+    if oil_grade:
+        insights.append(f"Oil grade: {', '.join(sorted(set(oil_grade)))}")
+
+    # Prices
+    prices = sorted({
+        int(p) for p in PRICE_PATTERN.findall(lowered)
+    })
+    if len(prices) >= 2:
+        insights.append(
+            f"Price range mentioned: {min(prices)} to {max(prices)}"
+        )
+    elif prices:
+        insights.append(f"Price mentioned: {prices[0]}")
+
+    # Context, in config order
+    context = sections["context"]
+    if context:
+        insights.append(f"Usage context: {', '.join(context)}")
+
+    return insights
+
+
+def generate_insights(text):
+    lowered = text.lower()
+    return _insights(lowered, MATCHER.find(lowered))
+
+
+def generate_insights_batch(texts):
+    """`generate_insights` per text; keywords are matched in one batch pass."""
+    lowered = [text.lower() for text in texts]
+    return [
+        _insights(text, found)
+        for text, found in zip(lowered, MATCHER.find_batch(lowered))
+    ]
@@ -1,22 +1,107 @@
-from text_preprocessing import normalize_free_text
-from insight_generation import generate_insights
-
-def analyze_free_text(raw_text):
-    clean_text = normalize_free_text(raw_text)
-    bullets = generate_insights(clean_text)
-
-    return bullets
-
-
-if __name__ == "__main__":
-    sample_input = """
-    CS Pipe 100mm dia ordered for maintenance.
-    Stainless steel valve 2 inch purchased from ValveWorld.
-    Hydraulic oil ISO 68 required for operations.
-    Prices discussed around 1200 to 5000 range.
-    """
-
-    insights = analyze_free_text(sample_input)
-
-    for point in insights:
-        print("-", point)
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .text_preprocessing import normalize_free_text
+from .insight_generation import generate_insights, generate_insights_batch
+
+# Documents per worker task, and tasks kept in flight per worker. Input
+# is read only as fast as results are consumed, so memory stays flat.
+CHUNK_SIZE = 256
+PENDING_PER_WORKER = 2
+
+
+def analyze_free_text(raw_text):
+    clean_text = normalize_free_text(raw_text)
+    bullets = generate_insights(clean_text)
+
+    return bullets
+
+
+def _analyze_chunk(raw_texts):
+    return generate_insights_batch([normalize_free_text(text) for text in raw_texts])
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def create_pool(workers=0):
+    """Process pool for `analyze_free_text_batch`, reusable across batches."""
+    # spawn: forking a process that may be running threads (the API) is unsafe
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def analyze_free_text_batch(raw_texts, workers=0, chunk_size=CHUNK_SIZE, pool=None):
+    """
+    Generator of `analyze_free_text` results, in input order.
+
+    `raw_texts` may be any iterable, including a lazy one; it is read in
+    chunks of `chunk_size` that are analyzed in a process pool (`pool`,
+    or one created for this call with `workers` processes, 0 = all
+    cores; pass the pool's size along with `pool`). At most
+    PENDING_PER_WORKER chunks per worker are in flight, so memory does
+    not grow with the number of documents. `workers=1` without a pool
+    runs in-process.
+    """
+    chunks = _chunks(raw_texts, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if pool is None and workers == 1:
+        for chunk in chunks:
+            yield from _analyze_chunk(chunk)
+        return
+
+    own_pool = pool is None
+    if own_pool:
+        pool = create_pool(workers)
+    max_pending = PENDING_PER_WORKER * workers
+
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(_analyze_chunk, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_pool:
+            pool.shutdown()
+
+
+def main(path):
+    """Analyzes a JSON lines file (strings or objects with "text") to NDJSON on stdout."""
+    with open(path, encoding="utf-8") as f:
+        documents = (json.loads(line) for line in f if line.strip())
+        texts = (doc["text"] if isinstance(doc, dict) else doc for doc in documents)
+        for index, insights in enumerate(analyze_free_text_batch(texts)):
+            print(json.dumps({"index": index, "insights": insights}))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(sys.argv[1])
+        sys.exit()
+
+    sample_input = """
+    CS Pipe 100mm dia ordered for maintenance.
+    Stainless steel valve 2 inch purchased from ValveWorld.
+    Hydraulic oil ISO 68 required for operations.
+    Prices discussed around 1200 to 5000 range.
+    """
+
+    insights = analyze_free_text(sample_input)
+
+    for point in insights:
+        print("-", point)
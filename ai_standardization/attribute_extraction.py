@@ -1,20 +1,58 @@
 import re
 
+import pandas as pd
+
+# Units must end the word, so "50mm" is never read as a 50 m length
+DIAMETER_PATTERN = re.compile(r"(\d+(\.\d+)?)\s*(mm|inches|inch|in)\b")
+LENGTH_PATTERN = re.compile(r"(\d+(\.\d+)?)\s*(m|meters|meter|ft)\b")
+ATTRIBUTE_COLUMNS = ["diameter_mm", "diameter_dn", "length_m", "material"]
+
+# Nominal pipe sizes: NPS (inches) -> DN (mm)
+NPS_TO_DN = {
+    0.125: 6, 0.25: 8, 0.375: 10, 0.5: 15, 0.75: 20, 1: 25, 1.25: 32,
+    1.5: 40, 2: 50, 2.5: 65, 3: 80, 3.5: 90, 4: 100, 5: 125, 6: 150,
+    8: 200, 10: 250, 12: 300, 14: 350, 16: 400, 18: 450, 20: 500,
+    24: 600, 30: 750, 36: 900, 42: 1050, 48: 1200,
+}
+DN_SIZES = sorted(NPS_TO_DN.values())
+# A millimetre diameter within this relative distance of a DN size is
+# that size (4 inch = 101.6 mm -> DN 100)
+DN_TOLERANCE = 0.06
+
+
+def nominal_dn(value, unit):
+    """
+    DN size for a diameter in mm or inches. Inch sizes come from the NPS
+    table; millimetres snap to the nearest DN within DN_TOLERANCE and are
+    otherwise kept as they are.
+    """
+    if unit != "mm":
+        if value in NPS_TO_DN:
+            return float(NPS_TO_DN[value])
+        value = value * 25.4
+    nearest = min(DN_SIZES, key=lambda size: abs(size - value))
+    if abs(nearest - value) <= DN_TOLERANCE * nearest:
+        return float(nearest)
+    return round(value, 2)
+
+
 def extract_attributes(text):
     attributes = {}
 
-    dia = re.search(r"(\d+(\.\d+)?)\s*(mm|inch|in)", text)
+    dia = DIAMETER_PATTERN.search(text)
     if dia:
         value = float(dia.group(1))
         unit = dia.group(3)
+        dn = nominal_dn(value, unit)
 
-        if unit in ["inch", "in"]:
+        if unit != "mm":
             value = value * 25.4
             unit = "mm"
 
         attributes["diameter_mm"] = round(value, 2)
+        attributes["diameter_dn"] = dn
 
-    length = re.search(r"(\d+(\.\d+)?)\s*(m|meter|ft)", text)
+    length = LENGTH_PATTERN.search(text)
     if length:
         value = float(length.group(1))
         unit = length.group(3)
@@ -31,3 +69,32 @@ def extract_attributes(text):
         attributes["material"] = "stainless steel"
 
     return attributes
+
+
+def extract_attributes_batch(texts):
+    """
+    extract_attributes over a sequence or Series of cleaned texts.
+
+    Each distinct text is parsed once and broadcast back. Returns a
+    DataFrame aligned with `texts` with ATTRIBUTE_COLUMNS: diameter_mm,
+    diameter_dn and length_m (float, NaN when absent) and material (None
+    when absent).
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+    per_text = pd.DataFrame.from_records(
+        [extract_attributes(text) for text in uniques], columns=ATTRIBUTE_COLUMNS
+    )
+    per_text["material"] = per_text["material"].astype(object).where(per_text["material"].notna(), None)
+    return per_text.take(codes).reset_index(drop=True)
+
+
+def attribute_dicts(attributes):
+    """extract_attributes_batch output -> per-row dicts as extract_attributes returns them."""
+    return [
+        {
+            key: value
+            for key, value in zip(ATTRIBUTE_COLUMNS, row)
+            if value is not None and value == value
+        }
+        for row in attributes.itertuples(index=False)
+    ]
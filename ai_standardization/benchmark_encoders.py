@@ -0,0 +1,88 @@
+"""
+Benchmark: encoder backends and embedding storage precision.
+
+Usage:
+    python -m ai_standardization.benchmark_encoders [texts]
+
+Encodes distinct synthetic descriptions (default 5000) with every
+backend in encoder_backends.BACKENDS at ENCODER_BATCH_SIZE and
+ENCODER_THREADS, and reports sentences/second and cosine similarity to
+the fp32 torch reference vectors (mean and worst case). Model-free
+backends (char-ngram) have no cosine column, and the model is only
+loaded for the backends that need it, so the script also runs on hosts
+without torch. Backends whose dependencies are missing are reported and
+skipped. The reference vectors (or, without a model, the char-ngram
+vectors) are then round-tripped through each cache storage dtype.
+"""
+
+import os
+os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
+
+import sys
+import time
+
+import numpy as np
+
+from .benchmark_text_processing import make_descriptions
+from .text_cleaning import clean_texts
+from .embeddings import ENCODER_BATCH_SIZE, ENCODER_THREADS, get_model, model_id
+from .embedding_cache import STORAGE_DTYPES, to_storage, from_storage
+from .encoder_backends import BACKENDS, MODEL_FREE_BACKENDS, create_encoder
+
+
+DEFAULT_TEXTS = 5000
+
+
+def cosine_agreement(reference, vectors):
+    """Row-wise cosine similarity between two embedding matrices."""
+    dot = (reference * vectors).sum(axis=1)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(vectors, axis=1)
+    return dot / np.maximum(norms, 1e-12)
+
+
+def main(n_texts):
+    texts = list(dict.fromkeys(clean_texts(make_descriptions(n_texts * 5))))[:n_texts]
+    print(f"{len(texts):,} distinct texts, batch size {ENCODER_BATCH_SIZE}, threads {ENCODER_THREADS or 'default'}")
+
+    print(f"{'backend':>12} {'sentences/s':>12} {'mean_cos':>9} {'min_cos':>9}")
+    model = None
+    reference = None
+    stored_vectors = None
+    for backend in BACKENDS:
+        try:
+            # Model-free backends must run on hosts without torch
+            if model is None and backend not in MODEL_FREE_BACKENDS:
+                model = get_model()
+            encoder = create_encoder(backend, model, model_id(backend), ENCODER_BATCH_SIZE, ENCODER_THREADS)
+        except Exception as e:
+            print(f"{backend:>12} unavailable: {e}")
+            continue
+
+        encoder.encode(texts[:ENCODER_BATCH_SIZE])  # warm-up
+        start = time.perf_counter()
+        vectors = encoder.encode(texts)
+        seconds = time.perf_counter() - start
+
+        # Model-free vectors live in a different space; only time them
+        if reference is None and backend not in MODEL_FREE_BACKENDS:
+            reference = vectors
+        if reference is None or vectors.shape != reference.shape:
+            print(f"{backend:>12} {len(texts) / seconds:>12,.0f} {'-':>9} {'-':>9}")
+        else:
+            cosine = cosine_agreement(reference, vectors)
+            print(f"{backend:>12} {len(texts) / seconds:>12,.0f} {cosine.mean():>9.5f} {cosine.min():>9.5f}")
+        if stored_vectors is None or vectors is reference:
+            stored_vectors = vectors
+
+    if stored_vectors is None:
+        return
+
+    print(f"\n{'storage':>12} {'bytes/vector':>12} {'mean_cos':>9} {'min_cos':>9}")
+    for dtype in STORAGE_DTYPES:
+        stored = to_storage(stored_vectors, dtype)
+        cosine = cosine_agreement(stored_vectors, from_storage(stored, dtype))
+        print(f"{dtype:>12} {stored.shape[1] * stored.itemsize:>12} {cosine.mean():>9.5f} {cosine.min():>9.5f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TEXTS)
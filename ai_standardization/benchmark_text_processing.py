@@ -0,0 +1,91 @@
+"""
+Benchmark: batched text cleaning / attribute extraction vs the per-row path.
+
+Usage:
+    python -m ai_standardization.benchmark_text_processing [rows ...]
+
+Defaults to 10k and 1M synthetic descriptions (20% distinct). Rows/second are reported
+for the original per-row functions (re-implemented below as they were,
+with a regex compiled per abbreviation per row) and for the batched
+functions; outputs are checked for equality.
+"""
+
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .text_cleaning import ABBREVIATIONS, clean_texts
+from .attribute_extraction import extract_attributes, extract_attributes_batch, attribute_dicts
+
+
+DEFAULT_SIZES = [10_000, 1_000_000]
+DISTINCT_FRACTION = 0.2
+
+ITEMS = ["Pipe", "Valve", "Gate Valve", "Flange", "Elbow", "Hydraulic Oil", "Gasket", "Bolt"]
+MATERIALS = ["CS", "SS", "Carbon Steel", "Stainless-Steel", "GI", "PVC", ""]
+SIZES = ["{} mm", "{}mm", "{} inch", "{}in", "{} DIA", "OD {}", "{} m", "{} ft", "{}"]
+
+
+def clean_text_loop(text):
+    """Original clean_text, kept as reference."""
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9\s\.]", " ", text)
+
+    for abbr, full in ABBREVIATIONS.items():
+        text = re.sub(rf"\b{abbr}\b", full, text)
+
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def make_descriptions(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    n_distinct = max(int(n_rows * DISTINCT_FRACTION), 1)
+    items = rng.choice(ITEMS, n_distinct)
+    materials = rng.choice(MATERIALS, n_distinct)
+    sizes = rng.choice(SIZES, n_distinct)
+    # Mix of integer and one-decimal sizes
+    values = np.where(
+        rng.random(n_distinct) < 0.5,
+        rng.integers(1, 500, n_distinct),
+        np.round(rng.uniform(1, 500, n_distinct), 1),
+    )
+    distinct = [
+        f"{m} {i} {s.format(v)}, Grade-{k}".strip()
+        for i, m, s, v, k in zip(items, materials, sizes, values, rng.integers(0, 50, n_distinct))
+    ]
+    return pd.Series(np.asarray(distinct, dtype=object)[rng.integers(0, n_distinct, n_rows)])
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _rate(n_rows, seconds):
+    return f"{n_rows / seconds:>12,.0f}"
+
+
+def main(sizes):
+    print(f"{'rows':>12} {'step':>10} {'loop_rows/s':>12} {'batch_rows/s':>12} {'speedup':>8}")
+    for n_rows in sizes:
+        texts = make_descriptions(n_rows)
+
+        slow, slow_s = _timed(lambda t: t.apply(clean_text_loop).tolist(), texts)
+        fast, fast_s = _timed(clean_texts, texts)
+        assert fast == slow
+        print(f"{n_rows:>12,} {'clean':>10} {_rate(n_rows, slow_s)} {_rate(n_rows, fast_s)} {slow_s / fast_s:7.1f}x")
+
+        cleaned = pd.Series(fast)
+        slow, slow_s = _timed(lambda t: t.apply(extract_attributes).tolist(), cleaned)
+        fast, fast_s = _timed(extract_attributes_batch, cleaned)
+        assert attribute_dicts(fast) == slow
+        print(f"{n_rows:>12,} {'attributes':>10} {_rate(n_rows, slow_s)} {_rate(n_rows, fast_s)} {slow_s / fast_s:7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or DEFAULT_SIZES)
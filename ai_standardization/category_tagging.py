@@ -1,27 +1,26 @@
+import json
+import os
+from pathlib import Path
+
+from .keyword_matcher import KeywordMatcher
+
+
+# Category -> keywords, in priority order: a description mentioning both
+# "pipe" and "valve" is a Pipe. Edit the JSON to add categories.
+TAXONOMY_PATH = Path(os.environ.get(
+    "STANDARDIZATION_TAXONOMY",
+    Path(__file__).resolve().parent / "category_taxonomy.json"
+))
+
+_taxonomy = json.loads(TAXONOMY_PATH.read_text(encoding="utf-8"))
+DEFAULT_CATEGORY = _taxonomy.get("default", "Other")
+MATCHER = KeywordMatcher(_taxonomy["categories"])
+
+
 def assign_category(text):
-    text = text.lower()
-
-    if "pipe" in text:
-        return "Pipe"
-    if "valve" in text:
-        return "Valve"
-    if "flange" in text:
-        return "Flange"
-    if "gasket" in text:
-        return "Gasket"
-    if "bolt" in text or "nut" in text:
-        return "Fasteners"
-    if "pump" in text:
-        return "Pump"
-    if "bearing" in text:
-        return "Bearing"
-    if "cable" in text or "wire" in text:
-        return "Electrical Cable"
-    if "oil" in text or "lubricant" in text:
-        return "Lubricant"
-    if "helmet" in text or "safety" in text:
-        return "Safety Equipment"
-    if "gauge" in text or "thermocouple" in text or "sensor" in text:
-        return "Instrumentation"
-
-    return "Other"
+    return MATCHER.first(text, DEFAULT_CATEGORY)
+
+
+def assign_categories(texts):
+    """Category per text as a Series; repeated texts are only tagged once."""
+    return MATCHER.first_batch(texts, DEFAULT_CATEGORY)
@@ -0,0 +1,173 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .vector_index import IVFIndex, normalize_rows
+
+
+STATE_DIR = Path(__file__).resolve().parent.parent / "data" / "state" / "standardization"
+
+META_FILE = "meta.json"
+CLUSTERS_FILE = "clusters.csv"
+MEMBERS_FILE = "members.csv"
+CENTROIDS_FILE = "centroid_sums.npy"
+
+CLUSTER_COLUMNS = ["cluster", "canonical_item_name", "item_code", "category", "block_key", "member_count"]
+
+
+def _save_npy(path, array):
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+
+class ClusterState:
+    """
+    Clusters from previous standardization runs.
+
+    `clusters` has one row per cluster id (0..k-1, row position == id),
+    `centroid_sums` holds the sum of unit-normalised member embeddings for
+    each cluster and `members` maps every clean_text already seen to its
+    cluster, so repeated descriptions never need re-encoding. Each
+    cluster belongs to one attribute block (`block_key`, built from
+    `block_columns`); new descriptions only join clusters in their block.
+    """
+
+    def __init__(self, model_id, eps, clusters, centroid_sums, members, block_columns=(), state_dir=STATE_DIR):
+        self.model_id = model_id
+        self.eps = eps
+        self.block_columns = list(block_columns)
+        self.clusters = clusters.reset_index(drop=True)
+        self.centroid_sums = np.asarray(centroid_sums, dtype=np.float32)
+        self.members = members
+        self.dir = Path(state_dir)
+        self._index = None
+
+    @classmethod
+    def from_labels(cls, model_id, eps, texts, embeddings, labels, clusters, block_columns=(), state_dir=STATE_DIR):
+        # DBSCAN noise (-1) is not kept as a cluster
+        labels = np.asarray(labels)
+        valid = labels >= 0
+        clusters = clusters[clusters["cluster"] >= 0].sort_values("cluster").reset_index(drop=True)
+
+        sums = np.zeros((len(clusters), embeddings.shape[1]), dtype=np.float32)
+        np.add.at(sums, labels[valid], normalize_rows(embeddings[valid]))
+
+        clusters["member_count"] = np.bincount(labels[valid], minlength=len(clusters))
+        members = dict(zip(np.asarray(texts, dtype=object)[valid], labels[valid].tolist()))
+        return cls(model_id, eps, clusters[CLUSTER_COLUMNS], sums, members, block_columns, state_dir)
+
+    @classmethod
+    def load(cls, model_id, eps, block_columns=(), state_dir=STATE_DIR):
+        """Returns None when there is no state or it was built differently."""
+        state_dir = Path(state_dir)
+        meta_path = state_dir / META_FILE
+        if not meta_path.exists():
+            return None
+
+        meta = json.loads(meta_path.read_text())
+        if (
+            meta.get("model_id") != model_id
+            or meta.get("eps") != eps
+            or meta.get("block_columns") != list(block_columns)
+        ):
+            return None
+
+        clusters = pd.read_csv(state_dir / CLUSTERS_FILE, dtype={"block_key": str}, keep_default_na=False)
+        members_df = pd.read_csv(state_dir / MEMBERS_FILE, keep_default_na=False)
+        members = dict(zip(members_df["clean_text"], members_df["cluster"].tolist()))
+        centroid_sums = np.load(state_dir / CENTROIDS_FILE)
+        return cls(model_id, eps, clusters, centroid_sums, members, block_columns, state_dir)
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        def replace(name, write):
+            tmp = self.dir / (name + ".tmp")
+            write(tmp)
+            os.replace(tmp, self.dir / name)
+
+        replace(CLUSTERS_FILE, lambda p: self.clusters.to_csv(p, index=False))
+        replace(MEMBERS_FILE, lambda p: pd.DataFrame({
+            "clean_text": list(self.members.keys()),
+            "cluster": list(self.members.values()),
+        }).to_csv(p, index=False))
+        replace(CENTROIDS_FILE, lambda p: _save_npy(p, self.centroid_sums))
+        # Meta goes last so a partially written state is never loaded
+        replace(META_FILE, lambda p: p.write_text(json.dumps({
+            "model_id": self.model_id,
+            "eps": self.eps,
+            "block_columns": self.block_columns,
+            "clusters": len(self.clusters),
+        })))
+
+    # -----------------------------
+    # Assignment
+    # -----------------------------
+    def known_labels(self, texts):
+        return np.array([self.members.get(t, -1) for t in texts], dtype=np.int64)
+
+    def nearest_clusters(self, embeddings, block_keys=None):
+        """
+        Nearest existing cluster per row, or -1 if none is within eps.
+
+        With `block_keys` (one per row), only clusters with the same
+        block_key are candidates.
+        """
+        if len(self.clusters) == 0 or len(embeddings) == 0:
+            return np.full(len(embeddings), -1, dtype=np.int64)
+
+        if block_keys is not None:
+            return self._nearest_in_blocks(embeddings, np.asarray(block_keys, dtype=object))
+
+        if self._index is None:
+            self._index = IVFIndex().fit(self.centroid_sums)
+
+        sims, idx = self._index.search(embeddings, k=1)
+        labels = idx[:, 0]
+        labels[sims[:, 0] < 1.0 - self.eps] = -1
+        return labels
+
+    def _nearest_in_blocks(self, embeddings, block_keys):
+        # Blocks hold few clusters, so compare against their centroids directly
+        labels = np.full(len(embeddings), -1, dtype=np.int64)
+        vectors = normalize_rows(embeddings)
+        candidates = self.clusters.groupby("block_key", sort=False).indices
+
+        for key, rows in pd.Series(np.arange(len(block_keys))).groupby(block_keys, sort=False).indices.items():
+            cluster_ids = candidates.get(key)
+            if cluster_ids is None:
+                continue
+            sims = vectors[rows] @ normalize_rows(self.centroid_sums[cluster_ids]).T
+            best = sims.argmax(axis=1)
+            matched = sims[np.arange(len(rows)), best] >= 1.0 - self.eps
+            labels[rows[matched]] = cluster_ids[best[matched]]
+        return labels
+
+    def add_members(self, texts, embeddings, labels):
+        labels = np.asarray(labels)
+        np.add.at(self.centroid_sums, labels, normalize_rows(embeddings))
+        counts = self.clusters["member_count"].to_numpy().copy()
+        np.add.at(counts, labels, 1)
+        self.clusters["member_count"] = counts
+        self.members.update(zip(texts, labels.tolist()))
+        self._index = None
+
+    def add_clusters(self, new_clusters):
+        """Appends clusters (canonical_item_name, item_code, category, block_key); returns their ids."""
+        start = len(self.clusters)
+        new_clusters = new_clusters.copy()
+        new_clusters["cluster"] = np.arange(start, start + len(new_clusters))
+        new_clusters["member_count"] = 0
+
+        self.clusters = pd.concat(
+            [self.clusters, new_clusters[CLUSTER_COLUMNS]], ignore_index=True
+        )
+        self.centroid_sums = np.vstack([
+            self.centroid_sums,
+            np.zeros((len(new_clusters), self.centroid_sums.shape[1]), dtype=np.float32)
+        ])
+        self._index = None
+        return new_clusters["cluster"].to_numpy()
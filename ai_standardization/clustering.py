@@ -1,24 +1,412 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
 import numpy as np
+from scipy.sparse.csgraph import connected_components
 from sklearn.cluster import DBSCAN
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.metrics import adjusted_rand_score
+from sklearn.metrics.cluster import pair_confusion_matrix
+import pandas as pd
+
+from .vector_index import IVFIndex, DEFAULT_NPROBE
+
+# Cosine distance within which descriptions are the same item. Tuned for
+# MiniLM; compare_vectorizers.py sweeps it for other encoder backends.
+EPS = float(os.environ.get("STANDARDIZATION_EPS", "0.15"))
+MIN_SAMPLES = 1
+CLUSTER_METHODS = ("dbscan", "ann")
+
+# Blocked clustering only uses the process pool when the distance pairs
+# outside the largest block (the work that can overlap it) reach this
+# count, roughly 3 s of DBSCAN; small blocks are packed into tasks of at
+# least TASK_MIN_ROWS rows
+PARALLEL_MIN_PAIRS = 100_000_000
+TASK_MIN_ROWS = 2_000
+
+# Bin edges for the per-cluster histogram of member similarity to centroid
+COHESION_BINS = (0.0, 0.5, 0.7, 0.8, 0.9, 0.95, 1.0)
+
+
+def ann_dbscan(embeddings, eps=EPS, min_samples=MIN_SAMPLES, nprobe=DEFAULT_NPROBE, sample_weight=None):
+    """
+    DBSCAN over an IVF radius graph instead of the full pairwise matrix.
+
+    Core points are those with at least `min_samples` neighbours within
+    `eps` cosine distance (self included, as in sklearn); clusters are the
+    connected components of the core-point graph, border points join the
+    cluster of a neighbouring core point and everything else is noise (-1).
+    With `sample_weight`, a point counts as that many identical points.
+    """
+    n = len(embeddings)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    index = IVFIndex(nprobe=nprobe).fit(embeddings)
+    graph = index.radius_graph(index.vectors, eps)
+
+    if sample_weight is None:
+        core = np.diff(graph.indptr) >= min_samples
+    else:
+        adjacency = graph.copy()
+        adjacency.data[:] = 1.0
+        core = adjacency @ np.asarray(sample_weight, dtype=np.float64) >= min_samples
+    core_ids = np.flatnonzero(core)
+
+    labels = np.full(n, -1, dtype=np.int64)
+    if len(core_ids):
+        core_graph = graph[core_ids][:, core_ids]
+        _, components = connected_components(core_graph, directed=False)
+        labels[core_ids] = components
+
+        border_ids = np.flatnonzero(~core)
+        if len(border_ids):
+            border_graph = graph[border_ids].tocsr()
+            for row, b in enumerate(border_ids):
+                neigh = border_graph.indices[
+                    border_graph.indptr[row]:border_graph.indptr[row + 1]
+                ]
+                neigh = neigh[core[neigh]]
+                if len(neigh):
+                    labels[b] = labels[neigh.min()]
+
+    return _number_by_first_appearance(labels)
+
+
+def _number_by_first_appearance(labels):
+    """Renumbers cluster ids 0..k-1 by first appearance, as sklearn's DBSCAN does."""
+    labels = np.asarray(labels, dtype=np.int64).copy()
+    clustered = labels >= 0
+    _, first, inverse = np.unique(
+        labels[clustered], return_index=True, return_inverse=True
+    )
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    labels[clustered] = rank[inverse]
+    return labels
+
+
+def cluster_labels(embeddings, method="dbscan", eps=EPS, min_samples=MIN_SAMPLES, sample_weight=None):
+    if method == "dbscan":
+        clustering = DBSCAN(eps=eps, min_samples=min_samples, metric="cosine")
+        return clustering.fit_predict(embeddings, sample_weight=sample_weight)
+    if method == "ann":
+        return ann_dbscan(
+            embeddings, eps=eps, min_samples=min_samples, sample_weight=sample_weight
+        )
+    raise ValueError(
+        f"Unknown clustering method {method!r}; expected one of {CLUSTER_METHODS}"
+    )
+
+
+# One pool per process, reused across calls so workers import numpy,
+# sklearn and scipy once; replaced when the worker count changes
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            # spawn: forking a process that may be running threads (the API) is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _cluster_block(embeddings, idxs, weights, method, eps, min_samples):
+    if len(idxs) == 1:
+        # A lone point is its own cluster if it is a core point
+        return np.array([0 if (1.0 if weights is None else weights[0]) >= min_samples else -1])
+    return cluster_labels(
+        embeddings[idxs], method=method, eps=eps, min_samples=min_samples,
+        sample_weight=weights
+    )
+
+
+def _cluster_task(task, shm_name, shape, dtype, method, eps, min_samples):
+    """
+    Runs in a pool worker; `task` is a list of (row ids, weights) per
+    block. The shared embedding matrix is mapped for this task only, so
+    idle workers hold no memory of finished calls.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        embeddings = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        labels = [
+            _cluster_block(embeddings, idxs, weights, method, eps, min_samples)
+            for idxs, weights in task
+        ]
+        del embeddings
+        return labels
+    finally:
+        shm.close()
+
+
+def _pack_tasks(block_ids, sizes):
+    """Groups block positions into tasks of >= TASK_MIN_ROWS rows, largest blocks first."""
+    tasks, current, rows = [], [], 0
+    for block in sorted(block_ids, key=lambda b: -sizes[b]):
+        current.append(block)
+        rows += sizes[block]
+        if rows >= TASK_MIN_ROWS:
+            tasks.append(current)
+            current, rows = [], 0
+    if current:
+        tasks.append(current)
+    return tasks
+
+
+def cluster_blocks(embeddings, blocks, method="dbscan", eps=EPS, min_samples=MIN_SAMPLES, sample_weight=None, workers=1):
+    """
+    Clusters each block (rows sharing a `blocks` id) independently.
 
-def cluster_items_with_diagnostics(embeddings):
-    clustering = DBSCAN(eps=0.15, min_samples=1, metric="cosine")
-    labels = clustering.fit_predict(embeddings)
+    Rows in different blocks never share a cluster. Labels are globally
+    unique and numbered by first appearance; noise stays -1.
 
-    diagnostics = {}
+    With `workers` > 1 (0 = all cores), blocks are clustered in a
+    process pool that is kept for later calls, but only when the pairwise
+    work outside the largest block reaches PARALLEL_MIN_PAIRS (the
+    largest block bounds the parallel run time). The embedding matrix is
+    placed in shared memory once and workers receive only row ids, so the
+    result is identical to the sequential run.
+    """
+    embeddings = np.asarray(embeddings)
+    blocks = np.asarray(blocks)
+    n = len(blocks)
+    weights = None if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    labels = np.full(n, -1, dtype=np.int64)
 
-    for label in set(labels):
-        idxs = [i for i, l in enumerate(labels) if l == label]
-        cluster_vectors = embeddings[idxs]
-        centroid = cluster_vectors.mean(axis=0)
+    order = np.argsort(blocks, kind="stable")
+    starts = np.flatnonzero(np.r_[True, blocks[order][1:] != blocks[order][:-1]])
+    ends = np.r_[starts[1:], n]
+    block_rows = [order[start:end] for start, end in zip(starts, ends)]
+    block_weights = [None if weights is None else weights[idxs] for idxs in block_rows]
 
-        sims = cosine_similarity(cluster_vectors, centroid.reshape(1, -1))
-        avg_similarity = float(sims.mean())
+    workers = workers or os.cpu_count() or 1
+    multi = [b for b, idxs in enumerate(block_rows) if len(idxs) > 1]
+    pairs = np.array([len(block_rows[b]) for b in multi], dtype=np.float64) ** 2
+    if workers > 1 and len(multi) > 1 and pairs.sum() - pairs.max() >= PARALLEL_MIN_PAIRS:
+        block_labels = _cluster_blocks_parallel(
+            embeddings, block_rows, block_weights, multi, method, eps, min_samples, workers
+        )
+    else:
+        block_labels = {}
+    for b, idxs in enumerate(block_rows):
+        if b not in block_labels:
+            block_labels[b] = _cluster_block(
+                embeddings, idxs, block_weights[b], method, eps, min_samples
+            )
 
-        diagnostics[label] = {
-            "cluster_size": len(idxs),
-            "avg_similarity": round(avg_similarity, 3)
+    # Offset each block's labels into one global label space
+    next_label = 0
+    for b, idxs in enumerate(block_rows):
+        block_label = block_labels[b]
+        clustered = block_label >= 0
+        labels[idxs[clustered]] = block_label[clustered] + next_label
+        next_label += int(block_label.max()) + 1 if clustered.any() else 0
+
+    return _number_by_first_appearance(labels)
+
+
+def _cluster_blocks_parallel(embeddings, block_rows, block_weights, multi, method, eps, min_samples, workers):
+    """Clusters blocks `multi` in a process pool; returns {block position: labels}."""
+    embeddings = np.ascontiguousarray(embeddings)
+    shm = shared_memory.SharedMemory(create=True, size=max(embeddings.nbytes, 1))
+    try:
+        np.ndarray(embeddings.shape, dtype=embeddings.dtype, buffer=shm.buf)[:] = embeddings
+
+        tasks = _pack_tasks(multi, {b: len(block_rows[b]) for b in multi})
+        pool = _get_pool(workers)
+        try:
+            futures = [
+                pool.submit(
+                    _cluster_task,
+                    [(block_rows[b], block_weights[b]) for b in task],
+                    shm.name, embeddings.shape, embeddings.dtype.str,
+                    method, eps, min_samples,
+                )
+                for task in tasks
+            ]
+            results = {}
+            for task, future in zip(tasks, futures):
+                results.update(zip(task, future.result()))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); start a fresh pool on the next call
+            _discard_pool(pool)
+            raise
+        return results
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def cluster_items_with_diagnostics(embeddings, method="dbscan", eps=EPS, min_samples=MIN_SAMPLES, sample_weight=None, blocks=None, workers=1):
+    """
+    `sample_weight` lets callers pass one vector per distinct description
+    with its row count; sizes and similarities are then weighted so the
+    result matches clustering every row.
+
+    `blocks` (one id per row, e.g. from category and size attributes)
+    restricts clustering to rows within the same block; blocks are
+    clustered on `workers` processes (see cluster_blocks).
+    """
+    if blocks is None:
+        labels = cluster_labels(
+            embeddings, method=method, eps=eps, min_samples=min_samples,
+            sample_weight=sample_weight
+        )
+    else:
+        labels = cluster_blocks(
+            embeddings, blocks, method=method, eps=eps, min_samples=min_samples,
+            sample_weight=sample_weight, workers=workers
+        )
+    return labels, diagnostics_by_cluster(embeddings, labels, sample_weight)
+
+
+def diagnostics_by_cluster(embeddings, labels, sample_weight=None):
+    """cluster_diagnostics as {cluster id: stats}, as reported by the pipeline."""
+    table, _ = cluster_diagnostics(embeddings, labels, sample_weight)
+    return {
+        row["cluster"]: {
+            "cluster_size": int(row["cluster_size"]),
+            "avg_similarity": round(row["avg_similarity"], 3),
+            "min_similarity": round(row["min_similarity"], 3),
+            "similarity_histogram": row["similarity_histogram"],
         }
+        for row in table.to_dict("records")
+    }
+
+
+def _centroid_geometry(embeddings, labels, weights):
+    """
+    Sorts rows by label once and returns (clusters, inverse, order,
+    starts, sizes, centroids, sims): segment boundaries of the sorted
+    order, weighted size and centroid per label, and each row's cosine
+    similarity to its own centroid.
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    labels = np.asarray(labels)
+
+    clusters, inverse = np.unique(labels, return_inverse=True)
+    if len(clusters) == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return clusters, empty, empty, empty, np.empty(0), np.empty((0, embeddings.shape[-1])), np.empty(0)
+
+    order = np.argsort(inverse, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(inverse[order]) != 0])
+
+    sizes = np.add.reduceat(weights[order], starts)
+    centroids = np.add.reduceat(embeddings[order] * weights[order, None], starts) / sizes[:, None]
+
+    def unit(vectors):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    sims = np.einsum("ij,ij->i", unit(embeddings), unit(centroids)[inverse])
+    return clusters, inverse, order, starts, sizes, centroids, sims
+
+
+def similarity_to_centroid(embeddings, labels, sample_weight=None):
+    """Cosine similarity of each row to the (weighted) centroid of its label."""
+    weights = np.ones(len(labels)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    return _centroid_geometry(embeddings, labels, weights)[-1]
+
+
+def cluster_diagnostics(embeddings, labels, sample_weight=None, bins=COHESION_BINS):
+    """
+    Per-cluster cohesion statistics in one pass over all rows.
+
+    Rows are sorted by label once and every statistic is a segment
+    reduction over that order, so the cost is linear in rows however
+    many clusters there are. Noise (-1) is reported like any label.
+
+    Returns
+    -------
+    table : pd.DataFrame
+        One row per label (ascending): cluster, cluster_size (weighted),
+        avg_similarity (weighted mean cosine similarity to the centroid),
+        min_similarity and similarity_histogram (member counts per `bins`
+        interval, weighted and rounded to integers).
+    centroids : np.ndarray
+        Weighted mean vector per label, in the same order as `table`.
+    """
+    weights = np.ones(len(labels)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    clusters, inverse, order, starts, sizes, centroids, sims = _centroid_geometry(embeddings, labels, weights)
+    if len(clusters) == 0:
+        columns = ["cluster", "cluster_size", "avg_similarity", "min_similarity", "similarity_histogram"]
+        return pd.DataFrame(columns=columns), centroids
+
+    avg = np.add.reduceat((sims * weights)[order], starts) / sizes
+    low = np.minimum.reduceat(sims[order], starts)
+
+    n_bins = len(bins) - 1
+    bin_ids = np.clip(np.digitize(sims, bins[1:-1]), 0, n_bins - 1)
+    histogram = np.bincount(
+        inverse * n_bins + bin_ids, weights=weights, minlength=len(clusters) * n_bins
+    ).reshape(len(clusters), n_bins)
+
+    table = pd.DataFrame({
+        "cluster": clusters,
+        "cluster_size": sizes,
+        "avg_similarity": avg,
+        "min_similarity": low,
+        "similarity_histogram": np.rint(histogram).astype(np.int64).tolist(),
+    })
+    return table, centroids
+
+
+def pair_agreement(reference, labels):
+    """
+    Pair-counting agreement of `labels` with `reference` labels.
+
+    pair_recall is the share of reference same-cluster pairs that
+    `labels` also keep together; pair_precision is the share of `labels`
+    same-cluster pairs the reference agrees with.
+    """
+    (_, fp), (fn, tp) = pair_confusion_matrix(reference, labels)
+    return {
+        "adjusted_rand_index": round(float(adjusted_rand_score(reference, labels)), 4),
+        "pair_recall": round(float(tp / (tp + fn)) if tp + fn else 1.0, 4),
+        "pair_precision": round(float(tp / (tp + fp)) if tp + fp else 1.0, 4),
+    }
+
+
+def clustering_agreement_report(embeddings, sample_size=5000, eps=EPS, min_samples=MIN_SAMPLES, random_state=0):
+    """
+    Compares ANN clustering with exact DBSCAN on a random sample
+    (see `pair_agreement`).
+    """
+    embeddings = np.asarray(embeddings)
+    n = len(embeddings)
+    rng = np.random.default_rng(random_state)
+    if n > sample_size:
+        sample = np.sort(rng.choice(n, size=sample_size, replace=False))
+        embeddings = embeddings[sample]
+
+    exact = cluster_labels(embeddings, "dbscan", eps, min_samples)
+    approx = cluster_labels(embeddings, "ann", eps, min_samples)
 
-    return labels, diagnostics
+    return {
+        "sample_size": len(embeddings),
+        "exact_clusters": int(len(set(exact))),
+        "ann_clusters": int(len(set(approx))),
+        **pair_agreement(exact, approx),
+        "label_agreement": bool(np.array_equal(exact, approx)),
+    }
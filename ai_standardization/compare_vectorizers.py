@@ -0,0 +1,98 @@
+"""
+Compares clusters from the char-ngram vectorizer with the MiniLM model.
+
+Usage:
+    python -m ai_standardization.compare_vectorizers [eps ...]
+
+Runs the standardization clustering path on the raw PO descriptions
+(cleaning, attribute blocks, row-count weights) once with the reference
+"torch" backend at EPS and once with "char-ngram" at each given eps
+(default EPS plus a small sweep). For every run it prints the time spent
+building the encoder and encoding and the cluster count. Each
+char-ngram run also gets pair-counting agreement with the reference
+clusters (adjusted Rand index, pair recall and precision), counted over
+PO rows.
+"""
+
+import os
+os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from .text_cleaning import clean_texts
+from .embeddings import ENCODER_BATCH_SIZE, ENCODER_THREADS, get_model, model_id
+from .encoder_backends import MODEL_FREE_BACKENDS, create_encoder
+from .clustering import cluster_items_with_diagnostics, pair_agreement, EPS
+from .run_standardization import RAW_PATH, CLUSTER_METHOD, add_attribute_columns, block_ids
+
+
+REFERENCE_BACKEND = "torch"
+CANDIDATE_BACKEND = "char-ngram"
+EPS_SWEEP = (0.1, 0.2, 0.25, 0.3)
+
+
+def load_descriptions():
+    df = pd.read_csv(RAW_PATH)
+    unique_df = (
+        pd.Series(clean_texts(df["item_description"]), name="clean_text")
+        .value_counts(sort=False)
+        .rename("row_count")
+        .reset_index()
+    )
+    return add_attribute_columns(unique_df)
+
+
+def encode(backend, texts):
+    """Vectors plus seconds spent building the encoder and encoding."""
+    start = time.perf_counter()
+    model = None if backend in MODEL_FREE_BACKENDS else get_model()
+    encoder = create_encoder(backend, model, model_id(backend), ENCODER_BATCH_SIZE, ENCODER_THREADS)
+    loaded = time.perf_counter()
+    vectors = encoder.encode(texts)
+    return vectors, loaded - start, time.perf_counter() - loaded
+
+
+def row_labels(unique_df, vectors, eps):
+    """Cluster label per PO row, clustering exactly as run_standardization does."""
+    labels, _ = cluster_items_with_diagnostics(
+        vectors, method=CLUSTER_METHOD, eps=eps,
+        sample_weight=unique_df["row_count"].to_numpy(), blocks=block_ids(unique_df)
+    )
+    return np.repeat(labels, unique_df["row_count"].to_numpy())
+
+
+def main(eps_values):
+    unique_df = load_descriptions()
+    texts = unique_df["clean_text"].tolist()
+    print(f"{len(texts):,} distinct descriptions, {unique_df['row_count'].sum():,} PO rows\n")
+
+    # Candidate first, so its timings are not helped by an already imported torch
+    candidate, cand_load, cand_encode = encode(CANDIDATE_BACKEND, texts)
+    reference, ref_load, ref_encode = encode(REFERENCE_BACKEND, texts)
+
+    print(f"{'backend':>12} {'load_s':>8} {'encode_s':>9} {'bytes/vector':>12}")
+    for backend, vectors, load_s, encode_s in (
+        (REFERENCE_BACKEND, reference, ref_load, ref_encode),
+        (CANDIDATE_BACKEND, candidate, cand_load, cand_encode),
+    ):
+        print(f"{backend:>12} {load_s:>8.2f} {encode_s:>9.2f} {vectors.shape[1] * vectors.itemsize:>12}")
+
+    reference_labels = row_labels(unique_df, reference, EPS)
+    print(f"\n{REFERENCE_BACKEND} at eps {EPS}: {len(set(reference_labels))} clusters\n")
+
+    print(f"{'eps':>6} {'clusters':>9} {'ARI':>7} {'pair_recall':>12} {'pair_precision':>15}")
+    for eps in eps_values:
+        labels = row_labels(unique_df, candidate, eps)
+        agreement = pair_agreement(reference_labels, labels)
+        print(
+            f"{eps:>6} {len(set(labels)):>9} {agreement['adjusted_rand_index']:>7} "
+            f"{agreement['pair_recall']:>12} {agreement['pair_precision']:>15}"
+        )
+
+
+if __name__ == "__main__":
+    main([float(e) for e in sys.argv[1:]] or sorted({EPS, *EPS_SWEEP}))
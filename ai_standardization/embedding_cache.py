@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "embeddings"
+MAX_ENTRIES = 2_000_000
+
+META_FILE = "meta.json"
+KEYS_FILE = "keys.npy"
+LAST_USED_FILE = "last_used.npy"
+VECTORS_FILE = "vectors.f32"  # name predates STORAGE_DTYPES; rows are `dtype`
+
+# Cached vector precision. int8 stores round(127 * x), which assumes
+# unit-normalized embeddings (components in [-1, 1]).
+STORAGE_DTYPES = ("float32", "float16", "int8")
+INT8_SCALE = 127.0
+
+
+def text_key(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def to_storage(vectors, dtype):
+    """float32 vectors -> `dtype` storage representation."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == "int8":
+        return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+    return vectors.astype(dtype)
+
+
+def from_storage(stored, dtype):
+    """Storage representation -> float32 vectors."""
+    if dtype == "int8":
+        return stored.astype(np.float32) / INT8_SCALE
+    return stored.astype(np.float32)
+
+
+def _atomic_save_npy(path, array):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding store keyed by a content hash of the cleaned text.
+
+    Vectors live in a raw file of `dtype` rows (see STORAGE_DTYPES) that
+    is memory-mapped on load, so only rows that are actually looked up
+    are paged in; float16 and int8 halve and quarter its size. The whole
+    store is discarded when `model_id` or `dtype` changes, and the least
+    recently used rows are evicted once it grows past `max_entries`.
+    """
+
+    def __init__(self, model_id, cache_dir=CACHE_DIR, max_entries=MAX_ENTRIES, dtype="float32"):
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown storage dtype {dtype!r}; expected one of {STORAGE_DTYPES}")
+        self.model_id = model_id
+        self.dtype = dtype
+        self.dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self._load()
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _reset(self):
+        self.dim = None
+        self.generation = 0
+        self.keys = np.empty(0, dtype="S32")
+        self.last_used = np.empty(0, dtype=np.int64)
+        self.vectors = None
+        self._row = {}
+
+    def _load(self):
+        self._reset()
+        meta_path = self.dir / META_FILE
+        if not meta_path.exists():
+            return
+
+        meta = json.loads(meta_path.read_text())
+        if meta.get("model_id") != self.model_id or meta.get("dtype", "float32") != self.dtype:
+            return
+
+        count = int(meta["count"])
+        self.dim = int(meta["dim"])
+        self.generation = int(meta["generation"])
+        self.keys = np.load(self.dir / KEYS_FILE)[:count]
+        self.last_used = np.load(self.dir / LAST_USED_FILE)[:count]
+        if count:
+            self.vectors = np.memmap(
+                self.dir / VECTORS_FILE, dtype=self.dtype, mode="r",
+                shape=(count, self.dim)
+            )
+        self._row = {k: i for i, k in enumerate(self.keys.tolist())}
+
+    def _write_meta(self):
+        meta = {
+            "model_id": self.model_id,
+            "dtype": self.dtype,
+            "dim": self.dim,
+            "count": len(self.keys),
+            "generation": self.generation,
+        }
+        tmp = self.dir / (META_FILE + ".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, self.dir / META_FILE)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # -----------------------------
+    # Lookup / insert
+    # -----------------------------
+    def get(self, texts):
+        """
+        Returns (vectors, missing) where `vectors` holds cached rows for
+        every text (zeros where missing) and `missing` lists the positions
+        that still need encoding. Returns vectors=None if nothing is cached.
+        """
+        self.generation += 1
+        keys = [text_key(t).encode("ascii") for t in texts]
+        rows = np.array([self._row.get(k, -1) for k in keys], dtype=np.int64)
+        hit = rows >= 0
+        missing = np.flatnonzero(~hit).tolist()
+
+        if self.vectors is None or not hit.any():
+            return None, missing
+
+        self.last_used[rows[hit]] = self.generation
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        out[hit] = from_storage(self.vectors[rows[hit]], self.dtype)
+        return out, missing
+
+    def put(self, texts, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(texts) == 0:
+            self.save()
+            return
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match "
+                f"cache dimension {self.dim}"
+            )
+
+        new_keys = []
+        new_rows = []
+        for i, text in enumerate(texts):
+            key = text_key(text).encode("ascii")
+            if key in self._row:
+                continue
+            self._row[key] = len(self.keys) + len(new_keys)
+            new_keys.append(key)
+            new_rows.append(i)
+
+        self.dir.mkdir(parents=True, exist_ok=True)
+        vectors_path = self.dir / VECTORS_FILE
+        count = len(self.keys)
+
+        # Drop any tail left behind by an interrupted write, then append.
+        with open(vectors_path, "ab") as f:
+            f.truncate(count * (self.dim or 0) * np.dtype(self.dtype).itemsize)
+            f.write(to_storage(vectors[new_rows], self.dtype).tobytes())
+
+        self.keys = np.concatenate([self.keys, np.array(new_keys, dtype="S32")])
+        self.last_used = np.concatenate([
+            self.last_used,
+            np.full(len(new_keys), self.generation, dtype=np.int64)
+        ])
+        self.save()
+
+    def save(self):
+        if self.dim is None:
+            return
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+        if len(self.keys) > self.max_entries:
+            self._evict()
+
+        _atomic_save_npy(self.dir / KEYS_FILE, self.keys)
+        _atomic_save_npy(self.dir / LAST_USED_FILE, self.last_used)
+        self._write_meta()
+
+        self.vectors = None
+        if len(self.keys):
+            self.vectors = np.memmap(
+                self.dir / VECTORS_FILE, dtype=self.dtype, mode="r",
+                shape=(len(self.keys), self.dim)
+            )
+
+    def _evict(self):
+        keep = np.sort(np.argsort(-self.last_used, kind="stable")[:self.max_entries])
+        vectors = np.memmap(
+            self.dir / VECTORS_FILE, dtype=self.dtype, mode="r",
+            shape=(len(self.keys), self.dim)
+        )
+
+        tmp = self.dir / (VECTORS_FILE + ".tmp")
+        with open(tmp, "wb") as f:
+            for start in range(0, len(keep), 65536):
+                f.write(np.ascontiguousarray(vectors[keep[start:start + 65536]]).tobytes())
+        del vectors
+        os.replace(tmp, self.dir / VECTORS_FILE)
+
+        self.keys = self.keys[keep]
+        self.last_used = self.last_used[keep]
+        self._row = {k: i for i, k in enumerate(self.keys.tolist())}
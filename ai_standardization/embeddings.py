@@ -1,6 +1,155 @@
-from sentence_transformers import SentenceTransformer
+import logging
+import os
+import threading
+import time
+from importlib import metadata
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+import numpy as np
 
-def generate_embeddings(text_list):
-    return model.encode(text_list, show_progress_bar=False)
+from .embedding_cache import EmbeddingCache, to_storage, from_storage
+from .encoder_backends import create_encoder, MODEL_FREE_BACKENDS, CHAR_NGRAM_FEATURES, CHAR_NGRAM_RANGE
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Inference backend (see encoder_backends.py), texts per batch, and
+# intra-op threads (0 = library default)
+ENCODER_BACKEND = os.environ.get("ENCODER_BACKEND", "torch")
+ENCODER_BATCH_SIZE = int(os.environ.get("ENCODER_BATCH_SIZE", "64"))
+ENCODER_THREADS = int(os.environ.get("ENCODER_THREADS", "0"))
+
+# Precision of cached vectors: float32, float16 or int8. Embeddings are
+# always returned as float32.
+EMBEDDING_STORAGE_DTYPE = os.environ.get("EMBEDDING_STORAGE_DTYPE", "float32")
+
+
+def _library_version():
+    try:
+        return metadata.version("sentence-transformers")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+# Cached vectors are only valid for the exact model + library + backend
+# that produced them. Read the version from package metadata so this
+# does not import torch.
+def model_id(backend):
+    if backend == "char-ngram":
+        low, high = CHAR_NGRAM_RANGE
+        return f"char-ngram-{low}-{high}@{CHAR_NGRAM_FEATURES}"
+    base = f"{MODEL_NAME}@sentence-transformers-{_library_version()}"
+    return base if backend == "torch" else f"{base}+{backend}"
+
+
+MODEL_ID = model_id(ENCODER_BACKEND)
+
+# Optional warm encoder process (see encoder_worker.py), "host:port";
+# only used together with its authkey
+WORKER_ADDRESS = os.environ.get("ENCODER_WORKER_ADDRESS", "")
+WORKER_AUTHKEY = os.environ.get("ENCODER_WORKER_AUTHKEY", "")
+
+# Seconds spent importing sentence-transformers/torch, loading the model,
+# and encoding, accumulated over the life of the process
+TIMINGS = {"import": 0.0, "model_load": 0.0, "encode": 0.0}
+
+_model = None
+_encoder = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Load the sentence-transformers model on first use."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            start = time.perf_counter()
+            from sentence_transformers import SentenceTransformer
+            loaded = time.perf_counter()
+            _model = SentenceTransformer(MODEL_NAME)
+            TIMINGS["import"] += loaded - start
+            TIMINGS["model_load"] += time.perf_counter() - loaded
+    return _model
+
+
+def get_encoder():
+    """The configured backend around the model, built on first use."""
+    global _encoder
+    model = None if ENCODER_BACKEND in MODEL_FREE_BACKENDS else get_model()
+    with _model_lock:
+        if _encoder is None:
+            start = time.perf_counter()
+            _encoder = create_encoder(ENCODER_BACKEND, model, MODEL_ID, ENCODER_BATCH_SIZE, ENCODER_THREADS)
+            TIMINGS["model_load"] += time.perf_counter() - start
+    return _encoder
+
+
+def _encode_with_worker(text_list):
+    """Encode via the warm worker; None when it is not configured or unusable."""
+    if not WORKER_ADDRESS or not WORKER_AUTHKEY:
+        return None
+
+    from multiprocessing import AuthenticationError
+    from multiprocessing.connection import Client
+
+    host, port = WORKER_ADDRESS.rsplit(":", 1)
+    try:
+        with Client((host, int(port)), authkey=WORKER_AUTHKEY.encode()) as conn:
+            conn.send(("encode", list(text_list)))
+            status, model_id, payload = conn.recv()
+    except (AuthenticationError, OSError, EOFError) as e:
+        logger.warning("Encoder worker unavailable (%s), loading model locally", e)
+        return None
+
+    if status != "ok" or model_id != MODEL_ID:
+        logger.warning(
+            "Encoder worker not usable (%s), loading model locally", payload if status != "ok" else model_id
+        )
+        return None
+    return payload
+
+
+def encode_texts(text_list):
+    start = time.perf_counter()
+    vectors = _encode_with_worker(text_list)
+    if vectors is None:
+        encoder = get_encoder()
+        start = time.perf_counter()  # model load is reported separately
+        vectors = encoder.encode(text_list)
+    TIMINGS["encode"] += time.perf_counter() - start
+    return vectors
+
+
+def timing_report():
+    return " ".join(f"{name} {seconds:.2f}s" for name, seconds in TIMINGS.items())
+
+
+def generate_embeddings(text_list, use_cache=True):
+    if not use_cache or len(text_list) == 0:
+        return encode_texts(text_list)
+
+    # Encode each distinct string once, then broadcast back to rows
+    unique_texts, inverse = np.unique(np.asarray(text_list, dtype=object), return_inverse=True)
+    unique_texts = unique_texts.tolist()
+
+    cache = EmbeddingCache(MODEL_ID, dtype=EMBEDDING_STORAGE_DTYPE)
+    vectors, missing = cache.get(unique_texts)
+
+    if missing:
+        new_texts = [unique_texts[i] for i in missing]
+        new_vectors = np.asarray(encode_texts(new_texts), dtype=np.float32)
+        # Same precision as cache hits, so results do not depend on what was cached
+        new_vectors = from_storage(to_storage(new_vectors, cache.dtype), cache.dtype)
+        if vectors is None:
+            vectors = np.zeros((len(unique_texts), new_vectors.shape[1]), dtype=np.float32)
+        vectors[missing] = new_vectors
+        cache.put(new_texts, new_vectors)
+    else:
+        cache.save()
+
+    logger.info(
+        "Embeddings: unique texts %d cache hits %d encoded %d",
+        len(unique_texts), len(unique_texts) - len(missing), len(missing)
+    )
+
+    return vectors[inverse]
@@ -0,0 +1,202 @@
+"""
+CPU inference backends for the sentence-transformers encoder.
+
+torch       reference fp32 SentenceTransformer.encode
+torch-int8  the same model with its Linear layers dynamically quantized to int8
+onnx        the transformer exported once to ONNX and run with onnxruntime
+onnx-int8   the exported model with weights dynamically quantized to int8
+char-ngram  hashed character n-gram counts; no model, no torch
+
+The model backends return float32 vectors with the model's own pooling
+and normalization, encode in batches of `batch_size` after sorting texts
+by length (so little of each batch is padding), and limit intra-op
+threads to `threads` (0 keeps the library default). The int8 and ONNX
+backends need onnxruntime or a torch build with quantization support;
+they produce slightly different vectors, so the backend is part of the
+embedding cache key.
+
+char-ngram is for hosts that cannot afford torch: it starts in well
+under a second and its vectors only capture spelling, not meaning.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8", "char-ngram")
+# Backends that never load the sentence-transformers model
+MODEL_FREE_BACKENDS = ("char-ngram",)
+
+# Hashed feature count (= vector dimension) and n-gram sizes for char-ngram
+CHAR_NGRAM_FEATURES = 512
+CHAR_NGRAM_RANGE = (2, 4)
+
+ONNX_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "onnx"
+
+
+def length_order(texts):
+    """Positions of `texts` from longest to shortest (stable)."""
+    return np.argsort([-len(text) for text in texts], kind="stable")
+
+
+class TorchEncoder:
+    """SentenceTransformer.encode, optionally with int8 dynamic quantization."""
+
+    def __init__(self, model, batch_size, threads=0, quantize=False):
+        import torch
+
+        if threads:
+            torch.set_num_threads(threads)
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.batch_size = batch_size
+
+    def encode(self, texts):
+        # sentence-transformers already sorts each call by length before batching
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, show_progress_bar=False, convert_to_numpy=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+def export_onnx(model, path):
+    """Exports the model's transformer to `path` (hidden states per token)."""
+    import torch
+
+    class _HiddenStates(torch.nn.Module):
+        def __init__(self, transformer):
+            super().__init__()
+            self.transformer = transformer
+
+        def forward(self, *inputs):
+            return self.transformer(*inputs)[0]
+
+    tokens = model.tokenizer(["carbon steel pipe 100 mm"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in tokens]
+    axes = {0: "batch", 1: "tokens"}
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with torch.no_grad():
+        torch.onnx.export(
+            _HiddenStates(model[0].auto_model.eval()),
+            tuple(tokens[name] for name in input_names),
+            str(tmp),
+            input_names=input_names,
+            output_names=["hidden_states"],
+            dynamic_axes={name: axes for name in input_names + ["hidden_states"]},
+            opset_version=14,
+        )
+    os.replace(tmp, path)
+
+
+def quantize_onnx(source, path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    tmp = path.with_name(path.name + ".tmp")
+    quantize_dynamic(str(source), str(tmp), weight_type=QuantType.QInt8)
+    os.replace(tmp, path)
+
+
+class OnnxEncoder:
+    """
+    The model's transformer in onnxruntime, with mean pooling and
+    normalization done in numpy. The exported graph is cached under
+    ONNX_DIR by model id, so export happens once per model version.
+    """
+
+    def __init__(self, model, model_id, batch_size, threads=0, quantize=False):
+        import onnxruntime as ort
+
+        pooling = model[1]
+        if pooling.get_pooling_mode_str() != "mean":
+            raise ValueError(
+                f"ONNX backend supports mean pooling only, model uses {pooling.get_pooling_mode_str()!r}"
+            )
+        self.normalize = any(type(module).__name__ == "Normalize" for module in model)
+        self.tokenizer = model.tokenizer
+        self.max_length = model.max_seq_length
+        self.batch_size = batch_size
+
+        name = model_id.replace("/", "_").replace("@", "_")
+        path = ONNX_DIR / f"{name}.onnx"
+        if not path.exists():
+            export_onnx(model, path)
+        if quantize:
+            source, path = path, ONNX_DIR / f"{name}.int8.onnx"
+            if not path.exists():
+                quantize_onnx(source, path)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _encode_batch(self, texts):
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        hidden = self.session.run(None, {name: tokens[name].astype(np.int64) for name in self.input_names})[0]
+
+        mask = tokens["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.normalize:
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled
+
+    def encode(self, texts):
+        texts = list(texts)
+        order = length_order(texts)
+        out = None
+        for start in range(0, len(texts), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            vectors = self._encode_batch([texts[i] for i in batch])
+            if out is None:
+                out = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            out[batch] = vectors
+        return out if out is not None else np.empty((0, 0), dtype=np.float32)
+
+
+class CharNgramEncoder:
+    """
+    L2-normalized counts of character 2-4 grams within words, hashed into
+    CHAR_NGRAM_FEATURES dense dimensions. Stateless (no fitted
+    vocabulary or IDF), so vectors never change for a given text and the
+    embedding cache and incremental cluster state stay valid. Cosine
+    distance between spelling variants of one item in the sample data
+    ("100mm dia" / "diameter 100 mm") is 0.05-0.12, inside the default EPS.
+    """
+
+    def __init__(self, batch_size, n_features=CHAR_NGRAM_FEATURES, ngram_range=CHAR_NGRAM_RANGE):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vectorizer = HashingVectorizer(
+            analyzer="char_wb", ngram_range=ngram_range, n_features=n_features,
+            alternate_sign=False, norm="l2"
+        )
+        self.n_features = n_features
+        # Densify in slices so the sparse intermediate stays small
+        self.batch_size = max(batch_size, 4096)
+
+    def encode(self, texts):
+        texts = list(texts)
+        out = np.empty((len(texts), self.n_features), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            out[start:start + len(batch)] = self.vectorizer.transform(batch).toarray()
+        return out
+
+
+def create_encoder(backend, model, model_id, batch_size, threads=0):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown encoder backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "char-ngram":
+        return CharNgramEncoder(batch_size)
+    if backend.startswith("onnx"):
+        return OnnxEncoder(model, model_id, batch_size, threads, quantize=backend.endswith("int8"))
+    return TorchEncoder(model, batch_size, threads, quantize=backend.endswith("int8"))
@@ -0,0 +1,66 @@
+"""
+Long-lived encoder process that keeps the embedding model loaded.
+
+Pipeline runs point ENCODER_WORKER_ADDRESS / ENCODER_WORKER_AUTHKEY at
+it and send only the texts that miss the embedding cache, so repeated
+runs skip the torch import and model load entirely.
+
+Usage:
+    ENCODER_WORKER_AUTHKEY=<secret> python -m ai_standardization.encoder_worker 127.0.0.1:5001
+"""
+
+import os
+os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
+
+import sys
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+import numpy as np
+
+from .embeddings import MODEL_ID, get_encoder, timing_report
+
+
+def serve(address, authkey):
+    # Requests are pickled, so never accept unauthenticated connections
+    if not authkey:
+        raise ValueError("ENCODER_WORKER_AUTHKEY must be set")
+
+    host, port = address.rsplit(":", 1)
+    # Bind before loading the model: early clients queue instead of failing
+    with Listener((host, int(port)), authkey=authkey.encode()) as listener:
+        encoder = get_encoder()
+        print("Encoder worker ready on", address, "-", timing_report(), flush=True)
+
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, OSError, EOFError) as e:
+                # Failed handshake (wrong authkey, client gone); keep serving others
+                print("Rejected connection:", e, flush=True)
+                continue
+
+            with conn:
+                try:
+                    command, texts = conn.recv()
+                    if command != "encode":
+                        conn.send(("error", MODEL_ID, f"unknown command {command!r}"))
+                        continue
+                    start = time.perf_counter()
+                    vectors = np.asarray(encoder.encode(texts), dtype=np.float32)
+                    conn.send(("ok", MODEL_ID, vectors))
+                    print(f"Encoded {len(texts)} texts in {time.perf_counter() - start:.2f}s", flush=True)
+                except (OSError, EOFError) as e:
+                    # Client went away mid-request; nothing to answer
+                    print("Dropped connection:", e, flush=True)
+                except Exception as e:
+                    try:
+                        conn.send(("error", MODEL_ID, str(e)))
+                    except (OSError, EOFError):
+                        pass
+
+
+if __name__ == "__main__":
+    address = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("ENCODER_WORKER_ADDRESS", "127.0.0.1:5001")
+    serve(address, os.environ.get("ENCODER_WORKER_AUTHKEY", ""))
@@ -0,0 +1,32 @@
+import logging
+import os
+os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+from .text_cleaning import clean_texts
+from .embeddings import generate_embeddings
+from .clustering import clustering_agreement_report
+
+
+RAW_PATH = Path(__file__).resolve().parent.parent / "data" / "raw" / "purchase_orders_raw.csv"
+
+
+def main(sample_size=5000):
+    df = pd.read_csv(RAW_PATH)
+    texts = clean_texts(df["item_description"])
+    embeddings = generate_embeddings(texts)
+
+    report = clustering_agreement_report(embeddings, sample_size=sample_size)
+
+    print("ANN vs exact DBSCAN agreement")
+    for key, value in report.items():
+        print(key, value)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -1,6 +1,6 @@
 import hashlib
 
-def generate_item_code(canonical_name):
+def generate_item_code(canonical_name, hash_length=4):
     base = canonical_name.upper().replace(" ", "_")
-    hash_part = hashlib.md5(canonical_name.encode()).hexdigest()[:4]
+    hash_part = hashlib.md5(canonical_name.encode()).hexdigest()[:hash_length]
     return f"{base}_{hash_part}"
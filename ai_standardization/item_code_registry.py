@@ -0,0 +1,156 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .embedding_cache import text_key
+from .item_code_generator import generate_item_code
+
+
+REGISTRY_DIR = Path(__file__).resolve().parent.parent / "data" / "state" / "item_codes"
+
+META_FILE = "meta.json"
+KEYS_FILE = "keys.npy"
+CODE_IDS_FILE = "code_ids.npy"
+CODES_FILE = "codes.json"
+
+# Hash lengths tried, in order, when minting a code that is already taken
+HASH_LENGTHS = (4, 8, 12, 16, 32)
+
+
+def _atomic_save_npy(path, array):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+class ItemCodeRegistry:
+    """
+    Persistent mapping from cleaned descriptions to item codes.
+
+    A cluster's signature is the set of descriptions in it. When a run
+    produces a cluster, it keeps the code already held by most of its
+    PO rows, so codes survive reclustering, canonical name changes and
+    lost incremental state. Only clusters made entirely of unseen
+    descriptions get a new code. Lookups are a dict probe on a content
+    hash of the description, and codes are never handed to two clusters.
+
+    Unlike the cluster state, the registry does not depend on the
+    embedding model or clustering settings, so it is never discarded.
+    """
+
+    def __init__(self, registry_dir=REGISTRY_DIR):
+        self.dir = Path(registry_dir)
+        self._load()
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def _load(self):
+        self.codes = []             # code id -> item code
+        self._code_id = {}          # item code -> code id
+        self._by_key = {}           # description hash -> code id
+
+        if not (self.dir / META_FILE).exists():
+            return
+
+        count = json.loads((self.dir / META_FILE).read_text())["count"]
+        self.codes = json.loads((self.dir / CODES_FILE).read_text())
+        self._code_id = {code: i for i, code in enumerate(self.codes)}
+        keys = np.load(self.dir / KEYS_FILE)[:count]
+        code_ids = np.load(self.dir / CODE_IDS_FILE)[:count]
+        self._by_key = dict(zip(keys.tolist(), code_ids.tolist()))
+
+    def save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        keys = np.array(list(self._by_key.keys()), dtype="S32")
+        code_ids = np.array(list(self._by_key.values()), dtype=np.int64)
+
+        _atomic_save_npy(self.dir / KEYS_FILE, keys)
+        _atomic_save_npy(self.dir / CODE_IDS_FILE, code_ids)
+        tmp = self.dir / (CODES_FILE + ".tmp")
+        tmp.write_text(json.dumps(self.codes))
+        os.replace(tmp, self.dir / CODES_FILE)
+        # Meta goes last so a partially written registry is never loaded
+        tmp = self.dir / (META_FILE + ".tmp")
+        tmp.write_text(json.dumps({"count": len(keys), "codes": len(self.codes)}))
+        os.replace(tmp, self.dir / META_FILE)
+
+    def __len__(self):
+        return len(self._by_key)
+
+    # -----------------------------
+    # Lookup / assignment
+    # -----------------------------
+    def lookup(self, texts):
+        """Registered code per text, None where the text is unseen."""
+        ids = [self._by_key.get(text_key(t).encode("ascii")) for t in texts]
+        return [None if i is None else self.codes[i] for i in ids]
+
+    def register(self, texts, codes):
+        """Points each text at its code (codes may be new or existing)."""
+        for text, code in zip(texts, codes):
+            code_id = self._code_id.get(code)
+            if code_id is None:
+                code_id = self._code_id[code] = len(self.codes)
+                self.codes.append(code)
+            self._by_key[text_key(text).encode("ascii")] = code_id
+
+    def _mint(self, canonical_name, taken):
+        for length in HASH_LENGTHS:
+            code = generate_item_code(canonical_name, hash_length=length)
+            if code not in self._code_id and code not in taken:
+                return code
+        raise ValueError(f"Could not mint a unique item code for {canonical_name!r}")
+
+    def assign(self, labels, texts, weights, canonical_names, reserved=()):
+        """
+        Item code per cluster.
+
+        Parameters
+        ----------
+        labels, texts, weights : sequences
+            Cluster id, cleaned description and PO row count per description.
+        canonical_names : dict
+            Cluster id -> canonical name, used when a new code is minted.
+        reserved : iterable of str
+            Codes held by clusters outside this call (e.g. existing
+            clusters in an incremental run); never reassigned.
+
+        Returns
+        -------
+        dict
+            Cluster id -> item code. Call `register` with the final
+            description -> code mapping afterwards.
+        """
+        known = pd.DataFrame({
+            "cluster": np.asarray(labels),
+            "code": self.lookup(texts),
+            "weight": np.asarray(weights, dtype=np.float64),
+        }).dropna(subset=["code"])
+
+        # Votes per (cluster, existing code); strongest claims are served first
+        votes = (
+            known.groupby(["cluster", "code"], sort=False)["weight"].sum()
+            .reset_index()
+            .sort_values(["weight", "code", "cluster"], ascending=[False, True, True], kind="stable")
+        )
+
+        assigned = {}
+        taken = set(reserved)
+        for cluster, code in zip(votes["cluster"].tolist(), votes["code"].tolist()):
+            # A split cluster's code stays with the part holding most of its rows
+            if cluster in assigned or code in taken:
+                continue
+            assigned[cluster] = code
+            taken.add(code)
+
+        for cluster in sorted(canonical_names):
+            if cluster not in assigned:
+                code = self._mint(canonical_names[cluster], taken)
+                assigned[cluster] = code
+                taken.add(code)
+        return assigned
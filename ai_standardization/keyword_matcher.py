@@ -0,0 +1,113 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def _trie_pattern(node):
+    """Regex for a keyword trie: branches on one character per level."""
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # "" marks the end of a keyword; the rest of the branch is then optional
+    if "" in node:
+        return "(?:" + body + ")?" if len(branches) == 1 else body + "?"
+    return body
+
+
+def _has_crossing_overlap(keywords):
+    """True if a keyword can start inside another and run past its end."""
+    proper_prefixes = {kw[:i] for kw in keywords for i in range(1, len(kw))}
+    return any(kw[i:] in proper_prefixes for kw in keywords for i in range(1, len(kw)))
+
+
+class KeywordMatcher:
+    """
+    Substring keyword matcher compiled once into a single regex.
+
+    `taxonomy` maps each label to its keywords, in priority order.
+    Keywords are folded into a character trie, so one scan over a text
+    finds the longest keyword at each match position and the cost does
+    not grow with the number of keywords. Keywords contained in a match
+    are recovered from a table built at compile time; if one keyword can
+    start inside another and run past its end, the scan uses a lookahead
+    so overlapping matches are not skipped. Matching is case-insensitive
+    and, like the plain `in` checks it replaces, ignores word boundaries.
+    """
+
+    def __init__(self, taxonomy):
+        self.labels = list(taxonomy)
+        self._priority = {label: i for i, label in enumerate(self.labels)}
+
+        owners = {}
+        for label, keywords in taxonomy.items():
+            for keyword in keywords:
+                if not keyword:
+                    continue
+                owners.setdefault(keyword.lower(), []).append(label)
+        if not owners:
+            raise ValueError("Keyword taxonomy has no keywords")
+
+        trie = {}
+        for keyword in owners:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+        body = _trie_pattern(trie)
+        if _has_crossing_overlap(owners):
+            self.pattern = re.compile("(?=(" + body + "))")
+        else:
+            self.pattern = re.compile(body)
+
+        # Matched keyword -> labels of every keyword it contains
+        self._labels_for = {
+            keyword: frozenset(
+                label
+                for inner, inner_labels in owners.items() if inner in keyword
+                for label in inner_labels
+            )
+            for keyword in owners
+        }
+        self._best_for = {
+            keyword: min(self._priority[label] for label in labels)
+            for keyword, labels in self._labels_for.items()
+        }
+
+    @classmethod
+    def from_json(cls, path, section=None):
+        """Loads a label -> keywords mapping (optionally one section of the file)."""
+        config = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(config[section] if section else config)
+
+    def find(self, text):
+        """Labels whose keywords occur in `text`, in taxonomy order."""
+        found = set()
+        for match in self.pattern.findall(text.lower()):
+            found |= self._labels_for[match]
+        return sorted(found, key=self._priority.__getitem__)
+
+    def first(self, text, default=None):
+        """Highest-priority label found in `text`, or `default`."""
+        best = min(map(self._best_for.__getitem__, self.pattern.findall(text.lower())), default=None)
+        return default if best is None else self.labels[best]
+
+    def find_batch(self, texts):
+        """`find` over a sequence; each distinct text is scanned once."""
+        codes, uniques = pd.factorize(pd.Series(texts, dtype=object).fillna(""))
+        results = [self.find(text) for text in uniques]
+        return [results[code] for code in codes]
+
+    def first_batch(self, texts, default=None):
+        """`first` over a sequence, as a Series aligned with `texts`."""
+        series = pd.Series(texts, dtype=object)
+        codes, uniques = pd.factorize(series.fillna(""))
+        labels = np.array(self.labels + [default], dtype=object)
+        best = np.array([
+            min(map(self._best_for.__getitem__, self.pattern.findall(text.lower())), default=-1)
+            for text in uniques
+        ], dtype=np.int64)
+        return pd.Series(labels[best[codes]], index=series.index)
@@ -0,0 +1,171 @@
+"""
+MinHash/LSH grouping of near-identical descriptions.
+
+Descriptions are reduced to token sets ("100mm" and "100 mm" give the
+same tokens, and word order is ignored), and descriptions with the same
+token set and key (e.g. the attribute block) are collapsed into one node
+first. MinHash signatures of the nodes are split into bands; nodes
+sharing a band bucket and the same key and numbers become candidates,
+and candidates whose token-set Jaccard similarity reaches the threshold
+are grouped. Small buckets pair every member; buckets above
+BUCKET_PAIR_LIMIT link each member to the bucket's first node instead,
+so a flood of variants of one item costs linear, not quadratic, work.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix, csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[a-z]+")
+
+NUM_PERM = 64
+BANDS = 16              # 16 bands x 4 rows: pairs at Jaccard 0.8 share a bucket >99.9% of the time
+MERSENNE_PRIME = (1 << 31) - 1
+CHUNK_DOCS = 50_000     # descriptions hashed at a time, bounds the tokens x NUM_PERM array
+BUCKET_PAIR_LIMIT = 8   # larger buckets are linked as a star instead of all pairs
+SEED = 0
+
+
+def token_set(text):
+    return frozenset(TOKEN_PATTERN.findall(text))
+
+
+def _token_matrix(token_sets):
+    """Binary description x token matrix (CSR, one row per token set)."""
+    vocab = {}
+    counts = np.fromiter((len(tokens) for tokens in token_sets), dtype=np.int64, count=len(token_sets))
+    indices = np.fromiter(
+        (vocab.setdefault(token, len(vocab)) for tokens in token_sets for token in tokens),
+        dtype=np.int64, count=int(counts.sum()),
+    )
+    indptr = np.concatenate([[0], np.cumsum(counts)])
+    return csr_matrix((np.ones(len(indices), dtype=np.int32), indices, indptr), shape=(len(token_sets), len(vocab)))
+
+
+def _signatures(tokens):
+    """MinHash signature (NUM_PERM values) per row of a `_token_matrix`."""
+    # Universal hashes (a * x + b) mod p of every vocabulary entry; all
+    # factors are < 2**31, so products fit in int64
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, MERSENNE_PRIME, NUM_PERM, dtype=np.int64)
+    b = rng.integers(0, MERSENNE_PRIME, NUM_PERM, dtype=np.int64)
+    ids = np.arange(tokens.shape[1], dtype=np.int64)[:, None]
+    token_hashes = (ids * a + b) % MERSENNE_PRIME
+
+    n = tokens.shape[0]
+    counts = np.diff(tokens.indptr)
+    signatures = np.full((n, NUM_PERM), MERSENNE_PRIME, dtype=np.int64)
+    for start in range(0, n, CHUNK_DOCS):
+        stop = min(start + CHUNK_DOCS, n)
+        nonempty = start + np.flatnonzero(counts[start:stop])
+        if len(nonempty) == 0:
+            continue
+        flat = tokens.indices[tokens.indptr[start]:tokens.indptr[stop]]
+        offsets = tokens.indptr[nonempty] - tokens.indptr[start]
+        signatures[nonempty] = np.minimum.reduceat(token_hashes[flat], offsets, axis=0)
+    return signatures
+
+
+def _band_buckets(signatures, key_ids):
+    """Bucket id per description for each band, never shared across keys."""
+    rows = NUM_PERM // BANDS
+    weights = np.random.default_rng(SEED + 1).integers(1, 1 << 62, rows + 1, dtype=np.int64).view(np.uint64)
+    for band in range(BANDS):
+        values = signatures[:, band * rows:(band + 1) * rows].view(np.uint64)
+        # Wrapping polynomial hash of the band plus the key; collisions
+        # only add candidates, which are verified below
+        combined = values @ weights[:rows] + key_ids.view(np.uint64) * weights[rows]
+        yield pd.factorize(combined)[0]
+
+
+def _bucket_pairs(buckets, limit=BUCKET_PAIR_LIMIT):
+    """
+    Candidate pairs from one band, encoded as i * n + j with i < j.
+
+    Buckets of up to `limit` members give every pair; larger buckets pair
+    each member with the bucket's lowest index only, so the pair count
+    stays below n * limit / 2.
+    """
+    n = len(buckets)
+    order = np.argsort(buckets, kind="stable")
+    sorted_buckets = buckets[order]
+    starts = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    sizes = np.diff(np.r_[starts, n])
+    first = np.repeat(starts, sizes)
+    small = np.repeat(sizes <= limit, sizes)
+    # Members after each position in its bucket
+    remaining = np.repeat(starts + sizes, sizes) - np.arange(n) - 1
+
+    # Star: every later member of a large bucket with its first member
+    star = np.flatnonzero(~small & (remaining < np.repeat(sizes, sizes) - 1))
+    pairs = [order[first[star]] * n + order[star]]
+
+    # Small buckets: pair each member with the one `offset` places later
+    active = np.flatnonzero(small & (remaining > 0))
+    offset = 1
+    while len(active):
+        left, right = order[active], order[active + offset]
+        pairs.append(np.minimum(left, right) * n + np.maximum(left, right))
+        offset += 1
+        active = active[remaining[active] >= offset]
+    return pairs
+
+
+def near_duplicate_groups(texts, keys=None, threshold=0.8):
+    """
+    Group id per text (numbered by first appearance).
+
+    Texts are grouped when they have the same `keys` value (if given),
+    the same numbers, and token-set Jaccard similarity >= `threshold`
+    to a candidate they share a bucket with. Identical token sets always
+    group. threshold <= 0 disables grouping.
+    """
+    n = len(texts)
+    if threshold <= 0 or n < 2:
+        return np.arange(n, dtype=np.int64)
+
+    # Nodes: distinct (key, token set) pairs, numbered in sorted order so
+    # bucket representatives do not depend on input order
+    token_sets = [token_set(text) for text in texts]
+    content = pd.Series([" ".join(sorted(tokens)) for tokens in token_sets], dtype=object)
+    if keys is not None:
+        content = pd.Series(list(keys), dtype=object).astype(str) + "\x00" + content
+    node_of_text = pd.factorize(content, sort=True)[0]
+    first_text = np.unique(node_of_text, return_index=True)[1]
+    node_sets = [token_sets[i] for i in first_text]
+    m = len(node_sets)
+
+    numbers = [" ".join(sorted(t for t in tokens if t[0].isdigit())) for tokens in node_sets]
+    strict = pd.Series(numbers, dtype=object)
+    if keys is not None:
+        strict = pd.Series(list(keys), dtype=object).astype(str).iloc[first_text].reset_index(drop=True) + "\x00" + strict
+    key_ids = pd.factorize(strict)[0].astype(np.int64)
+
+    tokens = _token_matrix(node_sets)
+    signatures = _signatures(tokens)
+
+    pairs = [pair for buckets in _band_buckets(signatures, key_ids) for pair in _bucket_pairs(buckets)]
+    pairs = np.unique(np.concatenate(pairs)) if pairs else np.empty(0, dtype=np.int64)
+    left, right = pairs // m, pairs % m
+
+    # Bucket hash collisions can pair different keys; only verify same-key
+    # pairs. Intersections are row-wise products of the token matrix
+    sizes = np.diff(tokens.indptr)
+    shared = np.asarray(tokens[left].multiply(tokens[right]).sum(axis=1)).ravel()
+    keep = (key_ids[left] == key_ids[right]) & (shared >= threshold * (sizes[left] + sizes[right] - shared))
+
+    graph = coo_matrix((np.ones(int(keep.sum())), (left[keep], right[keep])), shape=(m, m))
+    _, labels = connected_components(graph, directed=False)
+    return pd.factorize(labels[node_of_text])[0].astype(np.int64)
+
+
+def representatives(groups, weights, texts):
+    """Index of each group's representative: most weight, then first text alphabetically."""
+    texts = np.asarray(texts, dtype=object)
+    order = np.lexsort((texts, -np.asarray(weights), groups))
+    first = np.r_[True, groups[order][1:] != groups[order][:-1]]
+    return order[first]
@@ -1,73 +1,310 @@
+import logging
 import os
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
 
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 
-from text_cleaning import clean_text
-from attribute_extraction import extract_attributes
-from embeddings import generate_embeddings
-from clustering import cluster_items_with_diagnostics
-from item_code_generator import generate_item_code
-from category_tagging import assign_category
+from .text_cleaning import clean_texts
+from .attribute_extraction import extract_attributes_batch
+from .embeddings import generate_embeddings, timing_report, MODEL_ID
+from .clustering import cluster_items_with_diagnostics, diagnostics_by_cluster, similarity_to_centroid, EPS
+from .cluster_state import ClusterState
+from .near_duplicates import near_duplicate_groups, representatives
+from .item_code_registry import ItemCodeRegistry
+from .category_tagging import assign_categories
+# Shared writer for data/processed tables (CSV + typed Parquet)
+from ai_analytics.storage import write_table
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+logger = logging.getLogger(__name__)
+
+
+RAW_PATH = PROJECT_ROOT / "data" / "raw" / "purchase_orders_raw.csv"
+OUT_PATH = PROJECT_ROOT / "data" / "processed" / "standardized_items.csv"
+OUTPUT_COLUMNS = ["po_id", "item_description", "canonical_item_name", "item_code", "category", "confidence_score"]
 
+# "dbscan" (exact, pairwise) or "ann" (IVF radius graph, near-linear)
+CLUSTER_METHOD = os.environ.get("STANDARDIZATION_CLUSTER_METHOD", "dbscan")
 
-RAW_PATH = "data/raw/purchase_orders_raw.csv"
-OUT_PATH = "data/processed/standardized_items.csv"
+# "full" reclusters everything; "incremental" reuses clusters and item
+# codes saved by the previous run and only clusters unseen descriptions
+STANDARDIZATION_MODE = os.environ.get("STANDARDIZATION_MODE", "full")
+
+# Processes for clustering attribute blocks (1 = in-process, 0 = all
+# cores); deployments with many cores opt in. Small inputs are always
+# clustered in-process
+CLUSTER_WORKERS = int(os.environ.get("STANDARDIZATION_CLUSTER_WORKERS", "1"))
+
+# How each cluster's canonical name is chosen among its descriptions:
+# "frequent" (most PO rows, default) or "medoid" (nearest the centroid).
+# Remaining ties go to the other criterion, then alphabetical order, so
+# the choice does not depend on input row order.
+CANONICAL_METHOD = os.environ.get("STANDARDIZATION_CANONICAL", "frequent")
+CANONICAL_METHODS = ("frequent", "medoid")
+
+# Descriptions are only clustered with others that agree on these
+# extracted attributes (missing values compare equal to each other), so
+# a 50mm pipe never merges with a 100mm pipe. Diameters block on their
+# nominal size, so 4 inch and 100 mm agree. Empty disables blocking.
+BLOCK_COLUMNS = [
+    col.strip()
+    for col in os.environ.get(
+        "STANDARDIZATION_BLOCK_COLUMNS", "category,diameter_dn,material"
+    ).split(",")
+    if col.strip()
+]
+
+# Descriptions whose token sets (word order and spacing ignored) reach
+# this Jaccard similarity, with the same numbers and block, are embedded
+# and clustered as one. 0 disables near-duplicate grouping.
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("STANDARDIZATION_NEAR_DUPLICATE_THRESHOLD", "0.8"))
 
 def confidence_from_cluster(size):
-    if size == 1:
-        return 0.75
-    if size <= 3:
-        return 0.85
-    return 0.95
+    size = np.asarray(size)
+    return np.select([size == 1, size <= 3], [0.75, 0.85], 0.95)
 
-def main():
-    df = pd.read_csv(RAW_PATH)
+def add_attribute_columns(unique_df):
+    """Typed attribute columns and the block key used for clustering."""
+    attributes = extract_attributes_batch(unique_df["clean_text"])
+    unique_df["diameter_mm"] = attributes["diameter_mm"].to_numpy()
+    unique_df["diameter_dn"] = attributes["diameter_dn"].to_numpy()
+    unique_df["length_m"] = attributes["length_m"].to_numpy()
+    unique_df["material"] = pd.Categorical(attributes["material"])
+    unique_df["category"] = pd.Categorical(assign_categories(unique_df["clean_text"]))
 
-    df["clean_text"] = df["item_description"].apply(clean_text)
-    df["attributes"] = df["clean_text"].apply(extract_attributes)
+    key = pd.Series("", index=unique_df.index)
+    for i, col in enumerate(BLOCK_COLUMNS):
+        values = unique_df[col].astype(object)
+        key = key + ("|" if i else "") + values.where(values.notna(), "").astype(str)
+    unique_df["block_key"] = key
+    return unique_df
 
-    embeddings = generate_embeddings(df["clean_text"].tolist())
-    labels, diagnostics = cluster_items_with_diagnostics(embeddings)
-    df["cluster"] = labels
+def block_ids(unique_df):
+    return pd.factorize(unique_df["block_key"])[0]
 
+def embed_descriptions(desc_df):
+    """
+    Embedding per description and its near-duplicate group id.
 
-    canonical_map = {}
-    confidence_map = {}
+    Only each group's representative (most PO rows) is encoded; the
+    other members share its vector.
+    """
+    texts = desc_df["clean_text"].tolist()
+    groups = near_duplicate_groups(texts, desc_df["block_key"].tolist(), NEAR_DUPLICATE_THRESHOLD)
+    reps = representatives(groups, desc_df["row_count"].to_numpy(), texts)
+    logger.info("Near-duplicate groups %d of %d descriptions", len(reps), len(texts))
+    return generate_embeddings([texts[i] for i in reps])[groups], groups
 
-    for cluster_id, group in df.groupby("cluster"):
-        canonical_name = group.iloc[0]["clean_text"]
-        item_code = generate_item_code(canonical_name)
-        canonical_map[cluster_id] = (canonical_name, item_code)
-        confidence_map[cluster_id] = confidence_from_cluster(len(group))
+def cluster_descriptions(desc_df, embeddings, groups, cluster_method):
+    """Clusters one vector per near-duplicate group, weighted by the group's PO rows."""
+    groups, _ = pd.factorize(groups)
+    first = np.unique(groups, return_index=True)[1]
+    labels, diagnostics = cluster_items_with_diagnostics(
+        embeddings[first],
+        method=cluster_method,
+        sample_weight=np.bincount(groups, weights=desc_df["row_count"].to_numpy()),
+        blocks=block_ids(desc_df.iloc[first]) if BLOCK_COLUMNS else None,
+        workers=CLUSTER_WORKERS
+    )
+    return labels[groups], diagnostics
 
-    df["canonical_item_name"] = df["cluster"].apply(lambda x: canonical_map[x][0])
-    df["category"] = df["canonical_item_name"].apply(assign_category)
-    df["item_code"] = df["cluster"].apply(lambda x: canonical_map[x][1])
-    df["confidence_score"] = df["cluster"].apply(lambda x: confidence_map[x])
+def build_cluster_table(unique_df, embeddings, registry, reserved_codes=(), method=CANONICAL_METHOD):
+    """
+    One row per cluster: canonical name, item code, category and block key.
 
-    out_df = df[
-        ["po_id", "item_description", "canonical_item_name", "item_code", "category", "confidence_score"]
-    ]
+    The canonical name is the description picked by `method` (see
+    CANONICAL_METHOD); category and block key are the ones already
+    computed for that description. Item codes come from `registry`, so a
+    cluster keeps the code its descriptions had in earlier runs.
+    """
+    if method not in CANONICAL_METHODS:
+        raise ValueError(
+            f"Unknown canonical method {method!r}; expected one of {CANONICAL_METHODS}"
+        )
 
-    out_df.to_csv(OUT_PATH, index=False)
+    labels = unique_df["cluster"].to_numpy()
+    row_count = unique_df["row_count"].to_numpy()
+    similarity = similarity_to_centroid(embeddings, labels, row_count)
+    text = unique_df["clean_text"].to_numpy()
 
-    print("Raw items", len(df))
-    print("Canonical items", df["item_code"].nunique())
-    print("Reduction percent", round(
+    # np.lexsort sorts by the last key first
+    if method == "frequent":
+        order = np.lexsort((text, -similarity, -row_count, labels))
+    else:
+        order = np.lexsort((text, -row_count, -similarity, labels))
+    first = order[np.r_[True, labels[order][1:] != labels[order][:-1]]]
+
+    canonical = unique_df.iloc[first]
+    names = canonical["clean_text"].tolist()
+    codes = registry.assign(
+        labels, text, row_count,
+        dict(zip(canonical["cluster"].tolist(), names)),
+        reserved=reserved_codes
+    )
+    return pd.DataFrame({
+        "cluster": canonical["cluster"].to_numpy(),
+        "canonical_item_name": names,
+        "item_code": canonical["cluster"].map(codes).to_numpy(),
+        "category": canonical["category"].astype(str).to_numpy(),
+        "block_key": canonical["block_key"].to_numpy(),
+    })
+
+def standardize_full(unique_df, cluster_method, registry):
+    embeddings, groups = embed_descriptions(unique_df)
+    labels, diagnostics = cluster_descriptions(unique_df, embeddings, groups, cluster_method)
+    unique_df["cluster"] = labels
+
+    cluster_table = build_cluster_table(unique_df, embeddings, registry)
+    state = ClusterState.from_labels(
+        MODEL_ID, EPS, unique_df["clean_text"].tolist(), embeddings, labels, cluster_table,
+        block_columns=BLOCK_COLUMNS
+    )
+    return cluster_table, diagnostics, state
+
+def standardize_incremental(unique_df, state, cluster_method, registry):
+    labels = state.known_labels(unique_df["clean_text"].tolist())
+    new_ids = np.flatnonzero(labels < 0)
+    diagnostics = {}
+
+    logger.info("Known descriptions %d", len(labels) - len(new_ids))
+    logger.info("New descriptions %d", len(new_ids))
+
+    if len(new_ids):
+        new_df = unique_df.iloc[new_ids].copy()
+        embeddings, groups = embed_descriptions(new_df)
+
+        # Join an existing cluster in the same block when its centroid is within eps
+        nearest = state.nearest_clusters(
+            embeddings, new_df["block_key"].to_numpy() if BLOCK_COLUMNS else None
+        )
+        matched = nearest >= 0
+        state.add_members(
+            new_df["clean_text"][matched].tolist(), embeddings[matched], nearest[matched]
+        )
+        labels[new_ids[matched]] = nearest[matched]
+        logger.info("Assigned to existing clusters %d", int(matched.sum()))
+
+        # Genuinely new items form new clusters among themselves
+        if (~matched).any():
+            rest_df = new_df[~matched].copy()
+            # Group members share a vector and block, so groups are never split by matching
+            rest_labels, _ = cluster_descriptions(
+                rest_df, embeddings[~matched], groups[~matched], cluster_method
+            )
+            noise = rest_labels < 0
+            rest_labels[noise] = rest_labels.max() + 1 + np.arange(noise.sum())
+            rest_df["cluster"] = rest_labels
+
+            new_clusters = build_cluster_table(
+                rest_df, embeddings[~matched], registry,
+                reserved_codes=state.clusters["item_code"].tolist()
+            ).sort_values("cluster")
+            global_ids = state.add_clusters(new_clusters)[rest_labels]
+            state.add_members(
+                rest_df["clean_text"].tolist(), embeddings[~matched], global_ids
+            )
+            labels[new_ids[~matched]] = global_ids
+            # Reported under the cluster ids stored in the state and output
+            diagnostics = diagnostics_by_cluster(
+                embeddings[~matched], global_ids, rest_df["row_count"].to_numpy()
+            )
+            logger.info("New clusters %d", len(new_clusters))
+
+    unique_df["cluster"] = labels
+    return state.clusters.drop(columns="member_count"), diagnostics
+
+def standardize(df, cluster_method=CLUSTER_METHOD, mode=STANDARDIZATION_MODE, write_state=True):
+    """
+    Maps raw PO rows to canonical items.
+
+    Takes the raw purchase order frame and returns one row per PO with
+    OUTPUT_COLUMNS. With `write_state`, the cluster state and item code
+    registry are saved for the next run; the output table is never
+    written.
+    """
+    df = df.copy()
+    df["clean_text"] = clean_texts(df["item_description"])
+
+    # One row per distinct description; clustering is weighted by row count
+    unique_df = (
+        df.groupby("clean_text", sort=False)
+        .size()
+        .rename("row_count")
+        .reset_index()
+    )
+    unique_df = add_attribute_columns(unique_df)
+
+    state = None
+    if mode == "incremental":
+        state = ClusterState.load(MODEL_ID, EPS, BLOCK_COLUMNS)
+        if state is None:
+            logger.info("No reusable cluster state found, running full standardization")
+
+    registry = ItemCodeRegistry()
+    if state is None:
+        cluster_table, diagnostics, state = standardize_full(unique_df, cluster_method, registry)
+    else:
+        cluster_table, diagnostics = standardize_incremental(unique_df, state, cluster_method, registry)
+
+    if write_state:
+        state.save()
+
+    # One table of per-cluster results; confidence depends on PO rows per cluster
+    cluster_rows = unique_df.groupby("cluster")["row_count"].sum()
+    cluster_table = cluster_table.assign(
+        confidence_score=confidence_from_cluster(
+            cluster_table["cluster"].map(cluster_rows).fillna(0).to_numpy()
+        )
+    )
+
+    # Broadcast cluster -> description -> PO rows; output category comes
+    # from the canonical name, not each description
+    description_table = unique_df[["clean_text", "cluster"]].merge(
+        cluster_table, on="cluster", how="left", validate="many_to_one"
+    )
+    registry.register(description_table["clean_text"], description_table["item_code"])
+    if write_state:
+        registry.save()
+
+    df = df.merge(
+        description_table[["clean_text", "canonical_item_name", "item_code", "category", "confidence_score"]],
+        on="clean_text",
+        how="left",
+        validate="many_to_one"
+    )
+
+    out_df = df[OUTPUT_COLUMNS]
+
+    logger.info("Raw items %d", len(df))
+    logger.info("Unique descriptions %d", len(unique_df))
+    logger.info("Dedup ratio %s", round(len(df) / max(len(unique_df), 1), 2))
+    logger.info("Canonical items %d", df["item_code"].nunique())
+    logger.info("Reduction percent %s", round(
         100 * (1 - df["item_code"].nunique() / len(df)), 2
     ))
 
-    print("\nCluster diagnostics")
+    logger.info("Embedding timings: %s", timing_report())
+
+    logger.info("\nCluster diagnostics")
     for cluster_id, stats in diagnostics.items():
-        print(
-            "Cluster",
+        logger.info(
+            "Cluster %s Size %s Avg similarity %s",
             cluster_id,
-            "Size",
             stats["cluster_size"],
-            "Avg similarity",
             stats["avg_similarity"]
         )
 
+    return out_df
+
+def main(cluster_method=CLUSTER_METHOD, mode=STANDARDIZATION_MODE):
+    out_df = standardize(pd.read_csv(RAW_PATH), cluster_method, mode)
+    write_table(out_df, OUT_PATH)
+    return out_df
+
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()
@@ -1,4 +1,8 @@
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
 
 ABBREVIATIONS = {
     "cs": "carbon steel",
@@ -8,12 +12,55 @@ ABBREVIATIONS = {
     "id": "inner diameter"
 }
 
+NON_TEXT_PATTERN = re.compile(r"[^a-z0-9\s\.]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# One pass for all abbreviations. No expansion contains another
+# abbreviation as a whole word, so this matches the per-abbreviation loop.
+ABBREVIATION_PATTERN = re.compile(
+    r"\b(" + "|".join(map(re.escape, ABBREVIATIONS)) + r")\b"
+)
+
+
+def _expand(match):
+    return ABBREVIATIONS[match.group(1)]
+
+
 def clean_text(text):
     text = text.lower()
-    text = re.sub(r"[^a-z0-9\s\.]", " ", text)
+    text = NON_TEXT_PATTERN.sub(" ", text)
+    text = ABBREVIATION_PATTERN.sub(_expand, text)
+    text = WHITESPACE_PATTERN.sub(" ", text).strip()
+    return text
 
-    for abbr, full in ABBREVIATIONS.items():
-        text = re.sub(rf"\b{abbr}\b", full, text)
 
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+# Below this many distinct descriptions a process pool costs more than it saves
+PARALLEL_MIN_TEXTS = 200_000
+
+
+def _clean_chunk(texts):
+    return [clean_text(text) for text in texts]
+
+
+def clean_texts(texts, workers=1):
+    """
+    Batched clean_text over a sequence or Series of descriptions.
+
+    Each distinct description is cleaned once and broadcast back, so
+    repeated descriptions (the common case in PO data) cost one lookup.
+    With `workers` > 1 (0 = all cores) large batches of distinct
+    descriptions are split across a process pool. Returns a list
+    aligned with `texts`.
+    """
+    codes, uniques = pd.factorize(pd.Series(texts, dtype=object), use_na_sentinel=False)
+    uniques = uniques.tolist()
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(uniques) >= PARALLEL_MIN_TEXTS:
+        size = -(-len(uniques) // workers)
+        chunks = [uniques[i:i + size] for i in range(0, len(uniques), size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            cleaned = [text for chunk in pool.map(_clean_chunk, chunks) for text in chunk]
+    else:
+        cleaned = _clean_chunk(uniques)
+
+    return [cleaned[code] for code in codes]
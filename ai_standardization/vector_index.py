@@ -0,0 +1,180 @@
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+
+
+# Below this size a single inverted list (exact search) is cheaper than
+# training the coarse quantizer.
+MIN_ROWS_FOR_IVF = 2048
+DEFAULT_NPROBE = 8
+QUERY_BATCH = 4096
+
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class IVFIndex:
+    """
+    Inverted-file index over L2-normalised vectors.
+
+    Vectors are bucketed by their nearest coarse centroid; queries only
+    scan the `nprobe` closest buckets, so search cost grows roughly with
+    n * nprobe / nlist instead of n. Inner product equals cosine
+    similarity because every stored vector is unit length.
+    """
+
+    def __init__(self, nlist=None, nprobe=DEFAULT_NPROBE, random_state=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.random_state = random_state
+
+        self.vectors = None
+        self.centroids = None
+        self.order = None
+        self.offsets = None
+
+    def __len__(self):
+        return 0 if self.vectors is None else len(self.vectors)
+
+    def fit(self, vectors):
+        vectors = normalize_rows(vectors)
+        n = len(vectors)
+
+        nlist = self.nlist
+        if nlist is None:
+            nlist = 1 if n < MIN_ROWS_FOR_IVF else int(np.sqrt(n))
+        nlist = max(1, min(nlist, n))
+
+        if nlist == 1:
+            centroids = vectors.mean(axis=0, keepdims=True)
+            assignment = np.zeros(n, dtype=np.int64)
+        else:
+            kmeans = MiniBatchKMeans(
+                n_clusters=nlist,
+                random_state=self.random_state,
+                batch_size=min(n, 16 * nlist),
+                n_init=1,
+            )
+            kmeans.fit(vectors)
+            centroids = normalize_rows(kmeans.cluster_centers_)
+            assignment = self._nearest_lists(vectors, centroids, 1)[:, 0]
+
+        self.vectors = vectors
+        self.centroids = normalize_rows(centroids)
+        self.order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=len(centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        return self
+
+    def add(self, vectors):
+        # New vectors go into their nearest existing list; the quantizer
+        # is not retrained.
+        vectors = normalize_rows(vectors)
+        if self.vectors is None:
+            return self.fit(vectors)
+
+        start = len(self.vectors)
+        assignment = self._nearest_lists(vectors, self.centroids, 1)[:, 0]
+        old_assignment = np.repeat(
+            np.arange(len(self.centroids)), np.diff(self.offsets)
+        )
+
+        all_assignment = np.empty(start + len(vectors), dtype=np.int64)
+        all_assignment[self.order] = old_assignment
+        all_assignment[start:] = assignment
+
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.order = np.argsort(all_assignment, kind="stable")
+        counts = np.bincount(all_assignment, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        return self
+
+    @staticmethod
+    def _nearest_lists(queries, centroids, k):
+        sims = queries @ centroids.T
+        k = min(k, centroids.shape[0])
+        if k == centroids.shape[0]:
+            return np.argsort(-sims, axis=1)
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        return top
+
+    def _probe(self, queries):
+        """Yields (query_rows, member_rows, similarities) per inverted list."""
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = self._nearest_lists(queries, self.centroids, nprobe)
+
+        list_ids = probes.ravel()
+        query_ids = np.repeat(np.arange(len(queries)), probes.shape[1])
+        by_list = np.argsort(list_ids, kind="stable")
+        list_ids = list_ids[by_list]
+        query_ids = query_ids[by_list]
+        bounds = np.flatnonzero(np.diff(list_ids)) + 1
+        starts = np.concatenate([[0], bounds])
+        ends = np.concatenate([bounds, [len(list_ids)]])
+
+        for s, e in zip(starts, ends):
+            lst = list_ids[s]
+            members = self.order[self.offsets[lst]:self.offsets[lst + 1]]
+            if len(members) == 0:
+                continue
+            q_rows = query_ids[s:e]
+            sims = queries[q_rows] @ self.vectors[members].T
+            yield q_rows, members, sims
+
+    def radius_graph(self, queries, radius):
+        """
+        Sparse (n_queries, n_index) matrix of cosine similarities for all
+        indexed vectors within cosine distance `radius` of each query.
+        """
+        queries = normalize_rows(queries)
+        min_sim = 1.0 - radius
+        rows, cols, vals = [], [], []
+
+        for b in range(0, len(queries), QUERY_BATCH):
+            batch = queries[b:b + QUERY_BATCH]
+            for q_rows, members, sims in self._probe(batch):
+                r, c = np.nonzero(sims >= min_sim)
+                rows.append(q_rows[r] + b)
+                cols.append(members[c])
+                vals.append(sims[r, c])
+
+        if rows:
+            rows = np.concatenate(rows)
+            cols = np.concatenate(cols)
+            vals = np.concatenate(vals)
+        else:
+            rows = cols = np.empty(0, dtype=np.int64)
+            vals = np.empty(0, dtype=np.float32)
+
+        # Each query visits a list once and each vector sits in one list,
+        # so every (query, vector) pair appears at most once
+        return sparse.csr_matrix(
+            (vals, (rows, cols)), shape=(len(queries), len(self))
+        )
+
+    def search(self, queries, k=1):
+        """Returns (similarities, indices) of the k nearest indexed vectors."""
+        queries = normalize_rows(queries)
+        n = len(queries)
+        best_sims = np.full((n, k), -np.inf, dtype=np.float32)
+        best_idx = np.full((n, k), -1, dtype=np.int64)
+
+        for b in range(0, n, QUERY_BATCH):
+            batch = queries[b:b + QUERY_BATCH]
+            for q_rows, members, sims in self._probe(batch):
+                rows = q_rows + b
+                kk = min(k, sims.shape[1])
+                top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+                top_sims = np.take_along_axis(sims, top, axis=1)
+
+                merged_sims = np.hstack([best_sims[rows], top_sims])
+                merged_idx = np.hstack([best_idx[rows], members[top]])
+                keep = np.argsort(-merged_sims, axis=1)[:, :k]
+                best_sims[rows] = np.take_along_axis(merged_sims, keep, axis=1)
+                best_idx[rows] = np.take_along_axis(merged_idx, keep, axis=1)
+
+        return best_sims, best_idx
@@ -3,18 +3,37 @@ Flask API Backend for Intelligent Cost Database
 Serves data to the React frontend
 """
 
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 from pathlib import Path
-import numpy as np
+import io
+import json
+import logging
 import os
 import sys
-import subprocess
+import threading
+import traceback
+from collections import deque
 from werkzeug.utils import secure_filename
 import shutil
 from datetime import datetime
 
+# api.py runs as a script from backend/; put the project root (pipeline.py
+# and the ai_* packages) on the path. This is the only path bootstrap.
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+from ai_analytics.storage import read_table
+from ai_analytics.cost_cube import CostCube, load_cube
+from ai_free_text.run_free_text_analysis import analyze_free_text_batch, create_pool
+
+from query_store import QueryStore
+from jobs import JobRunner, JobError
+
+# Pipeline progress (INFO) on the console as plain lines
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
@@ -31,169 +50,214 @@ UPLOAD_FOLDER.mkdir(parents=True, exist_ok=True)
 DATA_DIR = Path(__file__).parent.parent / "data" / "processed"
 RAW_DATA_DIR = Path(__file__).parent.parent / "data" / "raw"
 
+# Raw columns merged into standardized items for supplier and price info
+RAW_ITEM_COLUMNS = ['po_id', 'unit_price', 'supplier', 'region', 'quantity', 'unit', 'po_date']
+RAW_CATEGORY_DTYPES = {'supplier': 'category', 'region': 'category', 'unit': 'category'}
+
+
+def prepare_items(standardized, raw_data):
+    """Merge standardized items with raw PO info and rename for the API"""
+    standardized = standardized.merge(
+        raw_data[RAW_ITEM_COLUMNS].astype(RAW_CATEGORY_DTYPES),
+        on='po_id',
+        how='left'
+    )
+    
+    # Rename columns to match API expectations
+    return standardized.rename(columns={
+        'supplier': 'supplier_name',
+        'confidence_score': 'standardization_confidence'
+    })
+
+
 # Load data
 def load_data():
     """Load all processed data files and merge with raw data"""
     try:
-        # Load processed data
-        standardized = pd.read_csv(DATA_DIR / "standardized_items.csv")
-        analytics = pd.read_csv(DATA_DIR / "cost_analytics.csv")
-        anomalies = pd.read_csv(DATA_DIR / "anomalies.csv")
+        # Load processed data (typed Parquet copies when available)
+        standardized = read_table(DATA_DIR / "standardized_items.csv")
+        analytics = read_table(DATA_DIR / "cost_analytics.csv")
+        anomalies = read_table(DATA_DIR / "anomalies.csv")
+        cube = load_cube()
         
-        # Load raw data to get supplier and price info
-        raw_data = pd.read_csv(RAW_DATA_DIR / "purchase_orders_raw.csv")
-        
-        # Merge standardized with raw data to get complete info
-        standardized = standardized.merge(
-            raw_data[['po_id', 'unit_price', 'supplier', 'region', 'quantity', 'unit', 'po_date']],
-            on='po_id',
-            how='left'
+        # Load only the raw columns needed for supplier and price info
+        raw_data = pd.read_csv(
+            RAW_DATA_DIR / "purchase_orders_raw.csv",
+            usecols=RAW_ITEM_COLUMNS,
+            dtype=RAW_CATEGORY_DTYPES
         )
         
-        # Rename columns to match API expectations
-        standardized = standardized.rename(columns={
-            'supplier': 'supplier_name',
-            'confidence_score': 'standardization_confidence'
-        })
+        standardized = prepare_items(standardized, raw_data)
         
         print(f"✅ Loaded {len(standardized)} standardized items")
         print(f"✅ Loaded {len(analytics)} analytics records")
         print(f"✅ Loaded {len(anomalies)} anomalies")
+        print(f"✅ Loaded {len(cube)} cost cube levels")
         
-        return standardized, analytics, anomalies
+        return standardized, analytics, anomalies, cube
     except Exception as e:
         print(f"❌ Error loading data: {e}")
         import traceback
         traceback.print_exc()
-        return None, None, None
-
-standardized_df, analytics_df, anomalies_df = load_data()
+        return None, None, None, None
+
+# Current data snapshot. Handlers read this reference once per request;
+# reloads build a complete new QueryStore and swap it in one assignment.
+snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def publish_snapshot(standardized, analytics, anomalies, cube=None):
+    """Build the next snapshot version from API-ready frames and swap it in"""
+    global snapshot
+    with _snapshot_lock:
+        version = snapshot.version + 1 if snapshot is not None else 1
+        new_snapshot = QueryStore(standardized, analytics, anomalies,
+                                  cube=CostCube(cube or {}), version=version)
+        snapshot = new_snapshot
+    return new_snapshot
+
+
+def load_snapshot():
+    """Load data files and publish them as the next snapshot version"""
+    standardized, analytics, anomalies, cube = load_data()
+    if standardized is None or analytics is None or anomalies is None:
+        return None
+    return publish_snapshot(standardized, analytics, anomalies, cube)
+
+# Spawned worker processes re-import this module as __mp_main__ and
+# have no use for the data
+if __name__ != '__mp_main__':
+    load_snapshot()
+
+# Pipeline runs execute here instead of on request threads
+jobs = JobRunner(max_workers=1)
+PIPELINE_JOB = 'pipeline'
+# Loggers the pipeline stages report progress on; a job's output is what
+# they log on the job's thread
+PIPELINE_LOGGERS = ('pipeline', 'ai_standardization', 'ai_analytics')
+# In-process pipeline, created on the first run and reused so imports,
+# the embedding model and the embedding cache stay warm between runs
+pipeline_runner = None
+
+# Free-text insight workers, started on the first /api/insights request
+# and shared by all requests (0 = all cores)
+INSIGHT_WORKERS = int(os.environ.get('FREE_TEXT_WORKERS', '0')) or os.cpu_count() or 1
+insight_pool = None
+_insight_pool_lock = threading.Lock()
 
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy", "message": "API is running"})
+    snap = snapshot
+    return jsonify({
+        "status": "healthy",
+        "message": "API is running",
+        "data_version": snap.version if snap is not None else None,
+        "data_loaded_at": snap.loaded_at if snap is not None else None
+    })
 
 
 @app.route('/api/dashboard/stats', methods=['GET'])
 def get_dashboard_stats():
     """Get overall dashboard statistics"""
-    if standardized_df is None or analytics_df is None:
+    snap = snapshot
+    if snap is None:
         return jsonify({"error": "Data not loaded"}), 500
     
-    stats = {
-        "total_items": int(len(standardized_df)),
-        "total_suppliers": int(standardized_df['supplier_name'].nunique()),
-        "avg_unit_price": float(standardized_df['unit_price'].mean()),
-        "avg_confidence": float(standardized_df['standardization_confidence'].mean()),
-        "items_with_anomalies": int(len(anomalies_df)) if anomalies_df is not None else 0,
-        "total_categories": int(standardized_df['category'].nunique() if 'category' in standardized_df.columns else 0)
-    }
-    
-    return jsonify(stats)
+    return jsonify(snap.dashboard_stats)
 
 
 @app.route('/api/items', methods=['GET'])
 def get_items():
     """Get all standardized items with pagination"""
-    if standardized_df is None:
+    snap = snapshot
+    if snap is None:
         return jsonify({"error": "Data not loaded"}), 500
     
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
     search = request.args.get('search', '', type=str)
     
-    df = standardized_df.copy()
-    
-    # Search filter
-    if search:
-        df = df[df['canonical_item_name'].str.contains(search, case=False, na=False) |
-                df['supplier_name'].str.contains(search, case=False, na=False)]
-    
-    # Pagination
-    total = len(df)
-    start = (page - 1) * per_page
-    end = start + per_page
-    
-    items = df.iloc[start:end].replace({np.nan: None}).to_dict('records')
-    
-    return jsonify({
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": (total + per_page - 1) // per_page
-    })
+    return jsonify(snap.items_page(page, per_page, search))
 
 
 @app.route('/api/analytics', methods=['GET'])
 def get_analytics():
     """Get cost analytics data"""
-    if analytics_df is None:
+    snap = snapshot
+    if snap is None:
         return jsonify({"error": "Data not loaded"}), 500
     
-    analytics = analytics_df.replace({np.nan: None}).to_dict('records')
-    return jsonify(analytics)
+    return jsonify(snap.analytics_records)
 
 
 @app.route('/api/anomalies', methods=['GET'])
 def get_anomalies():
     """Get price anomalies"""
-    if anomalies_df is None:
+    snap = snapshot
+    if snap is None:
         return jsonify({"error": "Data not loaded"}), 500
     
-    anomalies = anomalies_df.replace({np.nan: None}).to_dict('records')
-    return jsonify(anomalies)
+    return jsonify(snap.anomaly_records)
 
 
 @app.route('/api/price-trends', methods=['GET'])
 def get_price_trends():
     """Get price trend data"""
-    if analytics_df is None:
+    snap = snapshot
+    if snap is None:
         return jsonify({"error": "Data not loaded"}), 500
     
-    # Generate trend data
-    trends = []
-    for _, row in analytics_df.head(10).iterrows():
-        trend_data = {
-            "item_name": row.get('canonical_item_name', 'Unknown'),
-            "trend_direction": row.get('trend_direction', 'stable'),
-            "avg_price": float(row.get('avg_price', 0)),
-            "min_price": float(row.get('min_price', 0)),
-            "max_price": float(row.get('max_price', 0)),
-            "price_variance": float(row.get('price_std', 0))
-        }
-        trends.append(trend_data)
-    
-    return jsonify(trends)
+    return jsonify(snap.price_trends)
 
 
 @app.route('/api/suppliers', methods=['GET'])
 def get_suppliers():
     """Get supplier statistics"""
-    if standardized_df is None:
+    snap = snapshot
+    if snap is None:
         return jsonify({"error": "Data not loaded"}), 500
     
-    supplier_stats = standardized_df.groupby('supplier_name').agg({
-        'unit_price': ['mean', 'min', 'max', 'count'],
-        'standardization_confidence': 'mean'
-    }).reset_index()
-    
-    supplier_stats.columns = ['supplier', 'avg_price', 'min_price', 'max_price', 'item_count', 'avg_confidence']
-    suppliers = supplier_stats.replace({np.nan: None}).head(10).to_dict('records')
-    
-    return jsonify(suppliers)
+    return jsonify(snap.suppliers)
 
 
 @app.route('/api/categories', methods=['GET'])
 def get_categories():
     """Get category distribution"""
-    if standardized_df is None or 'category' not in standardized_df.columns:
+    snap = snapshot
+    if snap is None or snap.categories is None:
         return jsonify({"error": "Data not loaded or categories not available"}), 500
     
-    category_counts = standardized_df['category'].value_counts().to_dict()
-    return jsonify(category_counts)
+    return jsonify(snap.categories)
+
+
+@app.route('/api/cube', methods=['GET'])
+def get_cube_levels():
+    """Get the cost cube rollup levels and their grouping keys"""
+    snap = snapshot
+    if snap is None:
+        return jsonify({"error": "Data not loaded"}), 500
+    
+    return jsonify(snap.cube.levels())
+
+
+@app.route('/api/cube/<level>', methods=['GET'])
+def get_cube_rollup(level):
+    """Get one cost cube rollup, filtered by key query parameters (e.g. ?region=North)"""
+    snap = snapshot
+    if snap is None:
+        return jsonify({"error": "Data not loaded"}), 500
+    
+    try:
+        records = snap.cube_rollup(level, request.args.to_dict())
+    except KeyError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(records)
 
 
 def allowed_file(filename):
@@ -217,6 +281,10 @@ def upload_file():
         if not allowed_file(file.filename):
             return jsonify({"error": "Only CSV files are allowed"}), 400
         
+        # The running pipeline is still reading the current raw file
+        if jobs.active(PIPELINE_JOB) is not None:
+            return jsonify({"error": "Processing in progress, try again when it finishes"}), 409
+        
         # Save uploaded file
         filename = secure_filename(file.filename)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -265,51 +333,157 @@ def upload_file():
 
 @app.route('/api/process', methods=['POST'])
 def process_data():
-    """Run the complete data processing pipeline"""
+    """Start the data processing pipeline as a background job"""
+    # Reuse an in-flight run instead of queueing duplicates
+    job = jobs.active(PIPELINE_JOB) or jobs.submit(PIPELINE_JOB, run_pipeline_job)
+    
+    return jsonify({
+        "message": "Processing started",
+        "job_id": job['job_id'],
+        "status": job['status'],
+        "status_url": f"/api/jobs/{job['job_id']}"
+    }), 202
+
+
+class _JobLog(logging.Handler):
+    """Keeps pipeline log lines emitted on the job's own thread for the job output"""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.thread = threading.get_ident()
+        self.buffer = io.StringIO()
+        self.setFormatter(logging.Formatter('%(message)s'))
+        # Request threads log through the same loggers meanwhile
+        self.addFilter(lambda record: record.thread == self.thread)
+
+    def emit(self, record):
+        self.buffer.write(self.format(record) + '\n')
+
+    def getvalue(self):
+        return self.buffer.getvalue()
+
+
+def run_pipeline_job():
+    """Run the complete pipeline in-process, then swap in the new data snapshot"""
+    global pipeline_runner
+    log = _JobLog()
+    for name in PIPELINE_LOGGERS:
+        logging.getLogger(name).addHandler(log)
     try:
-        project_root = Path(__file__).parent.parent
-        pipeline_script = project_root / "run_pipeline.py"
-        
-        if not pipeline_script.exists():
-            return jsonify({"error": f"Pipeline script not found at {pipeline_script}"}), 500
-        
-        # Run the complete pipeline
-        result = subprocess.run(
-            [sys.executable, str(pipeline_script)],
-            capture_output=True,
-            text=True,
-            cwd=str(project_root),
-            timeout=300,  # 5 minute timeout
-            env={**os.environ, 'PYTHONIOENCODING': 'utf-8', 'TF_CPP_MIN_LOG_LEVEL': '2'}
-        )
-        
-        if result.returncode == 0:
-            # Reload data after processing
-            global standardized_df, analytics_df, anomalies_df
-            standardized_df, analytics_df, anomalies_df = load_data()
-            
-            return jsonify({
-                "message": "Data processed successfully",
-                "output": result.stdout,
-                "standardized_items": len(standardized_df) if standardized_df is not None else 0,
-                "analytics_records": len(analytics_df) if analytics_df is not None else 0,
-                "anomalies_found": len(anomalies_df) if anomalies_df is not None else 0
-            }), 200
+        if pipeline_runner is None:
+            from pipeline import Pipeline
+            # Keep item codes from earlier runs and only cluster new descriptions
+            pipeline_runner = Pipeline(
+                standardization_mode=os.environ.get('STANDARDIZATION_MODE', 'incremental')
+            )
+        result = pipeline_runner.run()
+    except Exception:
+        raise JobError("Processing failed", output=log.getvalue(),
+                       error_details=traceback.format_exc())
+    finally:
+        for name in PIPELINE_LOGGERS:
+            logging.getLogger(name).removeHandler(log)
+    
+    # Readers keep using the old snapshot until this one is complete
+    new_snapshot = publish_snapshot(
+        prepare_items(result.standardized, result.raw),
+        result.cost_analytics,
+        result.anomalies,
+        result.cube
+    )
+    
+    return {
+        "message": "Data processed successfully",
+        "output": log.getvalue(),
+        "data_version": new_snapshot.version,
+        "standardized_items": len(new_snapshot.standardized),
+        "analytics_records": len(new_snapshot.analytics),
+        "anomalies_found": len(new_snapshot.anomalies),
+        "stage_timings": result.timings
+    }
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get status and result of a background job"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List recent background jobs, newest first"""
+    return jsonify(jobs.list())
+
+
+def get_insight_pool():
+    """Shared process pool for free-text insights, created on first use"""
+    global insight_pool
+    with _insight_pool_lock:
+        if insight_pool is None and INSIGHT_WORKERS > 1:
+            insight_pool = create_pool(INSIGHT_WORKERS)
+    return insight_pool
+
+
+def _ndjson_documents(stream):
+    """Parse an NDJSON body line by line; invalid lines become None"""
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def read_documents():
+    """
+    Yield (id, text, error) per document in the request body.
+
+    Accepts a JSON object {"documents": [...]} or, for large batches,
+    an application/x-ndjson body that is read as it streams in. Each
+    document is a string or an object with "text" and an optional "id";
+    ids default to the document's position.
+    """
+    if request.mimetype == 'application/x-ndjson':
+        documents = _ndjson_documents(request.stream)
+    else:
+        documents = request.get_json(silent=True)['documents']
+
+    for index, doc in enumerate(documents):
+        if isinstance(doc, str):
+            yield index, doc, None
+        elif isinstance(doc, dict) and isinstance(doc.get('text'), str):
+            yield doc.get('id', index), doc['text'], None
         else:
-            return jsonify({
-                "error": "Processing failed",
-                "output": result.stdout,
-                "error_details": result.stderr
-            }), 500
-            
-    except subprocess.TimeoutExpired:
-        return jsonify({"error": "Processing timeout (max 5 minutes)"}), 500
-    except Exception as e:
-        import traceback
-        return jsonify({
-            "error": f"Processing failed: {str(e)}", 
-            "traceback": traceback.format_exc()
-        }), 500
+            yield index, '', 'Expected a JSON string or an object with "text"'
+
+
+@app.route('/api/insights', methods=['POST'])
+def free_text_insights():
+    """Stream free-text insights for many documents as NDJSON, one line per document"""
+    if request.mimetype != 'application/x-ndjson':
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict) or not isinstance(payload.get('documents'), list):
+            return jsonify({"error": 'Expected {"documents": [...]} or an NDJSON body'}), 400
+
+    # Ids and errors wait here while their texts are in the worker pool
+    pending = deque()
+
+    def texts():
+        for doc_id, text, error in read_documents():
+            pending.append((doc_id, error))
+            yield text
+
+    def generate():
+        results = analyze_free_text_batch(texts(), workers=INSIGHT_WORKERS, pool=get_insight_pool())
+        for insights in results:
+            doc_id, error = pending.popleft()
+            line = {"id": doc_id, "error": error} if error else {"id": doc_id, "insights": insights}
+            yield json.dumps(line) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 
 @app.route('/api/download-template', methods=['GET'])
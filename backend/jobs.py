@@ -0,0 +1,100 @@
+"""
+Background job runner for long-running API work (pipeline processing).
+
+Jobs run on a small thread pool so request threads return immediately;
+callers poll the job record by id for status and result.
+"""
+
+import threading
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+MAX_JOBS_KEPT = 50
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class JobError(Exception):
+    """Job failure carrying extra fields for the job record"""
+
+    def __init__(self, message, **details):
+        super().__init__(message)
+        self.details = details
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class JobRunner:
+    def __init__(self, max_workers=1):
+        # One worker: pipeline runs write the same files and must not overlap
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs); returns a copy of the new job record"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'kind': kind,
+            'status': QUEUED,
+            'submitted_at': _now(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None,
+        }
+
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > MAX_JOBS_KEPT:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest['status'] in (QUEUED, RUNNING):
+                    break
+                del self._jobs[oldest_id]
+
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return self.get(job_id)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status=RUNNING, started_at=_now())
+        try:
+            result = fn(*args, **kwargs)
+        except JobError as e:
+            self._update(job_id, status=FAILED, finished_at=_now(),
+                         error={'message': str(e), **e.details})
+        except Exception as e:
+            self._update(job_id, status=FAILED, finished_at=_now(),
+                         error={'message': str(e), 'traceback': traceback.format_exc()})
+        else:
+            self._update(job_id, status=SUCCEEDED, finished_at=_now(), result=result)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def active(self, kind):
+        """Most recent queued or running job of this kind, if any"""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job['kind'] == kind and job['status'] in (QUEUED, RUNNING):
+                    return dict(job)
+        return None
+
+    def list(self):
+        with self._lock:
+            return [dict(job) for job in reversed(self._jobs.values())]
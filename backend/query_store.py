@@ -0,0 +1,194 @@
+"""
+Precomputed query layer for the Flask API.
+
+Everything that does not depend on request parameters (dashboard stats,
+supplier and category aggregates, analytics/anomaly records) is computed
+once when data is loaded. Item search goes through an inverted token
+index, and pagination slices positions instead of copying the frame.
+Cost cube rollups are read from value indexes built with the snapshot.
+"""
+
+import re
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+SEARCH_COLUMNS = ['canonical_item_name', 'supplier_name']
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+# Indexed tokens are also keyed by every substring up to this length
+GRAM_LENGTH = 3
+
+
+def _records(df):
+    """DataFrame -> JSON-ready list of dicts (NaN -> None)"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+class SearchIndex:
+    """
+    Inverted index from lowercase tokens to rows.
+
+    Postings are kept per distinct column value (item names and suppliers
+    repeat heavily). Query tokens find the indexed tokens containing them
+    through a gram -> token index (short tokens are a gram themselves,
+    longer ones are checked against their rarest gram's tokens), so a
+    lookup touches the matching postings, never the whole vocabulary or
+    every row. Results are exact case-insensitive substring matches, in
+    original row order.
+    """
+
+    def __init__(self, df, columns=SEARCH_COLUMNS):
+        self.n_rows = len(df)
+        self.values = []          # distinct lowercase values
+        self.value_rows = []      # row positions per value
+        self.token_values = defaultdict(set)
+
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col].astype('string').str.lower())
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+
+            for i, value in enumerate(uniques):
+                value_id = len(self.values)
+                self.values.append(value)
+                self.value_rows.append(order[bounds[i]:bounds[i + 1]])
+                for token in TOKEN_PATTERN.findall(value):
+                    self.token_values[token].add(value_id)
+
+        self.gram_tokens = defaultdict(set)
+        for token in self.token_values:
+            for n in range(1, GRAM_LENGTH + 1):
+                for i in range(len(token) - n + 1):
+                    self.gram_tokens[token[i:i + n]].add(token)
+
+    def _containing(self, token):
+        """Indexed tokens that contain `token`."""
+        if len(token) <= GRAM_LENGTH:
+            return self.gram_tokens.get(token, ())
+        grams = {token[i:i + GRAM_LENGTH] for i in range(len(token) - GRAM_LENGTH + 1)}
+        rarest = min((self.gram_tokens.get(gram, ()) for gram in grams), key=len)
+        return [indexed for indexed in rarest if token in indexed]
+
+    def search(self, query):
+        """Row positions whose indexed columns contain `query`."""
+        query = query.lower()
+        tokens = TOKEN_PATTERN.findall(query)
+
+        if tokens:
+            # A query token can sit inside a longer indexed token ("pip" in "pipe")
+            candidates = None
+            for token in tokens:
+                ids = set()
+                for indexed in self._containing(token):
+                    ids |= self.token_values[indexed]
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    return np.empty(0, dtype=np.int64)
+        else:
+            candidates = range(len(self.values))
+
+        matches = [
+            self.value_rows[v] for v in candidates if query in self.values[v]
+        ]
+        if not matches:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(matches))
+
+
+class QueryStore:
+    """
+    Immutable snapshot of one loaded dataset with precomputed responses.
+
+    Nothing mutates a store after construction; reloading builds a new
+    store and swaps the reference, so a request that grabbed a store
+    keeps a consistent view for its whole lifetime.
+    """
+
+    def __init__(self, standardized, analytics, anomalies, cube=None, version=0):
+        self.version = version
+        self.loaded_at = datetime.now().isoformat(timespec='seconds')
+        self.standardized = standardized.reset_index(drop=True)
+        self.analytics = analytics
+        self.anomalies = anomalies
+        # cost_cube.CostCube (indexed rollup levels), may have no levels
+        self.cube = cube
+
+        self.search_index = SearchIndex(self.standardized)
+        self.dashboard_stats = self._dashboard_stats()
+        self.suppliers = self._suppliers()
+        self.categories = self._categories()
+        self.analytics_records = _records(analytics)
+        self.anomaly_records = _records(anomalies)
+        self.price_trends = self._price_trends()
+
+    def _dashboard_stats(self):
+        df = self.standardized
+        return {
+            "total_items": int(len(df)),
+            "total_suppliers": int(df['supplier_name'].nunique()),
+            "avg_unit_price": float(df['unit_price'].mean()),
+            "avg_confidence": float(df['standardization_confidence'].mean()),
+            "items_with_anomalies": int(len(self.anomalies)) if self.anomalies is not None else 0,
+            "total_categories": int(df['category'].nunique() if 'category' in df.columns else 0)
+        }
+
+    def _suppliers(self):
+        supplier_stats = self.standardized.groupby('supplier_name', observed=True).agg({
+            'unit_price': ['mean', 'min', 'max', 'count'],
+            'standardization_confidence': 'mean'
+        }).reset_index()
+
+        supplier_stats.columns = ['supplier', 'avg_price', 'min_price', 'max_price', 'item_count', 'avg_confidence']
+        return _records(supplier_stats.head(10))
+
+    def _categories(self):
+        if 'category' not in self.standardized.columns:
+            return None
+        category_counts = self.standardized['category'].value_counts()
+        # Categorical columns also report categories with no rows
+        return category_counts[category_counts > 0].to_dict()
+
+    def _price_trends(self):
+        trends = []
+        for _, row in self.analytics.head(10).iterrows():
+            trends.append({
+                "item_name": row.get('canonical_item_name', 'Unknown'),
+                "trend_direction": row.get('trend_direction', 'stable'),
+                "avg_price": float(row.get('avg_price', 0)),
+                "min_price": float(row.get('min_price', 0)),
+                "max_price": float(row.get('max_price', 0)),
+                "price_variance": float(row.get('price_std', 0)),
+                "price_slope": float(row.get('price_slope', 0)),
+                "price_volatility": float(row.get('price_volatility', 0))
+            })
+        return trends
+
+    def cube_rollup(self, level, filters):
+        """Records of one cost cube level matching the key filters"""
+        return _records(self.cube.fetch(level, **filters))
+
+    def items_page(self, page, per_page, search=''):
+        """One page of items; cost depends on page size, not dataset size"""
+        start = max(page - 1, 0) * per_page
+        end = start + per_page
+
+        if search:
+            positions = self.search_index.search(search)
+            total = len(positions)
+            page_df = self.standardized.take(positions[start:end])
+        else:
+            total = len(self.standardized)
+            page_df = self.standardized.iloc[start:end]
+
+        return {
+            "items": _records(page_df),
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "pages": (total + per_page - 1) // per_page
+        }
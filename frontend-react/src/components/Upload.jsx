@@ -93,8 +93,18 @@ const Upload = () => {
     setError(null)
 
     try {
+      // Processing runs as a background job; poll until it finishes
       const response = await axios.post('/api/process')
-      setProcessResult(response.data)
+      let job = response.data
+      while (job.status !== 'succeeded' && job.status !== 'failed') {
+        await new Promise((resolve) => setTimeout(resolve, 2000))
+        job = (await axios.get(`/api/jobs/${response.data.job_id}`)).data
+      }
+      if (job.status === 'failed') {
+        setError(job.error?.message || 'Processing failed')
+      } else {
+        setProcessResult(job.result)
+      }
     } catch (err) {
       setError(err.response?.data?.error || 'Processing failed')
     } finally {
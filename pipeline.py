@@ -0,0 +1,144 @@
+"""
+Importable data processing pipeline.
+
+`Pipeline` runs item standardization, cost aggregation, trend labelling,
+the cost cube rollups and anomaly detection in the calling process and
+hands DataFrames from one stage to the next in memory. The API keeps one
+instance alive, so pandas/sklearn imports, the embedding model and the
+embedding cache stay warm between runs; `run_pipeline.py` is a thin
+command-line wrapper. Progress goes to the "pipeline",
+"ai_standardization" and "ai_analytics" loggers at INFO level.
+
+    from pipeline import Pipeline
+    result = Pipeline().run()
+    result.cost_analytics.head()
+"""
+
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+import pandas as pd
+
+from ai_standardization.run_standardization import (
+    standardize, CLUSTER_METHOD, STANDARDIZATION_MODE, OUT_PATH as STANDARDIZED_PATH,
+)
+from ai_analytics.load_data import load_raw_pos
+from ai_analytics.price_cleaning import clean_and_merge
+from ai_analytics.aggregation import aggregate_costs, OUTPUT_PATH as COST_ANALYTICS_PATH
+from ai_analytics.trend_analysis import add_trend_labels
+from ai_analytics.cost_cube import build_cube, partial_cube, save_cube
+from ai_analytics.anomaly_detection import detect_anomalies, DEFAULT_DETECTORS, OUTPUT_PATH as ANOMALIES_PATH
+from ai_analytics.storage import write_table
+
+logger = logging.getLogger(__name__)
+
+
+STAGES = ("standardization", "aggregation", "trends", "cube", "anomalies")
+
+OUTPUT_PATHS = {
+    "standardized": STANDARDIZED_PATH,
+    "cost_analytics": COST_ANALYTICS_PATH,
+    "anomalies": ANOMALIES_PATH,
+}
+
+
+@dataclass
+class PipelineResult:
+    raw: pd.DataFrame
+    standardized: pd.DataFrame
+    clean: pd.DataFrame
+    cost_analytics: pd.DataFrame
+    anomalies: pd.DataFrame
+    timings: dict = field(default_factory=dict)
+    cube: dict = field(default_factory=dict)
+
+
+class Pipeline:
+    """
+    Standardization -> aggregation -> trends -> cube -> anomalies.
+
+    Each stage is a method taking and returning DataFrames, so callers
+    can also run a single stage on their own data. `run` chains them and,
+    with `write_outputs`, saves the three data/processed tables and the
+    cost cube levels at the end for the dashboard and later runs. Without
+    it nothing is written, including the cluster state and item code
+    registry, so a dry run does not change later incremental runs.
+    """
+
+    def __init__(
+        self,
+        cluster_method=CLUSTER_METHOD,
+        standardization_mode=STANDARDIZATION_MODE,
+        anomaly_detectors=DEFAULT_DETECTORS,
+        write_outputs=True,
+    ):
+        self.cluster_method = cluster_method
+        self.standardization_mode = standardization_mode
+        self.anomaly_detectors = tuple(anomaly_detectors)
+        self.write_outputs = write_outputs
+
+    # -----------------------------
+    # Stages
+    # -----------------------------
+    def standardization(self, raw_df: pd.DataFrame) -> pd.DataFrame:
+        return standardize(
+            raw_df, self.cluster_method, self.standardization_mode, write_state=self.write_outputs
+        )
+
+    def aggregation(self, raw_df: pd.DataFrame, standardized_df: pd.DataFrame):
+        """Returns (clean PO rows, cost aggregates)."""
+        clean_df = clean_and_merge(raw_df, standardized_df)
+        if clean_df.empty:
+            raise RuntimeError("Cleaned dataframe is empty. Check input data.")
+        return clean_df, aggregate_costs(clean_df, write=False)
+
+    def trends(self, cost_df: pd.DataFrame, clean_df: pd.DataFrame) -> pd.DataFrame:
+        return add_trend_labels(cost_df, clean_df)
+
+    def cube(self, clean_df: pd.DataFrame) -> dict:
+        """Returns {level: rollup table} (see cost_cube.CUBE_LEVELS)."""
+        return build_cube(partial_cube(clean_df))
+
+    def anomalies(self, clean_df: pd.DataFrame) -> pd.DataFrame:
+        return detect_anomalies(clean_df, detectors=self.anomaly_detectors, write=False)
+
+    # -----------------------------
+    # Full run
+    # -----------------------------
+    def run(self, raw_df: pd.DataFrame = None) -> PipelineResult:
+        """
+        Runs all stages on `raw_df` (default: data/raw/purchase_orders_raw.csv).
+        """
+        timings = {}
+
+        def timed(name, fn, *args):
+            start = time.perf_counter()
+            logger.info("\n[%d/%d] %s", len(timings) + 1, len(STAGES), name)
+            out = fn(*args)
+            timings[name] = round(time.perf_counter() - start, 3)
+            return out
+
+        if raw_df is None:
+            raw_df = load_raw_pos()
+
+        standardized = timed("standardization", self.standardization, raw_df)
+        clean_df, cost_df = timed("aggregation", self.aggregation, raw_df, standardized)
+        cost_df = timed("trends", self.trends, cost_df, clean_df)
+        cube = timed("cube", self.cube, clean_df)
+        anomalies = timed("anomalies", self.anomalies, clean_df)
+
+        result = PipelineResult(raw_df, standardized, clean_df, cost_df, anomalies, timings, cube)
+        if self.write_outputs:
+            self.save(result)
+
+        logger.info("\nStage timings (s): %s", timings)
+        return result
+
+    def save(self, result: PipelineResult) -> None:
+        for name, path in OUTPUT_PATHS.items():
+            write_table(getattr(result, name), path)
+        save_cube(result.cube)
@@ -6,56 +6,45 @@ Runs the complete data processing pipeline:
 3. Anomaly Detection
 
 This script should be run whenever new purchase order data is added.
+The stages live in pipeline.py and can also be run in-process:
+
+    from pipeline import Pipeline
+    Pipeline().run()
 """
 
-import os
+import logging
 import sys
-from pathlib import Path
-
-# Suppress TensorFlow warnings
-os.environ["TF_CPP_MIN_LOG_LEVEL"] = "2"
-
-print("=" * 70)
-print("HPCL INTELLIGENT COST DATABASE - DATA PROCESSING PIPELINE")
-print("=" * 70)
-
-# Step 1: Item Standardization
-print("\n[STEP 1/3] Running Item Standardization...")
-print("-" * 70)
-try:
-    # Change to project root
-    project_root = Path(__file__).parent
-    os.chdir(project_root)
-    
-    # Import and run standardization
-    sys.path.insert(0, str(project_root / "ai_standardization"))
-    from ai_standardization.run_standardization import main as run_standardization
-    run_standardization()
-except Exception as e:
-    print(f"Error in standardization: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
-
-# Step 2: Cost Analytics
-print("\n[STEP 2/3] Running Cost Analytics Generation...")
-print("-" * 70)
-try:
-    sys.path.insert(0, str(project_root / "ai_analytics"))
-    from ai_analytics.run_analytics import main as run_analytics_full
-    run_analytics_full()
-except Exception as e:
-    print(f"Error in analytics: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
-
-print("\n" + "=" * 70)
-print("PIPELINE COMPLETED SUCCESSFULLY!")
-print("=" * 70)
-print("\nGenerated files:")
-print("  ✓ data/processed/standardized_items.csv")
-print("  ✓ data/processed/cost_analytics.csv")
-print("  ✓ data/processed/anomalies.csv")
-print("\nData is now ready for the dashboard!")
-print("=" * 70)
+
+from pipeline import Pipeline
+
+
+def main():
+    # Stage progress from the pipeline modules, as plain lines
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    print("=" * 70)
+    print("HPCL INTELLIGENT COST DATABASE - DATA PROCESSING PIPELINE")
+    print("=" * 70)
+
+    try:
+        Pipeline().run()
+    except Exception as e:
+        print(f"Error in pipeline: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    print("\n" + "=" * 70)
+    print("PIPELINE COMPLETED SUCCESSFULLY!")
+    print("=" * 70)
+    print("\nGenerated files:")
+    print("  ✓ data/processed/standardized_items.csv")
+    print("  ✓ data/processed/cost_analytics.csv")
+    print("  ✓ data/processed/anomalies.csv")
+    print("\nData is now ready for the dashboard!")
+    print("=" * 70)
+
+
+# Guarded: spawned clustering workers re-import the main module
+if __name__ == "__main__":
+    main()
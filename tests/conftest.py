@@ -0,0 +1,33 @@
+import functools
+
+import pytest
+
+from ai_standardization import run_standardization
+from ai_standardization.cluster_state import ClusterState
+from ai_standardization.encoder_backends import CharNgramEncoder
+from ai_standardization.item_code_registry import ItemCodeRegistry
+
+
+@pytest.fixture
+def standardization_env(tmp_path, monkeypatch):
+    """
+    run_standardization with char-ngram vectors (no model) and its
+    cluster state and item code registry under tmp_path.
+    """
+    state_dir, registry_dir = tmp_path / "standardization", tmp_path / "item_codes"
+
+    class TmpClusterState(ClusterState):
+        @classmethod
+        def from_labels(cls, *args, **kwargs):
+            return super().from_labels(*args, state_dir=state_dir, **kwargs)
+
+        @classmethod
+        def load(cls, *args, **kwargs):
+            return super().load(*args, state_dir=state_dir, **kwargs)
+
+    encoder = CharNgramEncoder(batch_size=64)
+    monkeypatch.setattr(run_standardization, "ClusterState", TmpClusterState)
+    monkeypatch.setattr(run_standardization, "ItemCodeRegistry", functools.partial(ItemCodeRegistry, registry_dir))
+    monkeypatch.setattr(run_standardization, "generate_embeddings", lambda texts, use_cache=True: encoder.encode(texts))
+    return state_dir, registry_dir
+
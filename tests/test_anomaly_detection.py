@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_analytics.anomaly_detection import (
+    ABSOLUTE_THRESHOLD_RATIO,
+    DETECTORS,
+    MAD_SCALE,
+    MAD_THRESHOLD,
+    STD_MULTIPLIER,
+    detect_anomalies,
+)
+
+
+def reference_anomalies(df):
+    """The original per-row loop detect_anomalies replaced."""
+    records = []
+    for item_code, group in df.groupby("item_code"):
+        median_price = group["unit_price"].median()
+        std_price = group["unit_price"].std()
+        for _, row in group.iterrows():
+            deviation = abs(row["unit_price"] - median_price)
+            if std_price and not pd.isna(std_price) and std_price > 0:
+                threshold = STD_MULTIPLIER * std_price
+                reason = f"Deviation exceeds {STD_MULTIPLIER}× standard deviation"
+            else:
+                threshold = ABSOLUTE_THRESHOLD_RATIO * median_price
+                reason = f"Deviation exceeds {int(ABSOLUTE_THRESHOLD_RATIO*100)}% of median price"
+            if deviation > threshold:
+                records.append({
+                    "po_id": row["po_id"],
+                    "item_code": item_code,
+                    "unit_price": row["unit_price"],
+                    "expected_price": median_price,
+                    "anomaly_flag": True,
+                    "anomaly_reason": reason,
+                })
+    return pd.DataFrame(records)
+
+
+def purchase_orders(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    items = rng.integers(0, 60, n)
+    price = 100 + 10 * items + rng.normal(0, 5, n)
+    spikes = rng.random(n) < 0.02
+    price[spikes] *= rng.choice([0.3, 3.0], spikes.sum())
+    df = pd.DataFrame({
+        "po_id": [f"PO{i:05d}" for i in range(n)],
+        "item_code": [f"ITEM_{i:02d}" for i in items],
+        "unit_price": price.round(2),
+    })
+    # Constant prices have no variance and use the 20% rule; a single PO
+    # has no std at all; rows without an item are skipped
+    df.loc[df["item_code"] == "ITEM_00", "unit_price"] = 250.0
+    df.loc[len(df)] = ["PO_SINGLE", "ITEM_SINGLE", 999.0]
+    df.loc[len(df)] = ["PO_NO_ITEM", None, 5.0]
+    return df
+
+
+def test_std_detector_matches_reference_loop():
+    df = purchase_orders()
+    expected = reference_anomalies(df).reset_index(drop=True)
+    result = detect_anomalies(df, write=False)
+
+    assert len(expected) > 10
+    pd.testing.assert_frame_equal(
+        result[expected.columns].astype(expected.dtypes.to_dict()), expected, check_exact=False
+    )
+
+
+def test_strongest_flagging_detector_is_reported():
+    df = purchase_orders()
+    detectors = ("std", "mad", "iqr")
+    result = detect_anomalies(df, detectors=detectors, write=False).set_index("po_id")
+
+    scores = {name: DETECTORS[name](df[df["item_code"].notna()]) for name in detectors}
+    clean = df[df["item_code"].notna()]
+    flagged = pd.concat({name: s["flag"] for name, s in scores.items()}, axis=1).any(axis=1)
+    assert set(result.index) == set(clean.loc[flagged, "po_id"])
+
+    for po_id, row in result.iterrows():
+        i = clean.index[clean["po_id"] == po_id][0]
+        best = max((s.loc[i, "score"], name) for name, s in scores.items() if s.loc[i, "flag"])
+        assert row["detector"] == best[1]
+        assert np.isclose(row["anomaly_score"], best[0])
+
+
+def test_mad_detector_uses_median_absolute_deviation():
+    prices = pd.Series([100.0, 101, 99, 102, 98, 100, 150])
+    df = pd.DataFrame({"po_id": range(7), "item_code": "A", "unit_price": prices})
+    result = DETECTORS["mad"](df)
+
+    mad = (prices - prices.median()).abs().median()
+    expected = (prices - prices.median()).abs() / (MAD_THRESHOLD * mad / MAD_SCALE)
+    np.testing.assert_allclose(result["score"], expected)
+    assert result["flag"].tolist() == [False] * 6 + [True]
+
+
+def test_rolling_zscore_compares_with_prior_window_only():
+    dates = pd.date_range("2024-01-01", periods=12, freq="7D")
+    prices = [100.0, 102, 98, 101, 99, 100, 103, 97, 100, 101, 160, 100]
+    df = pd.DataFrame({
+        "po_id": [f"PO{i}" for i in range(12)], "item_code": "A", "region": "North",
+        "po_date": dates, "unit_price": prices,
+    })
+    result = detect_anomalies(df, detectors=("rolling_zscore",), write=False)
+    assert result["po_id"].tolist() == ["PO10"]
+    assert np.isclose(result["expected_price"].iloc[0], np.mean(prices[:10]))
+
+    # History is context only: the same spike is found in a batch of two
+    batch = detect_anomalies(df[10:], detectors=("rolling_zscore",), history=df[:10], write=False)
+    assert batch["po_id"].tolist() == ["PO10"]
+
+
+def test_unknown_detector_is_rejected():
+    with pytest.raises(ValueError, match="Unknown anomaly detectors"):
+        detect_anomalies(purchase_orders(50), detectors=("nope",), write=False)
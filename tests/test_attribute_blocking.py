@@ -0,0 +1,29 @@
+import pandas as pd
+
+from ai_standardization.attribute_extraction import extract_attributes
+from ai_standardization.run_standardization import add_attribute_columns
+from ai_standardization.text_cleaning import clean_texts
+
+
+def blocks_for(descriptions):
+    unique_df = pd.DataFrame({"clean_text": clean_texts(pd.Series(descriptions))})
+    return add_attribute_columns(unique_df)["block_key"].tolist()
+
+
+def test_inch_and_mm_sizes_share_a_block():
+    blocks = blocks_for([
+        "CS PIPE 4 inch diameter",
+        "Carbon Steel Pipe Dia 100 mm",
+        "CS Pipe 100mm dia",
+    ])
+    assert len(set(blocks)) == 1
+
+
+def test_different_nominal_sizes_stay_apart():
+    blocks = blocks_for(["CS Pipe 6 inch", "CS Pipe 100mm dia"])
+    assert blocks[0] != blocks[1]
+
+
+def test_millimetres_are_not_read_as_a_length():
+    assert "length_m" not in extract_attributes("gi pipe 50mm")
+    assert extract_attributes("hose 3 m")["length_m"] == 3.0
@@ -0,0 +1,150 @@
+import numpy as np
+import pytest
+from sklearn.metrics import adjusted_rand_score
+
+from ai_standardization import clustering
+from ai_standardization.clustering import cluster_labels
+from ai_standardization.vector_index import MIN_ROWS_FOR_IVF
+
+
+def blobs(n_clusters=40, per_cluster=60, dim=32, spread=0.05, seed=0):
+    """Unit vectors scattered tightly around random directions."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_clusters, dim))
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    vectors = np.repeat(centers, per_cluster, axis=0)
+    vectors += rng.normal(scale=spread, size=vectors.shape)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    order = rng.permutation(len(vectors))
+    return vectors[order].astype(np.float32)
+
+
+def test_ann_matches_exact_dbscan():
+    # Large enough for the IVF index to train a coarse quantizer
+    embeddings = blobs()
+    assert len(embeddings) >= MIN_ROWS_FOR_IVF
+
+    exact = cluster_labels(embeddings, "dbscan", eps=0.15, min_samples=1)
+    approx = cluster_labels(embeddings, "ann", eps=0.15, min_samples=1)
+    assert adjusted_rand_score(exact, approx) > 0.99
+
+
+def test_ann_matches_exact_dbscan_on_small_input():
+    # Below MIN_ROWS_FOR_IVF the index scans one list, so the search is exact
+    embeddings = blobs(n_clusters=10, per_cluster=20)
+    exact = cluster_labels(embeddings, "dbscan", eps=0.15, min_samples=3)
+    approx = cluster_labels(embeddings, "ann", eps=0.15, min_samples=3)
+    np.testing.assert_array_equal(exact, approx)
+
+
+def test_ann_honours_sample_weight():
+    embeddings = blobs(n_clusters=10, per_cluster=20, spread=0.3)
+    weights = np.random.default_rng(1).integers(1, 5, size=len(embeddings))
+    exact = cluster_labels(embeddings, "dbscan", eps=0.2, min_samples=4, sample_weight=weights)
+    approx = cluster_labels(embeddings, "ann", eps=0.2, min_samples=4, sample_weight=weights)
+    np.testing.assert_array_equal(exact == -1, approx == -1)
+    assert adjusted_rand_score(exact, approx) > 0.99
+
+
+def test_agreement_report():
+    report = clustering.clustering_agreement_report(blobs(), sample_size=1000, eps=0.15)
+    assert report["sample_size"] == 1000
+    assert report["adjusted_rand_index"] > 0.99
+
+
+def test_weighted_distinct_rows_match_clustering_every_row():
+    distinct = blobs(n_clusters=10, per_cluster=20, spread=0.3)
+    counts = np.random.default_rng(2).integers(1, 5, size=len(distinct))
+    every_row = np.repeat(distinct, counts, axis=0)
+
+    for method in clustering.CLUSTER_METHODS:
+        weighted, weighted_stats = clustering.cluster_items_with_diagnostics(
+            distinct, method=method, eps=0.2, min_samples=4, sample_weight=counts
+        )
+        full, full_stats = clustering.cluster_items_with_diagnostics(
+            every_row, method=method, eps=0.2, min_samples=4
+        )
+        np.testing.assert_array_equal(np.repeat(weighted, counts), full)
+        assert weighted_stats == full_stats
+
+
+@pytest.fixture
+def parallel_blocks(monkeypatch):
+    """Sends every multi-row block to the pool, one block per task."""
+    monkeypatch.setattr(clustering, "PARALLEL_MIN_PAIRS", 0)
+    monkeypatch.setattr(clustering, "TASK_MIN_ROWS", 1)
+    yield
+    with clustering._pool_lock:
+        pool, clustering._pool = clustering._pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def test_parallel_blocks_match_sequential(parallel_blocks):
+    embeddings = blobs(n_clusters=10, per_cluster=20, spread=0.3)
+    rng = np.random.default_rng(3)
+    blocks = rng.integers(0, 6, size=len(embeddings))
+    blocks[:3] = [6, 7, 8]  # single-row blocks stay in-process
+    weights = rng.integers(1, 5, size=len(embeddings))
+
+    sequential = clustering.cluster_blocks(
+        embeddings, blocks, eps=0.2, min_samples=4, sample_weight=weights, workers=1
+    )
+    parallel = clustering.cluster_blocks(
+        embeddings, blocks, eps=0.2, min_samples=4, sample_weight=weights, workers=2
+    )
+    np.testing.assert_array_equal(sequential, parallel)
+
+    pool = clustering._pool
+    assert pool is not None
+    clustering.cluster_blocks(embeddings, blocks, eps=0.2, min_samples=4, workers=2)
+    assert clustering._pool is pool
+
+
+def test_small_blocks_stay_in_process(monkeypatch):
+    embeddings = blobs(n_clusters=10, per_cluster=20)
+    blocks = np.arange(len(embeddings)) % 4
+    monkeypatch.setattr(clustering, "_cluster_blocks_parallel", None)
+    clustering.cluster_blocks(embeddings, blocks, workers=2)
+
+
+def naive_diagnostics(embeddings, labels, weights, bins):
+    """One boolean mask per cluster, as the diagnostics were computed before."""
+    rows = []
+    for cluster in sorted(set(labels)):
+        mask = labels == cluster
+        members, w = embeddings[mask], weights[mask]
+        centroid = (members * w[:, None]).sum(axis=0) / w.sum()
+        centroid /= np.linalg.norm(centroid)
+        sims = members @ centroid / np.linalg.norm(members, axis=1)
+        # The first and last bins also take similarities outside [0, 1]
+        edges = [-np.inf, *bins[1:-1], np.inf]
+        histogram = [
+            round(w[(sims >= low) & (sims < high)].sum())
+            for low, high in zip(edges[:-1], edges[1:])
+        ]
+        rows.append((cluster, w.sum(), np.average(sims, weights=w), sims.min(), histogram))
+    return rows
+
+
+def test_diagnostics_match_per_cluster_loop():
+    embeddings = blobs(n_clusters=10, per_cluster=20, spread=0.3).astype(np.float64)
+    weights = np.random.default_rng(4).integers(1, 5, size=len(embeddings)).astype(np.float64)
+    labels = cluster_labels(embeddings, eps=0.2, min_samples=4, sample_weight=weights)
+    assert (labels == -1).any()
+
+    table, centroids = clustering.cluster_diagnostics(embeddings, labels, weights)
+    expected = naive_diagnostics(embeddings, labels, weights, clustering.COHESION_BINS)
+
+    assert table["cluster"].tolist() == [row[0] for row in expected]
+    np.testing.assert_allclose(table["cluster_size"], [row[1] for row in expected])
+    np.testing.assert_allclose(table["avg_similarity"], [row[2] for row in expected])
+    np.testing.assert_allclose(table["min_similarity"], [row[3] for row in expected])
+    assert table["similarity_histogram"].tolist() == [row[4] for row in expected]
+    assert len(centroids) == len(table)
+
+
+def test_diagnostics_of_no_rows():
+    table, centroids = clustering.cluster_diagnostics(np.empty((0, 4)), np.empty(0, dtype=int))
+    assert table.empty
+    assert centroids.shape == (0, 4)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from ai_analytics.cost_cube import CostCube, UNKNOWN_KEY, build_cube, partial_cube
+
+
+def po_rows(n=100):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "item_code": rng.choice(["PIPE_50", "PIPE_100"], n),
+        "canonical_item_name": "pipe",
+        "category": "Pipe",
+        "region": rng.choice(["North", "South"], n),
+        "supplier": rng.choice(["A", "B", "C"], n),
+        "po_date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 90, n), unit="D"),
+        "unit_price": rng.uniform(900, 1800, n),
+    })
+
+
+def test_missing_key_values_still_count_in_every_level():
+    df = po_rows()
+    df.loc[:9, "category"] = None
+    cube = build_cube(partial_cube(df))
+
+    for level, table in cube.items():
+        assert table["po_count"].sum() == len(df), level
+    category = cube["category"].set_index("category")["po_count"]
+    assert category[UNKNOWN_KEY] == 10
+
+
+def test_levels_without_their_columns_are_skipped():
+    df = po_rows().drop(columns="category")
+    cube = build_cube(partial_cube(df))
+
+    assert "category" not in cube and "category_region" not in cube
+    assert cube["region"]["po_count"].sum() == len(df)
+
+
+def test_fetch_matches_groupby():
+    df = po_rows()
+    cube = CostCube(build_cube(partial_cube(df)))
+
+    rows = cube.fetch("supplier_month", supplier="B", month="2024-02")
+    expected = df[(df["supplier"] == "B") & (df["po_date"].dt.month == 2)]["unit_price"]
+    assert rows["po_count"].tolist() == [len(expected)]
+    assert np.isclose(rows["avg_price"].iloc[0], expected.mean())
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from ai_standardization.embedding_cache import VECTORS_FILE, EmbeddingCache
+
+
+def unit_vectors(n, dim=8, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_round_trip_across_instances(tmp_path):
+    texts = [f"item {i}" for i in range(20)]
+    vectors = unit_vectors(20)
+    EmbeddingCache("model-a", tmp_path).put(texts, vectors)
+
+    cache = EmbeddingCache("model-a", tmp_path)
+    assert len(cache) == 20
+    out, missing = cache.get(["item 3", "unseen", "item 7"])
+    assert missing == [1]
+    np.testing.assert_array_equal(out[[0, 2]], vectors[[3, 7]])
+    assert not out[1].any()
+
+
+def test_nothing_cached(tmp_path):
+    out, missing = EmbeddingCache("model-a", tmp_path).get(["a", "b"])
+    assert out is None and missing == [0, 1]
+
+
+def test_model_change_discards_the_cache(tmp_path):
+    EmbeddingCache("model-a", tmp_path).put(["a"], unit_vectors(1))
+    cache = EmbeddingCache("model-b", tmp_path)
+    assert len(cache) == 0
+    assert cache.get(["a"]) == (None, [0])
+
+
+def test_duplicate_puts_are_stored_once(tmp_path):
+    cache = EmbeddingCache("model-a", tmp_path)
+    cache.put(["a", "b"], unit_vectors(2))
+    cache.put(["b", "c"], unit_vectors(2, seed=1))
+    assert len(EmbeddingCache("model-a", tmp_path)) == 3
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache("model-a", tmp_path, max_entries=3)
+    vectors = unit_vectors(4)
+    cache.put(["a", "b", "c"], vectors[:3])
+    cache.get(["c"])
+    cache.get(["a"])
+    cache.put(["d"], vectors[3:])
+
+    cache = EmbeddingCache("model-a", tmp_path, max_entries=3)
+    out, missing = cache.get(["a", "b", "c", "d"])
+    assert missing == [1]
+    np.testing.assert_array_equal(out[[0, 2, 3]], vectors[[0, 2, 3]])
+
+
+def test_interrupted_write_tail_is_dropped(tmp_path):
+    vectors = unit_vectors(3)
+    EmbeddingCache("model-a", tmp_path).put(["a", "b"], vectors[:2])
+    with open(tmp_path / VECTORS_FILE, "ab") as f:
+        f.write(b"\x00" * 10)  # a put that died before saving its metadata
+
+    cache = EmbeddingCache("model-a", tmp_path)
+    cache.put(["c"], vectors[2:])
+    out, missing = EmbeddingCache("model-a", tmp_path).get(["a", "b", "c"])
+    assert missing == []
+    np.testing.assert_array_equal(out, vectors)
+
+
+@pytest.mark.parametrize("dtype, min_cosine", [("float32", 1 - 1e-6), ("float16", 0.9999), ("int8", 0.998)])
+def test_storage_dtype_round_trip(tmp_path, dtype, min_cosine):
+    texts = [f"item {i}" for i in range(50)]
+    vectors = unit_vectors(50, dim=384)
+    EmbeddingCache("model-a", tmp_path, dtype=dtype).put(texts, vectors)
+
+    out, _ = EmbeddingCache("model-a", tmp_path, dtype=dtype).get(texts)
+    assert out.dtype == np.float32
+    cosine = np.einsum("ij,ij->i", out, vectors) / np.linalg.norm(out, axis=1)
+    assert cosine.min() >= min_cosine
+    assert (tmp_path / VECTORS_FILE).stat().st_size == vectors.size * np.dtype(dtype).itemsize
+
+
+def test_storage_dtype_change_discards_the_cache(tmp_path):
+    EmbeddingCache("model-a", tmp_path).put(["a"], unit_vectors(1))
+    assert len(EmbeddingCache("model-a", tmp_path, dtype="int8")) == 0
+
+
+def test_unknown_storage_dtype(tmp_path):
+    with pytest.raises(ValueError, match="storage dtype"):
+        EmbeddingCache("model-a", tmp_path, dtype="bfloat16")
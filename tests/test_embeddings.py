@@ -0,0 +1,127 @@
+import functools
+import logging
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ai_standardization import embeddings
+from ai_standardization.embedding_cache import EmbeddingCache
+from ai_standardization.encoder_backends import CharNgramEncoder
+
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKER_MODEL_ID = embeddings.model_id("char-ngram")
+TEXTS = ["gi pipe 50 mm", "gate valve 50mm", "carbon steel pipe diameter 100 mm"]
+
+
+def free_address():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"127.0.0.1:{sock.getsockname()[1]}"
+
+
+@pytest.fixture
+def local_encoder(monkeypatch):
+    """A model-free local encoder that records the texts it encodes."""
+    encoder = CharNgramEncoder(batch_size=64)
+    encoded = []
+
+    def encode(texts):
+        encoded.extend(texts)
+        return CharNgramEncoder.encode(encoder, texts)
+
+    encoder.encode = encode
+    monkeypatch.setattr(embeddings, "get_encoder", lambda: encoder)
+    return encoded
+
+
+@pytest.fixture(scope="module")
+def worker():
+    """A char-ngram encoder worker process on a free port."""
+    address, authkey = free_address(), "secret"
+    env = {**os.environ, "ENCODER_BACKEND": "char-ngram", "ENCODER_WORKER_AUTHKEY": authkey}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "ai_standardization.encoder_worker", address],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        assert process.stdout.readline().startswith("Encoder worker ready")
+        yield address, authkey
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def test_importing_the_pipeline_does_not_load_the_model():
+    code = (
+        "import sys, ai_standardization.run_standardization; "
+        "print('sentence_transformers' in sys.modules, 'torch' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_cached_texts_are_not_encoded(tmp_path, monkeypatch, local_encoder):
+    monkeypatch.setattr(embeddings, "EmbeddingCache", functools.partial(EmbeddingCache, cache_dir=tmp_path))
+    first = embeddings.generate_embeddings(TEXTS + TEXTS[:1])
+    assert sorted(local_encoder) == sorted(TEXTS)
+
+    local_encoder.clear()
+    second = embeddings.generate_embeddings(TEXTS[::-1])
+    assert local_encoder == []
+    np.testing.assert_array_equal(second, first[:3][::-1])
+
+
+def test_worker_encodes_for_the_pipeline(monkeypatch, worker, local_encoder):
+    address, authkey = worker
+    monkeypatch.setattr(embeddings, "WORKER_ADDRESS", address)
+    monkeypatch.setattr(embeddings, "WORKER_AUTHKEY", authkey)
+    monkeypatch.setattr(embeddings, "MODEL_ID", WORKER_MODEL_ID)
+
+    vectors = embeddings.encode_texts(TEXTS)
+    assert local_encoder == []
+    np.testing.assert_allclose(vectors, CharNgramEncoder(batch_size=64).encode(TEXTS))
+
+
+def test_falls_back_when_worker_is_unreachable(monkeypatch, caplog, local_encoder):
+    monkeypatch.setattr(embeddings, "WORKER_ADDRESS", free_address())
+    monkeypatch.setattr(embeddings, "WORKER_AUTHKEY", "secret")
+
+    with caplog.at_level(logging.WARNING, logger=embeddings.__name__):
+        vectors = embeddings.encode_texts(TEXTS)
+    assert local_encoder == TEXTS and vectors.shape[0] == len(TEXTS)
+    assert "Encoder worker unavailable" in caplog.text
+
+
+def test_falls_back_on_wrong_authkey_and_worker_keeps_serving(monkeypatch, caplog, worker, local_encoder):
+    address, authkey = worker
+    monkeypatch.setattr(embeddings, "WORKER_ADDRESS", address)
+    monkeypatch.setattr(embeddings, "MODEL_ID", WORKER_MODEL_ID)
+
+    monkeypatch.setattr(embeddings, "WORKER_AUTHKEY", "wrong")
+    with caplog.at_level(logging.WARNING, logger=embeddings.__name__):
+        embeddings.encode_texts(TEXTS)
+    assert local_encoder == TEXTS
+    assert "Encoder worker unavailable" in caplog.text
+
+    local_encoder.clear()
+    monkeypatch.setattr(embeddings, "WORKER_AUTHKEY", authkey)
+    embeddings.encode_texts(TEXTS)
+    assert local_encoder == []
+
+
+def test_falls_back_when_worker_has_another_model(monkeypatch, caplog, worker, local_encoder):
+    address, authkey = worker
+    monkeypatch.setattr(embeddings, "WORKER_ADDRESS", address)
+    monkeypatch.setattr(embeddings, "WORKER_AUTHKEY", authkey)
+    monkeypatch.setattr(embeddings, "MODEL_ID", "another-model")
+
+    with caplog.at_level(logging.WARNING, logger=embeddings.__name__):
+        embeddings.encode_texts(TEXTS)
+    assert local_encoder == TEXTS
+    assert "Encoder worker not usable" in caplog.text
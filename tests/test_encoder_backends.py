@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from ai_standardization import benchmark_encoders
+from ai_standardization.clustering import EPS
+from ai_standardization.encoder_backends import (
+    BACKENDS, CHAR_NGRAM_FEATURES, MODEL_FREE_BACKENDS, CharNgramEncoder, create_encoder, length_order,
+)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError, match="encoder backend"):
+        create_encoder("tensorflow", None, "model", 64)
+
+
+def test_model_free_backend_needs_no_model():
+    assert isinstance(create_encoder("char-ngram", None, "model", 64), CharNgramEncoder)
+
+
+def test_length_order_puts_longest_first():
+    texts = ["ab", "abcd", "a", "abc"]
+    assert [texts[i] for i in length_order(texts)] == ["abcd", "abc", "ab", "a"]
+
+
+def test_char_ngram_vectors_are_stable_and_normalized():
+    texts = ["carbon steel pipe diameter 100 mm", "gate valve 50mm", ""]
+    first = CharNgramEncoder(batch_size=64).encode(texts)
+    second = CharNgramEncoder(batch_size=64).encode(texts[::-1])[::-1]
+
+    assert first.shape == (3, CHAR_NGRAM_FEATURES) and first.dtype == np.float32
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_allclose(np.linalg.norm(first[:2], axis=1), 1.0, rtol=1e-6)
+    assert not first[2].any()
+
+
+def test_char_ngram_spelling_variants_are_within_eps():
+    encoder = CharNgramEncoder(batch_size=64)
+    pipe, variant, valve = encoder.encode([
+        "carbon steel pipe 100mm diameter", "carbon steel pipe diameter 100 mm", "gate valve 50mm",
+    ])
+    assert 1 - pipe @ variant <= EPS
+    assert 1 - pipe @ valve > EPS
+
+
+def test_char_ngram_batches_match_one_pass():
+    texts = [f"gi pipe {i} mm" for i in range(10_000)]
+    encoder = CharNgramEncoder(batch_size=64)
+    assert encoder.batch_size < len(texts)
+    np.testing.assert_allclose(encoder.encode(texts), encoder.vectorizer.transform(texts).toarray(), rtol=1e-6)
+
+
+def test_benchmark_runs_without_a_model(monkeypatch, capsys):
+    def no_torch():
+        raise ImportError("No module named 'torch'")
+
+    monkeypatch.setattr(benchmark_encoders, "get_model", no_torch)
+    benchmark_encoders.main(200)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert sum("unavailable" in line for line in lines) == len(BACKENDS) - len(MODEL_FREE_BACKENDS)
+    (char_ngram,) = [line.split() for line in lines if line.split()[:1] == ["char-ngram"]]
+    assert char_ngram[2:] == ["-", "-"]
+    assert any(line.split()[:1] == ["int8"] for line in lines)
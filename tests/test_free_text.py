@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from ai_free_text.run_free_text_analysis import analyze_free_text, analyze_free_text_batch, create_pool
+
+
+DOCUMENTS = [
+    "CS Pipe 100mm dia ordered for maintenance.",
+    "Stainless steel valve 2 inch purchased from ValveWorld at 4500.",
+    "Hydraulic oil ISO 68 required for operations, 1200 to 1500 per drum.",
+    "",
+    "Gasket and flange set, copper, 50 mm",
+] * 40
+
+
+def test_batch_matches_per_document_in_order():
+    expected = [analyze_free_text(text) for text in DOCUMENTS]
+    assert list(analyze_free_text_batch(iter(DOCUMENTS), workers=1, chunk_size=7)) == expected
+
+    pool = create_pool(2)
+    try:
+        assert list(analyze_free_text_batch(iter(DOCUMENTS), workers=2, chunk_size=7, pool=pool)) == expected
+    finally:
+        pool.shutdown()
+
+
+@pytest.fixture
+def http(monkeypatch):
+    api = pytest.importorskip("api")
+    monkeypatch.setattr(api, "INSIGHT_WORKERS", 1)
+    return api.app.test_client()
+
+
+def test_insights_endpoint_streams_one_line_per_document(http):
+    documents = ["CS Pipe 100mm", {"id": "b", "text": "copper cable"}, {"text": 5}]
+    response = http.post("/api/insights", json={"documents": documents})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == "application/x-ndjson"
+    assert lines[0] == {"id": 0, "insights": analyze_free_text("CS Pipe 100mm")}
+    assert lines[1] == {"id": "b", "insights": analyze_free_text("copper cable")}
+    assert lines[2]["id"] == 2 and "error" in lines[2]
+
+    body = "\n".join(json.dumps(doc) for doc in ["oil ISO 68", "valve"]) + "\nnot json\n"
+    response = http.post("/api/insights", data=body, content_type="application/x-ndjson")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["id"] for line in lines] == [0, 1, 2]
+    assert lines[1]["insights"] == analyze_free_text("valve") and "error" in lines[2]
+
+    assert http.post("/api/insights", json={"texts": []}).status_code == 400
@@ -0,0 +1,46 @@
+from ai_standardization.item_code_registry import ItemCodeRegistry
+
+
+def assign_and_save(registry_dir, clusters, weights=None):
+    """One run: {cluster id: [texts]} -> {cluster id: code}, registered and saved."""
+    registry = ItemCodeRegistry(registry_dir)
+    labels = [cluster for cluster, texts in clusters.items() for _ in texts]
+    texts = [text for members in clusters.values() for text in members]
+    weights = weights or [1] * len(texts)
+    codes = registry.assign(labels, texts, weights, {c: members[0] for c, members in clusters.items()})
+    registry.register(texts, [codes[label] for label in labels])
+    registry.save()
+    return codes
+
+
+def test_codes_survive_reclustering_and_renaming(tmp_path):
+    first = assign_and_save(tmp_path, {
+        0: ["gi pipe 50mm", "gi pipe 50 mm"],
+        1: ["gate valve 50mm"],
+    })
+
+    # Different cluster ids, member order and canonical name; one new member
+    second = assign_and_save(tmp_path, {
+        7: ["gate valve 50mm", "gate valve 50 mm"],
+        3: ["gi pipe 50 mm", "gi pipe 50mm", "gi pipes 50mm"],
+        9: ["ball valve 2 inch"],
+    })
+    assert second[3] == first[0] and second[7] == first[1]
+    assert second[9] not in first.values()
+
+    # A fresh registry object sees the same codes
+    assert ItemCodeRegistry(tmp_path).lookup(["gi pipes 50mm", "unseen"]) == [first[0], None]
+
+
+def test_split_cluster_keeps_code_with_most_rows(tmp_path):
+    first = assign_and_save(tmp_path, {0: ["pipe a", "pipe b", "pipe c"]})
+    second = assign_and_save(tmp_path, {1: ["pipe a"], 2: ["pipe b", "pipe c"]}, weights=[5, 1, 1])
+
+    assert second[1] == first[0]
+    assert second[2] != first[0]
+
+
+def test_minted_codes_never_collide(tmp_path):
+    registry = ItemCodeRegistry(tmp_path)
+    codes = registry.assign([0, 1], ["pipe", "pipe "], [1, 1], {0: "pipe", 1: "pipe"}, reserved=["X"])
+    assert len(set(codes.values())) == 2
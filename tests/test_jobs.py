@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from jobs import FAILED, MAX_JOBS_KEPT, QUEUED, RUNNING, SUCCEEDED, JobError, JobRunner
+
+
+def wait_for(get, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get(job_id)
+        if job["status"] in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_result_and_failure_records():
+    runner = JobRunner()
+    ok = runner.submit("sum", sum, [1, 2, 3])
+    assert ok["status"] in (QUEUED, RUNNING, SUCCEEDED)
+    assert wait_for(runner.get, ok["job_id"])["result"] == 6
+
+    def fail():
+        raise JobError("Processing failed", output="stage 1\n")
+
+    failed = wait_for(runner.get, runner.submit("fail", fail)["job_id"])
+    assert failed["status"] == FAILED
+    assert failed["error"] == {"message": "Processing failed", "output": "stage 1\n"}
+
+    crashed = wait_for(runner.get, runner.submit("crash", lambda: 1 / 0)["job_id"])
+    assert "ZeroDivisionError" in crashed["error"]["traceback"]
+    assert runner.get("missing") is None
+
+
+def test_active_job_and_history_limit():
+    runner = JobRunner()
+    release = threading.Event()
+    blocking = runner.submit("pipeline", release.wait)
+    assert runner.active("pipeline")["job_id"] == blocking["job_id"]
+    assert runner.active("other") is None
+    release.set()
+    wait_for(runner.get, blocking["job_id"])
+    assert runner.active("pipeline") is None
+
+    # Finished jobs beyond MAX_JOBS_KEPT are dropped on the next submit
+    ids = [runner.submit("n", int, i)["job_id"] for i in range(MAX_JOBS_KEPT + 5)]
+    wait_for(runner.get, ids[-1])
+    last = runner.submit("n", int, 0)["job_id"]
+    wait_for(runner.get, last)
+    assert len(runner.list()) == MAX_JOBS_KEPT
+    assert runner.list()[0]["job_id"] == last
+
+
+@pytest.fixture
+def client(standardization_env, monkeypatch, caplog):
+    api = pytest.importorskip("api")
+    from pipeline import Pipeline
+
+    # The API configures INFO logging at startup; pytest keeps the root at WARNING
+    for name in api.PIPELINE_LOGGERS:
+        caplog.set_level(logging.INFO, logger=name)
+
+    # Full in-process pipeline on the sample data, writing nothing to disk
+    monkeypatch.setattr(api, "pipeline_runner", Pipeline(standardization_mode="full", write_outputs=False))
+    return api, api.app.test_client()
+
+
+def test_process_returns_202_and_job_publishes_snapshot(client):
+    api, http = client
+    version = api.snapshot.version if api.snapshot is not None else 0
+
+    response = http.post("/api/process")
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body["status_url"] == f"/api/jobs/{body['job_id']}"
+
+    job = wait_for(lambda job_id: http.get(f"/api/jobs/{job_id}").get_json(), body["job_id"])
+    assert job["status"] == SUCCEEDED, job["error"]
+    assert job["result"]["data_version"] == version + 1
+    assert "[1/5] standardization" in job["result"]["output"]
+    assert set(job["result"]["stage_timings"]) == {"standardization", "aggregation", "trends", "cube", "anomalies"}
+
+    assert http.get("/api/health").get_json()["data_version"] == version + 1
+    assert http.get("/api/items").get_json()["total"] == job["result"]["standardized_items"]
+    assert http.get("/api/jobs/unknown").status_code == 404
@@ -0,0 +1,103 @@
+import re
+
+import numpy as np
+import pytest
+
+from ai_free_text.insight_generation import generate_insights, generate_insights_batch
+from ai_standardization.category_tagging import assign_categories, assign_category
+from ai_standardization.keyword_matcher import KeywordMatcher
+
+
+def baseline_category(text):
+    """The if-chain assign_category replaced."""
+    text = text.lower()
+    for category, keywords in [
+        ("Pipe", ["pipe"]), ("Valve", ["valve"]), ("Flange", ["flange"]), ("Gasket", ["gasket"]),
+        ("Fasteners", ["bolt", "nut"]), ("Pump", ["pump"]), ("Bearing", ["bearing"]),
+        ("Electrical Cable", ["cable", "wire"]), ("Lubricant", ["oil", "lubricant"]),
+        ("Safety Equipment", ["helmet", "safety"]),
+        ("Instrumentation", ["gauge", "thermocouple", "sensor"]),
+    ]:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return "Other"
+
+
+def baseline_insights(text):
+    """The per-keyword loops generate_insights replaced."""
+    insights = []
+    lowered = text.lower()
+    items = sorted({kw.capitalize() for kw in
+                    ["pipe", "valve", "flange", "gasket", "pump", "bearing", "cable", "oil", "filter"]
+                    if kw in lowered})
+    if items:
+        insights.append(f"Items detected: {', '.join(items)}")
+    materials = sorted({m.title() for m in ["carbon steel", "stainless steel", "mild steel", "copper"] if m in lowered})
+    if materials:
+        insights.append(f"Materials: {', '.join(materials)}")
+    sizes = sorted({f"{s[0]} {s[1]}" for s in re.findall(r"\b\d+(\.\d+)?\s*(mm|inch|in)\b", lowered)})
+    if sizes:
+        insights.append(f"Sizes: {', '.join(sizes)}")
+    grades = re.findall(r"iso\s*\d+", lowered)
+    if grades:
+        insights.append(f"Oil grade: {', '.join(sorted(set(grades)))}")
+    prices = sorted({int(p) for p in re.findall(r"\b\d{3,6}\b", lowered)})
+    if len(prices) >= 2:
+        insights.append(f"Price range mentioned: {min(prices)} to {max(prices)}")
+    elif prices:
+        insights.append(f"Price mentioned: {prices[0]}")
+    context = []
+    if "maintenance" in lowered:
+        context.append("Maintenance")
+    if "operation" in lowered or "operations" in lowered:
+        context.append("Operations")
+    if context:
+        insights.append(f"Usage context: {', '.join(context)}")
+    return insights
+
+
+WORDS = [
+    "pipe", "valve", "flange", "gasket", "bolt", "nut", "pump", "bearing", "cable", "wire", "oil",
+    "lubricant", "helmet", "safety", "gauge", "sensor", "filter", "carbon steel", "stainless",
+    "steel", "copper", "mild", "maintenance", "operations", "iso 68", "50mm", "2 inch", "1200",
+    "45000", "x", "-", "PIPEVALVE", "nutbolt", "soil", "boiler", "spiped",
+]
+
+
+def texts(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        ("" if rng.random() < 0.5 else " ").join(rng.choice(WORDS, rng.integers(0, 6)))
+        for _ in range(n)
+    ]
+
+
+def test_categories_match_if_chain():
+    sample = texts()
+    assert [assign_category(t) for t in sample] == [baseline_category(t) for t in sample]
+    assert assign_categories(sample).tolist() == [baseline_category(t) for t in sample]
+
+
+def test_insights_match_keyword_loops():
+    sample = texts()
+    assert [generate_insights(t) for t in sample] == [baseline_insights(t) for t in sample]
+    assert generate_insights_batch(sample) == [baseline_insights(t) for t in sample]
+
+
+def test_overlapping_keywords_match_brute_force():
+    rng = np.random.default_rng(1)
+    taxonomy = {
+        f"L{i}": ["".join(rng.choice(list("abc"), rng.integers(1, 4))) for _ in range(2)]
+        for i in range(8)
+    }
+    matcher = KeywordMatcher(taxonomy)
+    for _ in range(500):
+        text = "".join(rng.choice(list("abcX"), rng.integers(0, 10)))
+        expected = [label for label, keywords in taxonomy.items() if any(k in text for k in keywords)]
+        assert matcher.find(text) == expected, text
+        assert matcher.first(text) == (expected[0] if expected else None), text
+
+
+def test_empty_taxonomy_is_rejected():
+    with pytest.raises(ValueError):
+        KeywordMatcher({"A": [""]})
@@ -0,0 +1,57 @@
+import numpy as np
+
+from ai_standardization.near_duplicates import _bucket_pairs, near_duplicate_groups
+
+
+def partition(texts, groups):
+    members = {}
+    for text, group in zip(texts, groups):
+        members.setdefault(group, set()).add(text)
+    return {frozenset(group) for group in members.values()}
+
+
+def variants():
+    rng = np.random.default_rng(0)
+    words = ["carbon", "steel", "pipe", "seamless", "flanged", "black", "welded", "heavy", "grade", "api"]
+    texts = set()
+    for size in (50, 80, 100):
+        for _ in range(60):
+            picked = rng.choice(words, size=rng.integers(5, 9), replace=False)
+            texts.add(" ".join([*picked, str(size), "mm"]))
+    return sorted(texts)
+
+
+def test_groups_do_not_depend_on_input_order():
+    texts = variants()
+    expected = partition(texts, near_duplicate_groups(texts, threshold=0.7))
+    assert any(len(group) > 1 for group in expected)
+
+    rng = np.random.default_rng(1)
+    for _ in range(5):
+        shuffled = list(rng.permutation(texts))
+        assert partition(shuffled, near_duplicate_groups(shuffled, threshold=0.7)) == expected
+
+
+def test_different_numbers_never_group():
+    texts = ["carbon steel pipe 100 mm", "carbon steel pipe 80 mm"]
+    groups = near_duplicate_groups(texts, threshold=0.5)
+    assert groups[0] != groups[1]
+
+
+def test_large_single_bucket_is_linear():
+    rng = np.random.default_rng(2)
+    words = ["carbon", "steel", "pipe", "seamless", "black", "welded", "100", "mm"]
+    shuffled = [" ".join(rng.permutation(words)) + ("," if i % 2 else "") for i in range(20_000)]
+    assert set(near_duplicate_groups(shuffled)) == {0}
+
+    # Distinct token sets that all share one bucket
+    tags = ["".join(chr(97 + i // 26 ** k % 26) for k in range(4)) for i in range(5_000)]
+    distinct = [" ".join(words + [tag]) for tag in tags]
+    assert set(near_duplicate_groups(distinct, threshold=0.75)) == {0}
+
+
+def test_oversized_buckets_are_linked_as_a_star():
+    buckets = np.r_[np.zeros(1_000, dtype=np.int64), np.arange(1, 5)]
+    pairs = np.concatenate(_bucket_pairs(buckets))
+    assert len(pairs) == 999
+    assert set(pairs // len(buckets)) == {0}
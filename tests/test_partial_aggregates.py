@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+from ai_analytics.aggregation import aggregate_costs, aggregate_costs_from_partial, partial_costs
+from ai_analytics.anomaly_detection import detect_anomalies, detect_anomalies_with_item_stats
+from ai_analytics.partial_aggregates import SKETCH_RELATIVE_ACCURACY, PartialAggregate
+
+
+def clean_pos(n=20_000, seed=0):
+    rng = np.random.default_rng(seed)
+    items = rng.integers(0, 40, n)
+    price = np.exp(rng.normal(np.log(100 + 25 * items), 0.2))
+    spikes = rng.random(n) < 0.01
+    price[spikes] *= 4
+    return pd.DataFrame({
+        "po_id": [f"PO{i:06d}" for i in range(n)],
+        "item_code": [f"ITEM_{i:02d}" for i in items],
+        "canonical_item_name": [f"item {i}" for i in items],
+        "region": rng.choice(["North", "South", "East"], n),
+        "supplier": rng.choice(["A", "B", "C", "D"], n),
+        "unit_price": price.round(2),
+    })
+
+
+def chunks(df, size=3_000):
+    return [df.iloc[start:start + size] for start in range(0, len(df), size)]
+
+
+def test_merged_chunks_equal_one_pass():
+    df = clean_pos()
+    whole = PartialAggregate(["item_code"]).update(df).result().set_index("item_code").sort_index()
+
+    merged = PartialAggregate(["item_code"])
+    for chunk in chunks(df):
+        merged.merge(PartialAggregate(["item_code"]).update(chunk))
+    merged = merged.result().set_index("item_code").sort_index()
+
+    pd.testing.assert_frame_equal(merged, whole, check_dtype=False)
+
+
+def test_sketch_quantiles_are_within_relative_accuracy():
+    df = clean_pos()
+    partial = PartialAggregate(["item_code"]).update(df)
+    prices = df.groupby("item_code")["unit_price"]
+
+    for q in (0.1, 0.5, 0.9):
+        estimate = partial.quantile(q).set_index("item_code")["value"].sort_index()
+        exact = prices.quantile(q).sort_index()
+        relative = ((estimate - exact).abs() / exact).max()
+        assert relative <= SKETCH_RELATIVE_ACCURACY, (q, relative)
+
+
+def test_rollup_equals_grouping_the_rows():
+    df = clean_pos()
+    fine = PartialAggregate(["item_code", "region", "supplier"]).update(df)
+    rolled = fine.rollup(["region"]).result().set_index("region").sort_index()
+    direct = PartialAggregate(["region"]).update(df).result().set_index("region").sort_index()
+    pd.testing.assert_frame_equal(rolled, direct, check_dtype=False)
+
+
+def test_chunked_analytics_match_in_memory():
+    df = clean_pos()
+    expected = aggregate_costs(df, write=False)
+
+    partial = partial_costs(chunks(df)[0])
+    for chunk in chunks(df)[1:]:
+        partial.merge(partial_costs(chunk))
+    result = aggregate_costs_from_partial(partial, write=False)
+
+    assert result[["item_code", "region", "supplier"]].equals(expected[["item_code", "region", "supplier"]])
+    for column in ("avg_price", "min_price", "max_price", "price_std"):
+        np.testing.assert_allclose(result[column], expected[column], rtol=1e-9)
+    relative = (result["median_price"] - expected["median_price"]).abs() / expected["median_price"]
+    assert relative.max() <= SKETCH_RELATIVE_ACCURACY
+
+    # Chunked anomalies against merged per-item stats flag the same rows
+    item_stats = PartialAggregate(["item_code"]).update(df).result().set_index("item_code").rename(
+        columns={"median": "median_price", "std": "std_price"}
+    )
+    chunked = pd.concat([detect_anomalies_with_item_stats(chunk, item_stats) for chunk in chunks(df)])
+    assert set(chunked["po_id"]) == set(detect_anomalies(df, write=False)["po_id"])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from query_store import QueryStore, SearchIndex
+
+
+def items():
+    names = ["Carbon Steel Pipe 100mm", "Stainless Steel Pipe 50 mm", "Gate Valve DN100",
+             "Pipe Elbow 90 deg", "Ball Valve 2 inch", None]
+    suppliers = ["Acme Pipes Ltd", "Steelworks", "ValveCo", "Acme Pipes Ltd", "Pipeline Supply", "ValveCo"]
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, len(names), 200)
+    return pd.DataFrame({
+        "canonical_item_name": [names[i] for i in rows],
+        "supplier_name": [suppliers[i] for i in rows],
+    })
+
+
+def test_search_matches_substring_scan():
+    df = items()
+    index = SearchIndex(df)
+    for query in ["pipe", "PIP", "ipe", "steel pipe", "l pi", "100", "0mm", "dn1", "e", "acme pipes",
+                  "valve 2 in", "pipeline", "90 deg", "nothing", "-", ""]:
+        expected = np.flatnonzero(
+            df["canonical_item_name"].str.contains(query, case=False, regex=False, na=False)
+            | df["supplier_name"].str.contains(query, case=False, regex=False, na=False)
+        )
+        assert index.search(query).tolist() == expected.tolist(), query
+
+
+def test_items_page_pages_through_search_results():
+    standardized = items().assign(
+        unit_price=1.0, standardization_confidence=0.9, category="Pipes",
+    )
+    store = QueryStore(standardized, pd.DataFrame(), pd.DataFrame())
+    matches = store.search_index.search("valve").tolist()
+
+    pages = [store.items_page(page, 25, "valve") for page in range(1, 4)]
+    assert all(p["total"] == len(matches) for p in pages)
+    assert pages[0]["pages"] == -(-len(matches) // 25)
+    names = [item["canonical_item_name"] for p in pages for item in p["items"]]
+    assert names == standardized["canonical_item_name"].take(matches[:75]).tolist()
+
+    unfiltered = store.items_page(2, 50)
+    assert unfiltered["total"] == len(standardized) and len(unfiltered["items"]) == 50
+    assert unfiltered["items"][0]["canonical_item_name"] == standardized["canonical_item_name"][50]
@@ -0,0 +1,100 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_standardization import run_standardization
+from ai_standardization.item_code_registry import ItemCodeRegistry
+from ai_standardization.run_standardization import BLOCK_COLUMNS, EPS, MODEL_ID, build_cluster_table, standardize
+
+
+DESCRIPTIONS = [
+    "GI Pipe 50mm", "GI Pipe 50 mm", "Carbon Steel Pipe Dia 100 mm",
+    "Carbon Steel Pipe 100mm dia", "Stainless Steel Pipe 40mm", "Gate Valve 50mm",
+]
+
+
+def raw_pos(descriptions):
+    return pd.DataFrame({
+        "po_id": [f"PO{i:04d}" for i in range(len(descriptions))],
+        "item_description": descriptions,
+    })
+
+
+def test_dry_run_writes_no_state(standardization_env):
+    state_dir, registry_dir = standardization_env
+    standardize(raw_pos(DESCRIPTIONS), write_state=False)
+    assert not state_dir.exists() and not registry_dir.exists()
+
+    standardize(raw_pos(DESCRIPTIONS))
+    assert (state_dir / "meta.json").exists() and (registry_dir / "meta.json").exists()
+
+
+def logged_cluster_ids(caplog):
+    return [int(r.getMessage().split()[1]) for r in caplog.records if r.getMessage().startswith("Cluster ")]
+
+
+def test_incremental_run_reuses_clusters_and_codes(standardization_env):
+    first = standardize(raw_pos(DESCRIPTIONS))
+    codes = dict(zip(first["item_description"], first["item_code"]))
+
+    more = DESCRIPTIONS + ["GI Pipes 50 mm", "Butterfly Valve 150mm", "Butterfly Valve 150 mm"]
+    second = standardize(raw_pos(more), mode="incremental")
+    second_codes = dict(zip(second["item_description"], second["item_code"]))
+
+    assert all(second_codes[text] == code for text, code in codes.items())
+    assert second_codes["GI Pipes 50 mm"] == codes["GI Pipe 50mm"]
+    assert second_codes["Butterfly Valve 150mm"] == second_codes["Butterfly Valve 150 mm"]
+    assert second_codes["Butterfly Valve 150mm"] not in codes.values()
+
+
+def test_incremental_diagnostics_use_global_cluster_ids(standardization_env, caplog):
+    standardize(raw_pos(DESCRIPTIONS))
+    state = run_standardization.ClusterState.load(MODEL_ID, EPS, BLOCK_COLUMNS)
+    known_clusters = len(state.clusters)
+
+    caplog.set_level(logging.INFO, logger="ai_standardization")
+    out = standardize(raw_pos(DESCRIPTIONS + ["Butterfly Valve 150mm", "Ball Valve 2 inch"]), mode="incremental")
+
+    ids = logged_cluster_ids(caplog)
+    state = run_standardization.ClusterState.load(MODEL_ID, EPS, BLOCK_COLUMNS)
+    new_codes = set(out["item_code"].iloc[len(DESCRIPTIONS):])
+    assert len(ids) == 2 and min(ids) >= known_clusters
+    assert set(state.clusters.loc[ids, "item_code"]) == new_codes
+
+
+def candidate_table():
+    """Cluster 0: "a" has the most rows, "b" and "c" sit on the centroid.
+    Cluster 1: "d" and "e" tie on rows, "e" is nearer the centroid and
+    "f" nearer still."""
+    unique_df = pd.DataFrame({
+        "clean_text": ["a", "b", "c", "d", "e", "f"],
+        "cluster": [0, 0, 0, 1, 1, 1],
+        "row_count": [3, 2, 2, 2, 2, 1],
+        "category": ["pipe"] * 3 + ["valve"] * 3,
+        "block_key": ["pipe"] * 3 + ["valve"] * 3,
+    })
+    embeddings = np.array([[1, 0], [0, 1], [0, 1], [1, 0], [0, 1], [0.1, 1]], dtype=np.float32)
+    return unique_df, embeddings
+
+
+@pytest.mark.parametrize("method, expected", [("frequent", ["a", "e"]), ("medoid", ["b", "f"])])
+def test_canonical_names_do_not_depend_on_row_order(tmp_path, method, expected):
+    unique_df, embeddings = candidate_table()
+    table = build_cluster_table(unique_df, embeddings, ItemCodeRegistry(tmp_path / "a"), method=method)
+    assert table["canonical_item_name"].tolist() == expected
+    assert table["category"].tolist() == ["pipe", "valve"]
+
+    order = np.random.default_rng(0).permutation(len(unique_df))
+    shuffled = build_cluster_table(
+        unique_df.iloc[order].reset_index(drop=True), embeddings[order],
+        ItemCodeRegistry(tmp_path / "b"), method=method,
+    )
+    pd.testing.assert_frame_equal(shuffled, table)
+
+
+def test_unknown_canonical_method(tmp_path):
+    unique_df, embeddings = candidate_table()
+    with pytest.raises(ValueError, match="canonical method"):
+        build_cluster_table(unique_df, embeddings, ItemCodeRegistry(tmp_path), method="longest")
@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+
+from ai_analytics.storage import parquet_path, read_table, table_columns, table_exists, write_table
+
+
+def table():
+    return pd.DataFrame({
+        "item_code": ["PIPE_50", "PIPE_100", "VALVE_50"],
+        "region": ["North", "South", "North"],
+        "po_date": ["2024-01-05", "2024-02-10", None],
+        "unit_price": [1200.5, 1800.0, 950.25],
+    })
+
+
+def test_parquet_copy_round_trips_with_types(tmp_path):
+    path = tmp_path / "cost_analytics.csv"
+    write_table(table(), path)
+    assert path.exists() and parquet_path(path).exists()
+
+    df = read_table(path)
+    assert df["region"].dtype == "category"
+    assert pd.api.types.is_datetime64_any_dtype(df["po_date"])
+    assert df["po_date"].isna().tolist() == [False, False, True]
+    pd.testing.assert_frame_equal(
+        df.astype({"region": object}).drop(columns="po_date"), table().drop(columns="po_date")
+    )
+
+    assert read_table(path, columns=["item_code"]).columns.tolist() == ["item_code"]
+    assert table_columns(path) == table().columns.tolist()
+
+
+def test_newer_csv_wins_over_stale_parquet(tmp_path):
+    path = tmp_path / "anomalies.csv"
+    write_table(table(), path)
+    write_table(table().head(1), path, formats=("csv",))
+    stamp = parquet_path(path).stat().st_mtime
+    os.utime(path, (stamp + 10, stamp + 10))
+
+    assert len(read_table(path)) == 1
+
+
+def test_parquet_only_table(tmp_path):
+    path = tmp_path / "standardized_items.csv"
+    write_table(table(), path, formats=("parquet",))
+    assert not path.exists() and table_exists(path)
+    assert len(read_table(path)) == 3
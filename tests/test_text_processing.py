@@ -0,0 +1,52 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from ai_standardization import text_cleaning
+from ai_standardization.attribute_extraction import (
+    ATTRIBUTE_COLUMNS, attribute_dicts, extract_attributes, extract_attributes_batch,
+)
+from ai_standardization.text_cleaning import ABBREVIATIONS, clean_text, clean_texts
+
+
+def baseline_clean_text(text):
+    """clean_text as it was before the abbreviations shared one regex."""
+    text = text.lower()
+    text = re.sub(r"[^a-z0-9\s\.]", " ", text)
+    for abbr, full in ABBREVIATIONS.items():
+        text = re.sub(rf"\b{abbr}\b", full, text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def descriptions(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array([
+        "CS", "SS", "Dia", "OD", "ID", "cs-pipe", "Pipe", "GI", "valve", "ss304",
+        "50mm", "4 inch", "2.5 in", "6m", "10 ft", "(flanged)", "Carbon Steel",
+        "stainless steel", "dia.", "100 mm", "  ", "#40", "3/4\"",
+    ])
+    return [" ".join(rng.choice(words, size=rng.integers(1, 7))) for _ in range(n)]
+
+
+def test_clean_texts_matches_per_item_baseline():
+    texts = descriptions()
+    expected = [baseline_clean_text(text) for text in texts]
+    assert [clean_text(text) for text in texts] == expected
+    assert clean_texts(pd.Series(texts)) == expected
+
+
+def test_parallel_clean_texts_matches_sequential(monkeypatch):
+    monkeypatch.setattr(text_cleaning, "PARALLEL_MIN_TEXTS", 1)
+    texts = descriptions(200)
+    assert clean_texts(texts, workers=2) == clean_texts(texts)
+
+
+def test_extract_attributes_batch_matches_per_item():
+    texts = clean_texts(descriptions())
+    batch = extract_attributes_batch(texts)
+
+    assert batch.columns.tolist() == ATTRIBUTE_COLUMNS
+    assert len(batch) == len(texts)
+    assert attribute_dicts(batch) == [extract_attributes(text) for text in texts]
+    assert batch["diameter_mm"].notna().any() and batch["material"].notna().any()
@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_analytics import trend_analysis
+from ai_analytics.trend_analysis import (
+    add_trend_labels, add_trend_labels_from_partial, monthly_price_stats, trend_table,
+)
+
+
+def dated_pos(n=5_000, seed=0):
+    """Items whose prices drift up, drift down or stay flat over 2023-2024."""
+    rng = np.random.default_rng(seed)
+    items = rng.integers(0, 30, n)
+    drift = np.array([0.05, -0.05, 0.0])[items % 3]
+    days = rng.integers(0, 730, n)
+    price = (100 + 10 * items) * (1 + drift * days / 30) * np.exp(rng.normal(0, 0.05, n))
+    df = pd.DataFrame({
+        "item_code": [f"ITEM_{i:02d}" for i in items],
+        "region": rng.choice(["North", "South"], n),
+        "po_date": pd.Timestamp("2023-01-01") + pd.to_timedelta(days, unit="D"),
+        "unit_price": price.round(2),
+    })
+    # Two purchases in one month only: too little history for a trend
+    short = pd.DataFrame({
+        "item_code": "ITEM_99", "region": "North",
+        "po_date": pd.to_datetime(["2024-03-02", "2024-03-20"]), "unit_price": [10.0, 20.0],
+    })
+    return pd.concat([df, short], ignore_index=True)
+
+
+def reference_trends(df):
+    """Per-item np.polyfit over monthly mean prices, one group at a time."""
+    rows = []
+    for item, group in df.groupby("item_code"):
+        month = group["po_date"].dt.year * 12 + group["po_date"].dt.month
+        monthly = group.groupby(month)["unit_price"].mean()
+        if len(monthly) > 1:
+            slope = np.polyfit(monthly.index.to_numpy(float), monthly.to_numpy(), 1)[0]
+        else:
+            slope = 0.0
+        relative = slope / monthly.mean()
+        if len(monthly) < trend_analysis.MIN_TREND_MONTHS:
+            direction = "STABLE"
+        elif relative > trend_analysis.UPTREND_THRESHOLD:
+            direction = "UP"
+        elif relative < trend_analysis.DOWNTREND_THRESHOLD:
+            direction = "DOWN"
+        else:
+            direction = "STABLE"
+        prices = group["unit_price"]
+        rows.append({
+            "item_code": item,
+            "trend_direction": direction,
+            "price_slope": slope,
+            "price_volatility": prices.std() / prices.mean(),
+            "trend_months": len(monthly),
+        })
+    return pd.DataFrame(rows).set_index("item_code")
+
+
+def test_trends_match_per_item_polyfit():
+    df = dated_pos()
+    trends = trend_table(monthly_price_stats(df)).set_index("item_code").sort_index()
+    expected = reference_trends(df)
+
+    pd.testing.assert_frame_equal(trends, expected, check_dtype=False, check_index_type=False)
+    assert set(trends["trend_direction"]) == {"UP", "DOWN", "STABLE"}
+    assert trends.loc["ITEM_99", "trend_direction"] == "STABLE"
+
+
+def test_merged_monthly_chunks_equal_one_pass():
+    df = dated_pos().sample(frac=1, random_state=1)
+    agg_df = df[["item_code", "region"]].drop_duplicates().reset_index(drop=True)
+
+    merged = monthly_price_stats(df.iloc[:1_000])
+    for start in range(1_000, len(df), 1_000):
+        merged.merge(monthly_price_stats(df.iloc[start:start + 1_000]))
+
+    pd.testing.assert_frame_equal(
+        add_trend_labels_from_partial(agg_df, merged), add_trend_labels(agg_df, df)
+    )
+
+
+def test_trends_per_item_and_region():
+    df = dated_pos()
+    by = ["item_code", "region"]
+    agg_df = df[by].drop_duplicates().reset_index(drop=True)
+    labelled = add_trend_labels(agg_df, df, by=by)
+    assert len(labelled) == len(agg_df)
+
+    one = labelled.query("item_code == 'ITEM_00' and region == 'South'").iloc[0]
+    expected = reference_trends(df.query("item_code == 'ITEM_00' and region == 'South'")).iloc[0]
+    assert one["price_slope"] == pytest.approx(expected["price_slope"])
+
+
+def test_items_without_dated_rows_are_stable():
+    df = dated_pos()
+    agg_df = pd.DataFrame({"item_code": ["ITEM_00", "ITEM_NEW"], "trend_direction": "UP"})
+    labelled = add_trend_labels(agg_df, df).set_index("item_code")
+
+    assert labelled.loc["ITEM_NEW", "trend_direction"] == "STABLE"
+    assert labelled.loc["ITEM_NEW", "trend_months"] == 0
+    assert labelled.loc["ITEM_00", "trend_direction"] == "UP"
+
+
+def test_missing_columns():
+    with pytest.raises(ValueError, match="po_date"):
+        monthly_price_stats(pd.DataFrame({"item_code": ["A"], "unit_price": [1.0]}))